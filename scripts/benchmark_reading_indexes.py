@@ -0,0 +1,108 @@
+"""
+show the query plans and times of the main reading queries without and with the indexes on the reading table, on an
+existing database.  The indexes are dropped and created again inside one transaction that is rolled back at the end,
+so the database is not changed unless --keep is given.  The reading table is locked for the whole run, so use a copy
+of the production database or run it when nothing is collecting.
+
+usage:  python scripts/benchmark_reading_indexes.py [-d postgresql+psycopg2://...] [--station-code CODE] [--days 7] [--keep]
+"""
+
+import argparse, re
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from ewxpwsdb.db import database
+from ewxpwsdb.db.models import Reading
+from ewxpwsdb.db.upgrade import READING_INDEX_STATEMENTS
+
+# the queries of StationReadings, by name
+QUERIES = {
+    'readings_by_interval': """
+        select * from reading
+        where weatherstation_id = :station_id and data_datetime >= :start and data_datetime <= :end
+        order by data_datetime
+        """,
+    'latest_reading': """
+        select * from reading where weatherstation_id = :station_id order by data_datetime desc limit 1
+        """,
+    'recent_readings': """
+        select * from reading where weatherstation_id = :station_id order by data_datetime desc limit 100
+        """,
+    'reading_timestamps': """
+        select data_datetime from reading
+        where weatherstation_id = :station_id and data_datetime >= :start and data_datetime <= :end
+        order by data_datetime
+        """,
+    'api_responses_by_interval': """
+        select apiresponse.id, apiresponse.request_datetime from apiresponse
+        where apiresponse.id in (
+            select distinct reading.apiresponse_id from reading
+            where reading.weatherstation_id = :station_id and reading.data_datetime >= :start and reading.data_datetime <= :end
+        )
+        """,
+}
+
+
+def explain(connection, sql_str:str, params:dict)->tuple[list[str], float]:
+    """the plan of a query as lines of text, and its execution time in ms"""
+    plan = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql_str}"), params).scalars().all()
+    match = re.search(r"Execution Time: ([\d.]+) ms", plan[-1])
+    return plan, float(match.group(1)) if match else float('nan')
+
+
+def run_queries(connection, params:dict, label:str)->dict[str, float]:
+    times = {}
+    for name, sql_str in QUERIES.items():
+        plan, times[name] = explain(connection, sql_str, params)
+        print(f"\n--- {name}, {label} ---")
+        print("\n".join(plan))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-d', '--db_url', default = None, help = "sqlalchemy URL of the database, if none given reads the env var $EWXPWSDB_URL")
+    parser.add_argument('--station-code', default = None, help = "station to query, defaults to the station with the most recent reading")
+    parser.add_argument('--days', type = int, default = 7, help = "days of readings in the interval queries, ending at the station's latest reading")
+    parser.add_argument('--keep', action = 'store_true', help = "commit, leaving the indexes created")
+    args = parser.parse_args()
+
+    engine = database.get_engine(args.db_url)
+    index_names = [index.name for index in Reading.__table__.indexes] # type: ignore
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+
+        if args.station_code:
+            station_id = connection.execute(text("select id from weatherstation where station_code = :code"), {'code': args.station_code}).scalar_one()
+        else:
+            station_id = connection.execute(text("select weatherstation_id from reading order by id desc limit 1")).scalar_one()
+
+        end = connection.execute(text("select max(data_datetime) from reading where weatherstation_id = :station_id"), {'station_id': station_id}).scalar_one()
+        params = {'station_id': station_id, 'start': end - timedelta(days = args.days), 'end': end}
+        n_readings = connection.execute(text("select count(*) from reading")).scalar_one()
+        print(f"{n_readings} readings, station id {station_id}, interval {params['start']} to {end}")
+
+        for index_name in index_names:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        connection.execute(text("ANALYZE reading"))
+        before = run_queries(connection, params, 'without indexes')
+
+        for sql_str in READING_INDEX_STATEMENTS:
+            connection.execute(text(sql_str))
+        connection.execute(text("ANALYZE reading"))
+        after = run_queries(connection, params, 'with indexes')
+
+        if args.keep:
+            transaction.commit()
+        else:
+            transaction.rollback()
+
+    print(f"\n{'query':28} {'without (ms)':>14} {'with (ms)':>12}")
+    for name in QUERIES:
+        print(f"{name:28} {before[name]:14.2f} {after[name]:12.2f}")
+
+
+if __name__ == '__main__':
+    main()
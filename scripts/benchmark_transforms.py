@@ -0,0 +1,92 @@
+"""
+time the columnar Zentra transform against converting one value at a time, on a synthetic year of 5-minute data.
+No credentials or database needed.  The response is built from the example response in doc/external_apis.
+
+usage:  python scripts/benchmark_transforms.py [--days 365] [--repeat 3]
+"""
+
+import argparse, copy, json, random, time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from ewxpwsdb.db.models import WeatherStation
+from ewxpwsdb.weather_apis import ZentraAPI
+
+EXAMPLE_DATA = Path(__file__).parent.parent / 'doc' / 'external_apis' / 'zentra_example_data.json'
+
+
+def synthetic_response(days:int)->dict:
+    """zentra response with every sensor of the example response reporting every 5 minutes for `days` days,
+    with about 1% missing values"""
+    response_data = json.loads(EXAMPLE_DATA.read_text())
+    start = int(datetime(2024,1,1, tzinfo = timezone.utc).timestamp())
+    timestamps = range(start, start + days * 24 * 60 * 60, 5 * 60)
+
+    for sensor_data_list in response_data['data'].values():
+        for sensor_data in sensor_data_list:
+            template = sensor_data['readings'][0]
+            readings = []
+            for timestamp in timestamps:
+                reading = copy.copy(template)
+                reading['timestamp_utc'] = timestamp
+                reading['value'] = None if random.random() < 0.01 else round(random.uniform(0, 100), 2)
+                readings.append(reading)
+            sensor_data['readings'] = readings
+
+    return response_data
+
+
+def per_value_transform(zapi:ZentraAPI, response_data:dict)->list[dict]:
+    """the transform converting each value in turn with the scalar conversions, for comparison"""
+    readings_by_timestamp = {}
+    for sensor in response_data['data']:
+        if sensor not in zapi._sensor_fieldnames:
+            continue
+        for sensor_data in response_data['data'][sensor]:
+            ewx_field_name, sensor_transform = zapi._lookup_sensor_transform(sensor, sensor_data['metadata']['units'])
+            if ewx_field_name == "":
+                continue
+            for zentra_reading in sensor_data['readings']:
+                timestamp = zentra_reading['timestamp_utc']
+                if timestamp not in readings_by_timestamp:
+                    readings_by_timestamp[timestamp] = {'data_datetime': datetime.fromtimestamp(timestamp).astimezone(timezone.utc)}
+                value = zentra_reading['value']
+                # the scalar leaf wetness transform doesn't handle missing values
+                readings_by_timestamp[timestamp][ewx_field_name] = None if value is None else sensor_transform(value)
+
+    return list(readings_by_timestamp.values())
+
+
+def best_time(f, repeat:int)->float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type = int, default = 365, help = "days of 5-minute data in the response")
+    parser.add_argument('--repeat', type = int, default = 3, help = "number of runs, the best is reported")
+    args = parser.parse_args()
+
+    station = WeatherStation(id = 1, station_code = 'BENCHMARK', station_type = 'ZENTRA', install_date = date(2024,1,1),
+                             timezone = 'US/Eastern', ewx_user_id = 'benchmark', lat = 42.7, lon = -84.5, background_place = 'benchmark',
+                             api_config = json.dumps({'sn': 'benchmark', 'token': 'benchmark'}))
+    zapi = ZentraAPI(station)
+    response_data = synthetic_response(args.days)
+    n_readings = len(next(iter(response_data['data'].values()))[0]['readings'])
+    print(f"{n_readings} readings, {len(response_data['data'])} sensors")
+
+    expected = per_value_transform(zapi, response_data)
+    per_value = best_time(lambda: per_value_transform(zapi, response_data), args.repeat)
+    print(f"per value:             {per_value:.3f} s")
+
+    assert zapi._transform(response_data) == expected
+    columnar = best_time(lambda: zapi._transform(response_data), args.repeat)
+    print(f"columnar:              {columnar:.3f} s  ({per_value / columnar:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ PYENV_DIR=$PACKAGE_DIR/.venv
 . $PACKAGE_DIR/.env
 export EWXPWSDB_URL=$EWXPWSDB_URL
 
-for station in `ewxpws station -d $EWXPWSDB_URL list`; do
- echo "requesting data for $station... "
- ewxpws catchup -d $EWXPWSDB_URL  $station
-done
+# catch up all active stations in one process, several stations at a time. 
+# the previous version ran 'ewxpws catchup' for each station in turn:
+# for station in `ewxpws station -d $EWXPWSDB_URL list`; do ewxpws catchup -d $EWXPWSDB_URL  $station; done
+ewxpws catchup-all -d $EWXPWSDB_URL
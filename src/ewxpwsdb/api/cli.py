@@ -6,7 +6,7 @@ import argparse
 import sys, json
 from sqlmodel import select
 from ewxpwsdb.collector import Collector
-from ewxpwsdb.db import database
+from ewxpwsdb.db import database, upgrade
 
 from typing import Any
 from dateutil.parser import parse # type: ignore
@@ -50,6 +50,36 @@ def initdb(db_url:str, station_file:str|None=None):
         return (f"error when initializing database: {e}")
 
 
+def upgradedb(db_url:str, concurrently:bool = False)->str:
+    """alter the tables of an existing database to match the current version of this package.  See db/upgrade.py
+
+    Args:
+        db_url (str): sqlalchemy database URL 
+        concurrently (bool, optional): build new reading indexes without blocking collection. Defaults to False.
+    """
+    engine = database.get_engine(db_url)
+    try:
+        statements = upgrade.upgrade_db(engine, concurrently = concurrently)
+        return(f"database upgraded, {len(statements)} statements run")
+    except Exception as e:
+        return (f"error when upgrading database: {e}")
+
+
+def compress_responses(db_url:str, batch_size:int = 500)->str:
+    """convert stored api responses to compressed payloads, in batches.  Run upgradedb first.
+
+    Args:
+        db_url (str): sqlalchemy database URL 
+        batch_size (int, optional): number of api responses converted per transaction. Defaults to 500.
+    """
+    engine = database.get_engine(db_url)
+    try:
+        converted = upgrade.compress_api_responses(engine, batch_size = batch_size)
+        return(f"{converted} api responses compressed")
+    except Exception as e:
+        return (f"error when compressing api responses: {e}")
+
+
 def station(db_url:str, station_code:str)->str:
     """pull a station record and output to JSON for a station code, excluding 
     the API connection info which may contain secrets. 
@@ -129,6 +159,80 @@ def catchup(db_url:str, station_code:str)->str:
         return (f"error on catch-up process for station {station_code}: {e}")
 
 
+def catchup_all(db_url:str, workers:int = 8, vendor_workers:int = 2, station_type:str|None = None)->str:
+    """run catchup for all active stations in one process, several stations at a time, and output a summary per station"""
+
+    from ewxpwsdb.fleet import catch_up_all, results_summary
+
+    try:
+        engine = database.get_engine(db_url)
+    except Exception as e:
+        return (f"error connecting to database: {e}")
+
+    results = catch_up_all(engine, max_workers = int(workers), workers_per_vendor = int(vendor_workers), station_type = station_type)
+    return results_summary(results)
+
+# alias for the 'collect-all' command
+collect_all = catchup_all
+
+
+def serve_collector(db_url:str, workers:int = 8, jitter:float = 60.0, station_type:str|None = None)->str:
+    """collect current weather data for all active stations on a schedule aligned to the quarter hour, 
+    until stopped with ctrl-c or SIGTERM.  See scheduler.py
+    example usage: 
+    ewxpws serve-collector -w 8 --jitter 120
+    """
+    import signal
+    from ewxpwsdb.scheduler import CollectorScheduler
+
+    try:
+        engine = database.get_engine(db_url)
+    except Exception as e:
+        return (f"error connecting to database: {e}")
+
+    scheduler = CollectorScheduler(engine, station_type = station_type, max_workers = int(workers), jitter_seconds = float(jitter))
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
+        scheduler.close()
+
+    return "collector stopped"
+
+
+def retransform(db_url:str, station_type:str, since:str|None = None, workers:int|None = None, batch_size:int = 200)->str:
+    """transform stored api responses again for all stations of a type, e.g. after a fix to the transform for that type, 
+    and save the readings.  Progress is shown on stderr.  Only responses that were not transformed by the current 
+    transform version are done, so this can be stopped and run again.  See retransform.py
+    example usage: 
+    ewxpws retransform -t LOCOMOS --since 2024-01-01
+    """
+    from ewxpwsdb.retransform import retransform_station_type
+
+    try:
+        engine = database.get_engine(db_url)
+    except Exception as e:
+        return (f"error connecting to database: {e}")
+    
+    since_datetime = None
+    if since:
+        since_datetime = parse(since)
+        if since_datetime.tzinfo is None:
+            since_datetime = since_datetime.replace(tzinfo = timezone.utc)
+
+    def show_progress(status):
+        print(status.summary(), file = sys.stderr, flush = True)
+
+    try:
+        status = retransform_station_type(engine, station_type, since = since_datetime, max_workers = workers, 
+                                          batch_size = int(batch_size), progress = show_progress)
+    except Exception as e:
+        return (f"error retransforming {station_type} api responses: {e}")
+    
+    return "\n".join(status.errors + [status.summary()])
+
+
 def weather(db_url:str, station_code:str, start:str|None = None, end:str|None = None, show_response:bool=False)->str:
     """pull weather from api and save database. """
     
@@ -153,7 +257,7 @@ def weather(db_url:str, station_code:str, start:str|None = None, end:str|None =
         return (f"error getting weather from {station_code} with params start={start}, end={end}: {e}")
 
     if show_response:
-        responses_text = [ json.loads(resp.response_text) for resp in api_responses]
+        responses_text = [ json.loads(resp.get_response_text()) for resp in api_responses]
         weather_api_output['response'] = responses_text
 
     readings = collector.weather_api.transform(api_responses,database = False)
@@ -263,6 +367,14 @@ def main()->int:
     initdb_parser.add_argument('-d','--db_url', help="optional sqlaclchemy URL for connecting to Postgresql, eg. postgresql+psycopg2://localhost:5432/ewxpws." )
     initdb_parser.add_argument('-f', '--station-file', default=None, help="path to a station file to import, tsv format")
     
+    upgradedb_parser = subparsers.add_parser("upgradedb", help="alter tables of an existing database for the current version of this package")
+    upgradedb_parser.add_argument('-d','--db_url', help="optional sqlaclchemy URL for connecting to Postgresql, if none given, reads env var $EWXPWSDB_URL" )
+    upgradedb_parser.add_argument('--concurrently', action="store_true", help="build new indexes on the reading table without blocking writes, slower, for large databases in use")
+
+    compress_parser = subparsers.add_parser("compress-responses", help="compress stored api responses in batches, run upgradedb first")
+    compress_parser.add_argument('-d','--db_url', help="optional sqlaclchemy URL for connecting to Postgresql, if none given, reads env var $EWXPWSDB_URL" )
+    compress_parser.add_argument('-b', '--batch-size', type=int, default=500, help="number of api responses to convert per transaction")
+    
     station_parser = subparsers.add_parser("station", parents=[common_args], help="lookup station by code.  'station list' lists stations, 'station types' list types")
 
     weather_parser = subparsers.add_parser("weather", parents=[common_args], help="show weather conditions for specified station and times")
@@ -277,6 +389,25 @@ def main()->int:
 
     catchup_parser = subparsers.add_parser("catchup", parents=[common_args], help="get all data from last record to current time and save to database")
 
+    catchup_all_parser = subparsers.add_parser("catchup-all", aliases=["collect-all"], help="catchup all active stations in one process, several at a time, and show a summary")
+    catchup_all_parser.add_argument('-d','--db_url', help="optional sqlaclchemy URL for connecting to Postgresql, if none given, reads env var $EWXPWSDB_URL")
+    catchup_all_parser.add_argument('-w', '--workers', type=int, default=8, help="max number of stations collecting at the same time")
+    catchup_all_parser.add_argument('--vendor-workers', type=int, default=2, help="max number of stations of the same type collecting at the same time")
+    catchup_all_parser.add_argument('-t', '--station-type', default=None, help="only collect stations of this type, e.g. ZENTRA")
+
+    serve_parser = subparsers.add_parser("serve-collector", help="collect all active stations on a schedule every 15 minutes (or each station's interval) until stopped")
+    serve_parser.add_argument('-d','--db_url', help="optional sqlaclchemy URL for connecting to Postgresql, if none given, reads env var $EWXPWSDB_URL")
+    serve_parser.add_argument('-w', '--workers', type=int, default=8, help="max number of stations collecting at the same time")
+    serve_parser.add_argument('--jitter', type=float, default=60.0, help="max random seconds after the 15 minute mark to start each station, to spread requests")
+    serve_parser.add_argument('-t', '--station-type', default=None, help="only collect stations of this type, e.g. ZENTRA")
+
+    retransform_parser = subparsers.add_parser("retransform", help="transform stored api responses again for all stations of a type and save the readings. Can be stopped and run again")
+    retransform_parser.add_argument('-d','--db_url', help="optional sqlaclchemy URL for connecting to Postgresql, if none given, reads env var $EWXPWSDB_URL")
+    retransform_parser.add_argument('-t', '--station-type', required=True, help="station type to retransform, e.g. LOCOMOS")
+    retransform_parser.add_argument('--since', default=None, help="only responses for readings from this date or time on, UTC unless a timezone is given, e.g. 2024-01-01")
+    retransform_parser.add_argument('-w', '--workers', type=int, default=None, help="number of worker processes, default is the number of CPUs")
+    retransform_parser.add_argument('-b', '--batch-size', type=int, default=200, help="number of api responses saved per transaction")
+
     readings_parser = subparsers.add_parser("readings", parents=[common_args], help="retrieve weather data from database, if it's there")
     readings_parser.add_argument('-s', '--start', default=None, help="start time UTC in format YYYY-MM-DDTHH:MM:SS+ZZ example 2024-01-31T13:00:00+00")
     readings_parser.add_argument('-e', '--end', default=None, help="end time UTC in format YYYY-MM-DDTHH:MM:SS+ZZ example 2024-02-28T13:00:00+00,")
@@ -297,7 +428,8 @@ def main()->int:
 
 
     args = parser.parse_args()
-    clifunc = eval(args.command)
+    # command names with dashes map to functions with underscores, e.g. catchup-all -> catchup_all
+    clifunc = eval(args.command.replace('-', '_'))
     params = vars(args)
     del params['command']
     output = clifunc(**params)
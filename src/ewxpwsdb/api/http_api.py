@@ -8,6 +8,7 @@
 # 
 
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query, Depends
 from datetime import date, timedelta, datetime, timezone
 from typing import Annotated, Any
@@ -20,6 +21,7 @@ from ewxpwsdb.station_readings import StationReadings
 from ewxpwsdb.station import Station, WeatherStationDetail
 from ewxpwsdb.collector import Collector
 from ewxpwsdb.db.database import get_engine, check_engine,default_db_env_var_name, get_db_url
+from ewxpwsdb.db.health import HealthMonitor, HealthStatus
 from ewxpwsdb.time_intervals import str_to_interval, UTCInterval, DateInterval
 
 
@@ -34,7 +36,16 @@ engine = get_engine(get_db_url())
 if not check_engine(engine):
     raise RuntimeError(f"invalid database connection for engine {engine}")
 
-app = FastAPI(title="EWX PWS DB", description="Read-only access to Enviroweather Personal Weather Station data", version='0.1')
+# connection checks run in the background rather than before each query, see /health
+health_monitor = HealthMonitor(engine)
+
+@asynccontextmanager
+async def lifespan(app:FastAPI):
+    health_monitor.start()
+    yield
+    health_monitor.stop()
+
+app = FastAPI(title="EWX PWS DB", description="Read-only access to Enviroweather Personal Weather Station data", version='0.1', lifespan=lifespan)
 
 from .ewxpws_ssl import *
     
@@ -54,6 +65,15 @@ def home():
     return(f"Personal Weather Station Project, {version()}")
 
 
+@app.get("/health")
+def health()->HealthStatus:
+    """latest result of the background database check, 503 if the database is not available"""
+    status = health_monitor.status
+    if not status.ok:
+        raise HTTPException(status_code = 503, detail = f"503: database not available: {status.message}")
+    return status
+
+
 @app.get("/stations/")
 def station_list():
     try:
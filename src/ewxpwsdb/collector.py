@@ -3,35 +3,106 @@
 # TODO handle "save_readings_from_responses()"" runtime errors by enclosing in try/except
 
 import os
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, date, timedelta, timezone
+from time import perf_counter
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, Future
 from http.client import HTTPException
 import logging
 
 # Other imports
-from sqlmodel import select, update
+from sqlmodel import select, update, or_
 from sqlalchemy import Engine
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from typing import Sequence
 
 from ewxpwsdb.db.database import Session
-from ewxpwsdb.db.models import WeatherStation, APIResponse, Reading
-from ewxpwsdb.weather_apis import API_CLASS_TYPES,STATION_TYPE
-from ewxpwsdb.time_intervals import one_day_interval, UTCInterval, is_utc, previous_fourteen_minute_interval, fifteen_minute_mark, UTC, timedelta
+from ewxpwsdb.db.models import WeatherStation, APIResponse, Reading, TransformResult, ReadingsPayload
+from ewxpwsdb.weather_apis import STATION_TYPE
+from ewxpwsdb.weather_apis.weather_api import WeatherAPI
+from ewxpwsdb.time_intervals import UTCInterval, is_utc, previous_fourteen_minute_interval, fifteen_minute_mark, plan_gap_requests, UTC
 
 from ewxpwsdb.station import Station
+from ewxpwsdb.station_registry import station_registry
 from ewxpwsdb.station_readings import StationReadings    
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+def upsert_reading_rows(session:Session, rows:list[dict], batch_size:int = 1000)->dict[tuple, int]:
+    """insert or update reading rows with one INSERT ... ON CONFLICT DO UPDATE statement per batch, 
+    see Collector.upsert_readings().  Rows must not repeat a station + timestamp.  The caller commits. 
+
+    Args:
+        session (Session): open database session
+        rows (list[dict]): Reading fields without 'id', e.g. from Reading.model_dump(exclude={'id'})
+        batch_size (int, optional): max number of rows per statement. Defaults to 1000.
+
+    Returns:
+        dict[tuple, int]: database id of each reading keyed on (data_datetime, weatherstation_id)
+    """
+    reading_table = Reading.__table__ # type: ignore
+    key_columns = ['id', 'data_datetime', 'weatherstation_id']
+    
+    saved_ids:dict[tuple, int] = {}
+    for i in range(0, len(rows), batch_size):
+        stmt = pg_insert(reading_table).values(rows[i:i+batch_size])
+        upsert_stmt = stmt.on_conflict_do_update(
+            constraint = "constraint_one_reading_per_timestamp_per_station",
+            set_ = {c.name: stmt.excluded[c.name] for c in reading_table.columns if c.name not in key_columns}
+            ).returning(reading_table.c.id, reading_table.c.data_datetime, reading_table.c.weatherstation_id)
+        
+        for record_id, data_datetime, weatherstation_id in session.exec(upsert_stmt): # type: ignore
+            saved_ids[(data_datetime, weatherstation_id)] = record_id
+
+    return saved_ids
+
+
+def transform_result_values(api_response:APIResponse, weather_api:WeatherAPI, readings:list[Reading]|ReadingsPayload)->dict:
+    """TransformResult fields for the readings transformed from a response by the current transform of weather_api.
+    readings may be a ReadingsPayload that the readings were added to batch by batch"""
+    payload = readings if isinstance(readings, ReadingsPayload) else ReadingsPayload(readings)
+    return {
+        'apiresponse_id': api_response.id,
+        'response_hash': api_response.response_hash,
+        'station_type': weather_api.station_type,
+        'transform_version': weather_api.transform_version,
+        'transform_datetime': datetime.now(timezone.utc),
+        'reading_count': payload.reading_count,
+        'readings_payload': payload.compressed(),
+    }
+
+
+def upsert_transform_results(session:Session, results:list[dict])->None:
+    """insert transform results, replacing any earlier result for the same api response.  The caller commits. 
+
+    Args:
+        session (Session): open database session
+        results (list[dict]): TransformResult fields without 'id', at most one per api response
+    """
+    if not results:
+        return
+    
+    stmt = pg_insert(TransformResult.__table__).values(results) # type: ignore
+    upsert_stmt = stmt.on_conflict_do_update(
+        index_elements = ['apiresponse_id'],
+        set_ = {name: stmt.excluded[name] for name in results[0] if name != 'apiresponse_id'}
+        )
+    session.exec(upsert_stmt) # type: ignore
+
+
 class Collector():
     """class to enable collecting data from station apis and store in a database.  
     This class connects the components of the system to be invoked by a workflow manager.    """
 
-    current_reading_ids: list[int] = []
-    current_api_response_record_ids: list[int] = []
-    current_api_response: APIResponse|None = None
+    # max number of readings sent in a single INSERT .. ON CONFLICT statement
+    upsert_batch_size:int = 1000
+    # backfill refuses to request more than this fraction of its lookback when the station's stored readings 
+    # fill more than the rest of it, as the gaps and the readings can't both be right
+    backfill_max_coverage:float = 0.95
 
     @classmethod
     def from_station_code(cls, station_code:str, engine:Engine):
@@ -89,23 +160,34 @@ class Collector():
             raise RuntimeError(f"collector class error: can not load station with id {station_id}: {e}")
         
 
-    def __init__(self, station:WeatherStation, engine:Engine):
+    def __init__(self, station:WeatherStation, engine:Engine, bulk_upsert:bool = True, skip_duplicate_responses:bool = True):
         """create a collector object for pulling for an API specific to a station type.  
         This creates a database session open for the life of this object.   Use collector.close() when operations are complete.  
 
         Args:
             station_id (int): Database ID (primary key) of a weather station record
             engine (Engine, optional): Engine connection for existing EWX PWS database that data is read/written to.  Defaults to global engine from database.py. 
+            bulk_upsert (bool, optional): save readings with one set-based upsert per response (True) or one reading at a time 
+                using insert_or_update_reading() (False), kept for comparison.  Defaults to True. 
+            skip_duplicate_responses (bool, optional): don't store or transform a response with the same content as one 
+                already stored for this station, see store_api_response(). Defaults to True.
         """
         logger.debug(f"Initializing collector for station id {station.id}")
 
         self._engine = engine
+        self.bulk_upsert = bulk_upsert
+        self.skip_duplicate_responses = skip_duplicate_responses
         self._session = Session(engine)
         self.station = station
         # instatiate API class for this station to collect data         
-        self.weather_api = API_CLASS_TYPES[self.station.station_type](self.station)
-        # initialize side-effects vars from collection process
-        self.current_reading_ids = []
+        self.weather_api = station_registry.weather_api(self.station)
+        # initialize side-effects vars from collection process.  These are per-instance 
+        # so that several collectors can run at the same time in one process
+        self.current_reading_ids:list[int] = []
+        self.current_api_response_record_ids:list[int] = []
+        self.current_api_response:APIResponse|None = None
+        # requests that still failed after the weather api's retries in the latest collection, e.g. a Davis day chunk
+        self.current_failed_intervals:list[UTCInterval] = []
 
 
     @property
@@ -172,38 +254,28 @@ class Collector():
             logger.error(f"End datetime is not UTC timezone: {end_datetime}")
             raise ValueError(f"end datetime is not UTC timezone: {end_datetime}")
         
-        # call station vendor web API
-        responses = self.weather_api.get_readings(start_datetime = start_datetime,  end_datetime = end_datetime)
-
-
-        if responses:
-            # there is some kind of response, so clear out current "recent data" to fill as these are saved to db
-            saved_responses = []
-            self.current_api_response_record_ids = []
-            self.current_reading_ids = []
-
-            for response in responses:
-                if not self.weather_api.data_present_in_response(response):
-                    logger.warning(f"No data present in response for station {self.station.id} for interval {start_datetime} to {end_datetime}")            
-                    self.api_error_handler(start_datetime, end_datetime, response)
-                    
-
-                self.current_api_response = response
-                self._session.add(response)
-                self._session.commit()
-
-                if response.id:
-                    # transform this response and save readings
-                    saved_responses.append(response.id)
-                    reading_ids = self.save_readings_from_responses(response)
-
-                    self.current_reading_ids.extend(reading_ids)
-                else:
-                    logger.error(f"Failed to save API response for station {self.station.id} for interval {start_datetime} to {end_datetime}")
-                    self.api_error_handler(start_datetime, end_datetime, responses)
-                
+        # call station vendor web API. Each response is saved and transformed as soon as it arrives, 
+        # e.g. the first page of a multi-page request is stored while the rest are still being requested
+        saved_responses = []
+        response_count = 0
+        self.current_failed_intervals = []
+
+        for response in self.weather_api.iter_readings(start_datetime = start_datetime,  end_datetime = end_datetime):
+            if response_count == 0:
+                # there is some kind of response, so clear out current "recent data" to fill as these are saved to db
+                self.current_api_response_record_ids = []
+                self.current_reading_ids = []
+            response_count += 1
+
+            response_id, reading_ids = self.store_api_response(response, start_datetime, end_datetime)
+            if response_id:
+                saved_responses.append(response_id)
+                self.current_reading_ids.extend(reading_ids)
+
+        self.current_failed_intervals = self.failed_intervals(self.weather_api)
+
+        if response_count:
             self.current_api_response_record_ids = saved_responses
-
             return(self.current_api_response_record_ids)
 
         else:
@@ -211,6 +283,71 @@ class Collector():
             self.api_error_handler(start_datetime, end_datetime)
             return None
             
+    def failed_intervals(self, weather_api:WeatherAPI)->list[UTCInterval]:
+        """intervals of requests that the weather api could not get after retrying, logged as they are not stored"""
+        failed = [UTCInterval(start = start, end = end) for start, end in weather_api.current_failed_intervals]
+        if failed:
+            logger.error(f"station {self.station_code}: no data stored for {len(failed)} failed requests {[str(interval) for interval in failed]}")
+        return failed
+
+
+    def stored_duplicate_response(self, response:APIResponse)->APIResponse|None:
+        """find a successful response already stored for this station with exactly the same content (by response_hash)
+
+        Args:
+            response (APIResponse): response record from WeatherAPI.get_readings(), not yet in the database
+
+        Returns:
+            APIResponse|None: the earliest stored response with the same content, or None if there isn't one
+        """
+        if not response.response_hash or str(response.response_status_code) != '200':
+            return None
+        
+        stmt = select(APIResponse).where(APIResponse.weatherstation_id == self.station.id
+                    ).where(APIResponse.response_hash == response.response_hash
+                    ).where(APIResponse.response_status_code == '200'
+                    ).order_by(APIResponse.id).limit(1)  #type: ignore
+        return self._session.exec(stmt).first()
+
+
+    def store_api_response(self, response:APIResponse, start_datetime:datetime, end_datetime:datetime)->tuple[int|None, list[int]]:
+        """save one API response record, then transform it and save its readings.  If a response with the same 
+        content was already stored for this station (see stored_duplicate_response()), its readings are already in the 
+        database, so link to that response and skip the transform and database writes. 
+
+        Args:
+            response (APIResponse): response record from WeatherAPI.get_readings(), not yet in the database
+            start_datetime (datetime): start of the interval requested, for logging
+            end_datetime (datetime): end of the interval requested, for logging
+
+        Returns:
+            tuple[int|None, list[int]]: id of the stored API response (None if it could not be saved) and ids of readings saved
+        """
+        if self.skip_duplicate_responses:
+            existing_response = self.stored_duplicate_response(response)
+            if existing_response:
+                logger.debug(f"Response for station {self.station.id} for interval {start_datetime} to {end_datetime} is the same as stored response {existing_response.id}, skipping")
+                self.current_api_response = existing_response
+                return existing_response.id, []
+
+        if not self.weather_api.data_present_in_response(response):
+            logger.warning(f"No data present in response for station {self.station.id} for interval {start_datetime} to {end_datetime}")            
+            self.api_error_handler(start_datetime, end_datetime, response)
+            
+
+        self.current_api_response = response
+        self._session.add(response)
+        self._session.commit()
+
+        if response.id:
+            # transform this response and save readings
+            return response.id, self.save_readings_from_responses(response)
+        else:
+            logger.error(f"Failed to save API response for station {self.station.id} for interval {start_datetime} to {end_datetime}")
+            self.api_error_handler(start_datetime, end_datetime, response)
+            return None, []
+
+
     def request_current_weather_data(self)->None|list[int]:
         """call request weather method with no dates, so API class gets most recent 
         complete 15 minute period.   Stores the data from the request/response internally and in the database"""
@@ -305,12 +442,79 @@ class Collector():
         return record_id
     
 
-    def save_readings_from_responses(self, api_responses:APIResponse|list[APIResponse])->list[int]:
+    def upsert_readings(self, readings:list[Reading])->list[int]:
+        """inserts or updates a list of readings using set-based Postgresql 'upsert' statements 
+        (INSERT ... ON CONFLICT DO UPDATE ... RETURNING), one statement per batch of 
+        upsert_batch_size readings rather than a select + insert/update for each reading.   
+
+        The conflict target is the unique constraint on [data_datetime, weatherstation_id] (see Reading model). 
+        The primary key is never sent, so existing readings keep their id and only the data columns are 
+        updated, same as insert_or_update_reading().  If the same timestamp appears more than once in the 
+        list (e.g. overlapping responses), the last one wins as Postgresql can't update the same row twice in one statement. 
+
+        Args:
+            readings (list[Reading]): reading objects with data for inserting, e.g. from WeatherAPI.transform()
+
+        Returns:
+            list[int]: database ids of the readings, in the same order as the readings sent
+        """
+        if not readings:
+            return []
+        
+        logger.debug(f"Upserting {len(readings)} readings for station {self.station.id}")
+
+        # one row per station + timestamp, keeping the last reading for any duplicate
+        readings_by_key:dict[tuple, dict] = {}
+        for reading in readings:
+            readings_by_key[(reading.data_datetime, reading.weatherstation_id)] = reading.model_dump(exclude={'id'})
+        
+        with Session(self._engine) as session:
+            saved_ids = upsert_reading_rows(session, list(readings_by_key.values()), self.upsert_batch_size)
+            session.commit()
+
+        return [saved_ids[(reading.data_datetime, reading.weatherstation_id)] for reading in readings]
+    
+
+    def save_readings(self, readings:list[Reading], bulk_upsert:bool|None = None)->list[int]:
+        """insert or update readings in the database
+
+        Args:
+            readings (list[Reading]): readings with data for inserting, e.g. from WeatherAPI.transform()
+            bulk_upsert (bool, optional): use the set-based upsert_readings() (True) or save one reading 
+                  at a time with insert_or_update_reading() (False). Defaults to the setting for this collector. 
+
+        Raises:
+            RuntimeError: database error if a reading could not be inserted or updated
+
+        Returns:
+            list[int]: database ids of the readings, in the same order as the readings sent
+        """
+        if bulk_upsert is None:
+            bulk_upsert = self.bulk_upsert
+
+        if bulk_upsert:
+            return self.upsert_readings(readings)
+        
+        saved_reading_ids = []
+        for reading in readings:
+            new_id = self.insert_or_update_reading(new_reading = reading)
+            if new_id:
+                saved_reading_ids.append(new_id)
+            else:
+                logger.error(f"Could not insert PWS API response record into database for station {self.station.id}")
+                raise RuntimeError(f"could not insert PWS API response record into database")
+        
+        return saved_reading_ids
+
+
+    def save_readings_from_responses(self, api_responses:APIResponse|list[APIResponse], bulk_upsert:bool|None = None)->list[int]:
         """transform api response into Readings and saves them to the database
 
         Args:
             api_responses (APIResponse | list[APIResponse]): An API Response 
                   object or a list of APIResponse objects to be transformed and saved.
+            bulk_upsert (bool, optional): use the set-based upsert_readings() (True) or save one reading 
+                  at a time with insert_or_update_reading() (False). Defaults to the setting for this collector. 
         Raises:
             RuntimeError: database error if the readings could not be inserted or updated, 
             RuntimeError: if no reading data was extracted from the responses
@@ -327,16 +531,16 @@ class Collector():
         saved_reading_ids = []
 
         # transform expects list of responses
-        readings = self.weather_api.transform(api_responses)
-        if readings:
-            for reading in readings:
-                new_id = self.insert_or_update_reading(new_reading = reading)
-                if new_id:
-                    saved_reading_ids.append(new_id)
-                else:
-                    logger.error(f"Could not insert PWS API response record into database for station {self.station.id}")
-                    raise RuntimeError(f"could not insert PWS API response record into database")
-        else:
+        if bulk_upsert is None:
+            bulk_upsert = self.bulk_upsert
+
+        # readings are transformed and saved one batch at a time, so large responses are never held in memory all at once
+        reading_count = 0
+        for readings in self.weather_api.iter_transform(api_responses, batch_size = self.upsert_batch_size):
+            reading_count += len(readings)
+            saved_reading_ids.extend(self.save_readings(readings, bulk_upsert))
+
+        if not reading_count:
             logger.error(f"No reading data extracted from responses for station {self.station.id}")
             # TODO handle this exception better, maybe just return empty list
             # or raise an exception, but this is a problem with the API response, not the database
@@ -431,16 +635,59 @@ class Collector():
             return(None)
         
 
-    def get_historic_data(self, overwrite: bool=False, days_limit:int=365)->list[int]:
+    def historic_windows(self, days_limit:int = 365, end_datetime:datetime|None = None)->list[UTCInterval]:
+        """split the time from the station's install date (or days_limit days ago, if that is later) up to end_datetime 
+        into windows sized for this station's API (WeatherAPI._max_request_window)
+
+        Args:
+            days_limit (int, optional): Days to go back. Defaults to 365.
+            end_datetime (datetime, optional): end of the most recent window, UTC.  Defaults to the most recent 15 minute mark
+
+        Returns:
+            list[UTCInterval]: windows, most recent first
+        """
+        end_datetime = end_datetime or fifteen_minute_mark(datetime.now(UTC))
+        earliest_datetime = end_datetime - timedelta(days = days_limit)
+
+        # there is no data before the station was installed
+        if isinstance(self.station.install_date, date):
+            install_datetime = datetime.combine(self.station.install_date, datetime.min.time(), tzinfo = UTC)
+            earliest_datetime = max(earliest_datetime, install_datetime)
+
+        window = self.weather_api._max_request_window
+        windows = []
+        window_end = end_datetime
+        while window_end > earliest_datetime:
+            window_start = max(window_end - window, earliest_datetime)
+            windows.append(UTCInterval(start = window_start, end = window_end))
+            window_end = window_start
+
+        return windows
+
+
+    def _request_window(self, interval:UTCInterval)->tuple[list[APIResponse], list[UTCInterval]]:
+        """request one historic window from the API, using a separate API object so windows can be requested concurrently. 
+        Returns the responses and the intervals of any requests that failed"""
+        weather_api = station_registry.weather_api(self.station)
+        responses = weather_api.get_readings(start_datetime = interval.start, end_datetime = interval.end)
+        return responses, self.failed_intervals(weather_api)
+
+
+    def get_historic_data(self, overwrite: bool=False, days_limit:int=365, max_workers:int = 4)->list[int]:
         """        pull all previous data for this old station starting from right now
         If there is any data already in the db, this will this will not overwrite 
         
         check if there are any readings at all in db for this station, if so, only overwrite if we have permission
 
+        The time is split into windows sized for the station's API (see historic_windows()) and up to max_workers windows
+        are requested at once, going back in time.   Each window is stored in order, most recent first, and the 
+        process stops at the station's install date, or at the first window with no data.  Statistics including
+        readings/second are logged and saved in current_historic_stats, and requests that failed in current_failed_intervals.
 
         Args:
             overwrite (bool, optional): only overwrite if we have permission.  If False and any readings are present for this station, cancel. Defaults to False.
             days_limit (int, optional): Days to go back. Defaults to 365.
+            max_workers (int, optional): number of windows to request at the same time. Defaults to 4
 
         Raises:
             RuntimeError: if overwrite is not True and there are records, raise an exception
@@ -456,20 +703,56 @@ class Collector():
                 logger.error(f"Data for station {self.station.id} already present, cancelling get historic data procedure")
                 raise RuntimeError(f"data for station {self.station.id} already present, cancelling get historic data procedure")
             
-        collected_reading_ids = []
-
-        # start -- get and save readings for today
-        today = datetime.now(timezone.utc).date()
-        api_data = self.request_and_store_weather_data_utc(one_day_interval(today))
-        
-        # get all the remaining tomorrows data, up to the imposed limit (1 yr default)
-        day_offset = 1
-        while api_data and day_offset <= days_limit:
-            date_to_fetch = today - timedelta(days = day_offset)
-            logger.debug(f"Fetching data for station {self.station.station_code} for {day_offset} days ago")
-            api_data = self.request_and_store_weather_data_utc(one_day_interval(date_to_fetch))
-            collected_reading_ids.extend(self.current_reading_ids)
-            day_offset += 1 
+        collected_reading_ids:list[int] = []
+        failed_intervals:list[UTCInterval] = []
+        windows = iter(self.historic_windows(days_limit = days_limit))
+        window_count = 0
+        response_count = 0
+        start_time = perf_counter()
+
+        # requests for the next windows run in the pool while the current window is stored.  Storing happens 
+        # in this thread only, in window order, so the session for this collector is not shared
+        with ThreadPoolExecutor(max_workers = max(1, max_workers), thread_name_prefix = f"historic-{self.station_code}") as executor:
+            pending:deque[tuple[UTCInterval, Future]] = deque((window, executor.submit(self._request_window, window)) for window in islice(windows, max(1, max_workers)))
+            
+            try:
+                while pending:
+                    window, future = pending.popleft()
+                    responses, window_failed_intervals = future.result()
+                    failed_intervals.extend(window_failed_intervals)
+
+                    if not any([self.weather_api.data_present_in_response(response) for response in responses]):
+                        logger.debug(f"No data for station {self.station.station_code} from {window.start} to {window.end}, stopping historic data")
+                        break
+
+                    logger.debug(f"Storing historic data for station {self.station.station_code} from {window.start} to {window.end}")
+                    for response in responses:
+                        response_id, reading_ids = self.store_api_response(response, window.start, window.end)
+                        collected_reading_ids.extend(reading_ids)
+                    window_count += 1
+                    response_count += len(responses)
+
+                    next_window = next(windows, None)
+                    if next_window:
+                        pending.append((next_window, executor.submit(self._request_window, next_window)))
+            finally:
+                # stopping early, don't wait on windows that haven't started
+                for window, future in pending:
+                    future.cancel()
+
+        seconds = perf_counter() - start_time
+        self.current_reading_ids = collected_reading_ids
+        self.current_failed_intervals = failed_intervals
+        self.current_historic_stats = {
+            'windows': window_count,
+            'api_responses': response_count,
+            'readings': len(collected_reading_ids),
+            'failed_requests': len(failed_intervals),
+            'seconds': round(seconds, 2),
+            'readings_per_second': round(len(collected_reading_ids)/seconds, 1) if seconds else 0.0
+        }
+        logger.info(f"historic data for station {self.station.station_code}: {len(collected_reading_ids)} readings from {response_count} responses in {window_count} windows, "
+                    f"{seconds:.1f} seconds, {self.current_historic_stats['readings_per_second']} readings/sec")
 
         return collected_reading_ids
 
@@ -501,6 +784,7 @@ class Collector():
             # all caught up, let's return 0
             logger.debug("Collector catchup - allready caught up, returning empty list")
             self.current_reading_ids = []
+            self.current_failed_intervals = []
         else:
             interval_since_last_reading = UTCInterval(start = collection_start_time, end  = collection_end_time  )
             # this has the side effect of storing in the database, we don't keep the api data at all
@@ -510,22 +794,30 @@ class Collector():
         return self.current_reading_ids
         
         
-    def backfill(self, n_days_prior:int = 90, ending_datetime:datetime = datetime.now(UTC))->list:
+    def backfill(self, n_days_prior:int = 90, ending_datetime:datetime|None = None)->list:
         """looks for gaps and fills them upto the number of days in the past, 
         or the first reading date if there are not that many days of readings. 
-        The intervals to collect come from the station_readings class, but to ensure the last datetime is included, 
-        n minutes are added to the end of each interval, where n = the sampling interval for the weatherstation api
-        (that is, if start = end then no records are collected, so end <= end + sampling interval minutes)
+        The gaps come from the station_readings class, and are merged into as few requests as the vendor's request window 
+        allows when re-downloading the readings between them costs less than another request (see plan_gap_requests()
+        and WeatherAPI._request_cost_readings).  To ensure the last datetime is included, 
+        n minutes are added to the end of each request, where n = the sampling interval for the weatherstation api
+        (that is, if start = end then no records are collected, so end <= end + sampling interval minutes).
+        Requests that would download nearly all of the lookback while the station has readings in it are refused, 
+        see backfill_plan_is_consistent()
 
         Args:
             n_days_prior (int, optional): Number of days in the interval to look through, or days prior to the 'ending_datetime' . Defaults to 90.
-            ending_datetime (datetime, optional): the more latest date to look through, in UTC time zone. Defaults to datetime.now(UTC).
+            ending_datetime (datetime, optional): the more latest date to look through, in UTC time zone. Defaults to None for now.
 
         Returns:
             list: list of reading ids stored in database (similar to 'catchup' method)
         """
+        if ending_datetime is None:
+            ending_datetime = datetime.now(UTC)
+
         logger.debug(f"Backfilling weather data for station {self.station.id} for the past {n_days_prior} days up to {ending_datetime}")
 
+        self.current_failed_intervals = []
         station_readings = StationReadings(station = self.station, engine = self._engine)
         
         first_reading_date = station_readings.first_reading_date()
@@ -540,12 +832,20 @@ class Collector():
             api_responses = []
             
             if gap_intervals:
-                logger.debug(f"Backfill process initiated for station {self.station.station_code}")
-                for interval in gap_intervals:
-                    # if start = end then collector gets no records, and also many apis don't include the end datetime in responses, so end <= end + sampling interval minutes)
-                    interval.end = interval.end + timedelta(minutes = station_readings.weather_api._sampling_interval)             
+                weather_api = station_readings.weather_api
+                request_intervals = plan_gap_requests(gap_intervals, 
+                                                      sampling_interval = weather_api._sampling_interval, 
+                                                      max_window = weather_api._max_request_window, 
+                                                      request_cost_readings = weather_api._request_cost_readings)
+                if not self.backfill_plan_is_consistent(station_readings, request_intervals, UTCInterval(start = date_to_start_looking, end = ending_datetime)):
+                    return []
+                logger.debug(f"Backfill process initiated for station {self.station.station_code}: {len(gap_intervals)} gaps in {len(request_intervals)} requests")
+                failed_intervals = []
+                for interval in request_intervals:
                     api_responses.extend(self.request_and_store_weather_data_utc(interval))
                     reading_ids_added.extend(self.current_reading_ids)
+                    failed_intervals.extend(self.current_failed_intervals)
+                self.current_failed_intervals = failed_intervals
             
                 logger.debug(f"Backfill: {len(api_responses)} api_responses added {len(reading_ids_added)} readings for station {self.station.station_code}")
                 return reading_ids_added
@@ -556,7 +856,34 @@ class Collector():
             logger.debug(f"Backfill process: no readings stored for station {self.station.station_code}, backfill not necessary")
             return []
 
-    def retransform(self, interval_utc: UTCInterval)->list:
+    def backfill_plan_is_consistent(self, station_readings:StationReadings, request_intervals:list[UTCInterval], lookback:UTCInterval)->bool:
+        """sanity check of backfill requests before downloading: requests covering almost all of the lookback 
+        (backfill_max_coverage) are only expected when the station has few readings stored in it.  Otherwise the gaps
+        are wrong, e.g. found on a different clock than the readings, and backfill would download the whole lookback again.
+
+        Args:
+            station_readings (StationReadings): readings of this collector's station
+            request_intervals (list[UTCInterval]): intervals backfill would request, from plan_gap_requests()
+            lookback (UTCInterval): time span backfill looked for gaps in
+
+        Returns:
+            bool: True if the requests can go ahead, False (and an error is logged) if not
+        """
+        lookback_duration = lookback.end - lookback.start
+        requested_duration = sum((interval.end - interval.start for interval in request_intervals), timedelta())
+        if requested_duration < lookback_duration * self.backfill_max_coverage:
+            return True
+
+        stored_duration = station_readings.reading_count_by_interval_utc(lookback) * timedelta(minutes = self.weather_api._sampling_interval)
+        if stored_duration <= lookback_duration * (1 - self.backfill_max_coverage):
+            return True
+
+        logger.error(f"Backfill refused for station {self.station.station_code}: {len(request_intervals)} requests cover {requested_duration} "
+                     f"of the {lookback_duration} from {lookback.start} but the station has {stored_duration} of readings stored in it")
+        return False
+
+
+    def retransform(self, interval_utc: UTCInterval, use_cache:bool = True)->list:
         """ for readings in database, re-run the 'transform' method on the 
         original API responses in order to update or fix values in readings to 
         deal with a change, rather than re-download all the same data
@@ -565,24 +892,123 @@ class Collector():
         them.  The new set of readings is then saved to the database, but the 
         saving process overwrites any existing readings with the same timestamp 
         and station id, so this is a safe operation. 
+
+        Readings are saved one batch at a time.  The readings from each response are kept as a TransformResult with the 
+        transform_version of the station type, saved in the same transaction as a batch once all of those readings are saved.  
+        Responses that already have a result from the current version are skipped, and responses 
+        with the same content as one that does (by response_hash) re-use its readings rather than being transformed again. 
+        
         Args:
             interval_utc (UTCInterval): time period to look for existing readings
+            use_cache (bool, optional): skip or re-use current transform results. Set to False to transform every response. Defaults to True.
             
         Returns:
-            list: list if IDs or readings re-transformed and saved to the database
+            list: list if IDs or readings re-transformed and saved to the database, not including readings of skipped responses
         """
         logger.debug(f"Retransforming API responses for station {self.station.id} in interval {interval_utc}")
 
         station_readings = StationReadings(station=self.station, engine=self._engine)
     
         api_responses = station_readings.api_responses_by_interval_utc(interval_utc)
-        reading_ids = self.save_readings_from_responses(api_responses)
+        current_results = self.current_transform_results(api_responses) if use_cache else []
+        current_response_ids = {result.apiresponse_id for result in current_results}
+        current_results_by_hash = {result.response_hash: result for result in current_results if result.response_hash}
+
+        to_transform:list[APIResponse] = []
+        reading_ids:list[int] = []
+        skipped = reused = 0
+        for api_response in api_responses:
+            if api_response.id in current_response_ids:
+                skipped += 1
+                continue
+
+            cached_result = current_results_by_hash.get(api_response.response_hash) if api_response.response_hash else None
+            if cached_result:
+                reused += 1
+                readings = [Reading.model_validate_from_station(values, api_response) for values in cached_result.get_readings()]
+                reading_ids.extend(self._save_retransformed(readings, [transform_result_values(api_response, self.weather_api, readings)]))
+            else:
+                to_transform.append(api_response)
+
+        # readings are transformed and saved one batch at a time, as save_readings_from_responses() does.  Batches follow 
+        # the order of the responses, so the readings of a response are complete once a batch has a reading of a later 
+        # response, and its transform result is saved with that batch.  A response is never marked current without all of its readings
+        response_index = {api_response.id: i for i, api_response in enumerate(to_transform)}
+        next_result = 0
+        payload = ReadingsPayload()
+        for readings in self.weather_api.iter_transform(to_transform, batch_size = self.upsert_batch_size):
+            results:list[dict] = []
+            for reading in readings:
+                while next_result < response_index[reading.apiresponse_id]:
+                    results.append(transform_result_values(to_transform[next_result], self.weather_api, payload))
+                    payload = ReadingsPayload()
+                    next_result += 1
+                payload.add([reading])
+            reading_ids.extend(self._save_retransformed(readings, results))
+
+        # the last response and any after it without readings
+        results = []
+        for api_response in to_transform[next_result:]:
+            results.append(transform_result_values(api_response, self.weather_api, payload))
+            payload = ReadingsPayload()
+        self._save_retransformed([], results)
         
+        logger.info(f"Retransform for station {self.station.station_code}: {len(api_responses)} responses, {skipped} current, {reused} re-used by content, {len(reading_ids)} readings saved")
         return(reading_ids)        
-                   
-    def close(self)->bool:
+
+    def _save_retransformed(self, readings:list[Reading], results:list[dict])->list[int]:
+        """upsert retransformed readings and transform results in one transaction, see retransform()
+
+        Args:
+            readings (list[Reading]): readings, in response order
+            results (list[dict]): TransformResult fields of responses whose readings are all saved with this or earlier batches
+
+        Returns:
+            list[int]: database id of each reading
+        """
+        if not readings and not results:
+            return []
+
+        # a timestamp in more than one response is saved with the values of the last response
+        rows_by_key = {(reading.data_datetime, reading.weatherstation_id): reading.model_dump(exclude={'id'}) for reading in readings}
+        with Session(self._engine) as session:
+            saved_ids = upsert_reading_rows(session, list(rows_by_key.values()), self.upsert_batch_size)
+            upsert_transform_results(session, results)
+            session.commit()
+
+        return [saved_ids[(reading.data_datetime, reading.weatherstation_id)] for reading in readings]
+
+    def current_transform_results(self, api_responses:list[APIResponse])->list[TransformResult]:
+        """get transform results made by the current transform version of this station type, for these responses
+        or for any responses with the same content
+
+        Args:
+            api_responses (list[APIResponse]): stored API responses
+
+        Returns:
+            list[TransformResult]: results that are current, which may be fewer than the responses
+        """
+        response_ids = [api_response.id for api_response in api_responses]
+        response_hashes = [api_response.response_hash for api_response in api_responses if api_response.response_hash]
+        if not response_ids:
+            return []
+        
+        stmt = select(TransformResult).where(
+            TransformResult.station_type == self.weather_api.station_type,
+            TransformResult.transform_version == self.weather_api.transform_version,
+            or_(TransformResult.apiresponse_id.in_(response_ids), TransformResult.response_hash.in_(response_hashes)) # type: ignore
+            )
+        with Session(self._engine) as session:
+            return list(session.exec(stmt).all())
+
+    def close(self, dispose_engine:bool = False)->bool:
         """closes the session opened for this collector
 
+        Args:
+            dispose_engine (bool, optional): also dispose the engine connection pool.  Engines from database.get_engine()
+                are shared by everything in this process using the same database, so only set this for an engine 
+                that this collector alone uses. Defaults to False.
+
         Returns:
             bool: true if session closed successfully, false if there was an error
         """
@@ -591,7 +1017,8 @@ class Collector():
 
         try:
             self._session.close()
-            self._engine.dispose()
+            if dispose_engine:
+                self._engine.dispose()
             return True
         except Exception as e:
             logger.error(f"Error closing session for collector of station {self.station.id}: {e}")
@@ -1,12 +1,16 @@
 """SQL Database machinery: urls, connection, engines and sessions.  
 This reads the OS Environment, or the file .env to get database connection information from 
 the variable $EWXPWSDB_URL
+
+get_engine() keeps one engine per database URL for the life of the process, so the CLI, collectors, StationReadings
+and the http api all share one connection pool.  The pool is sized from these environment variables: 
+EWXPWSDB_POOL_SIZE, EWXPWSDB_MAX_OVERFLOW, EWXPWSDB_POOL_PRE_PING and EWXPWSDB_POOL_RECYCLE, see pool_settings()
 """
 
 from dotenv import load_dotenv
 from warnings import warn
 
-import os, logging
+import os, logging, threading
 from sqlmodel import SQLModel, create_engine, Session
 from sqlalchemy import Engine,create_engine, text, inspect
 
@@ -19,6 +23,20 @@ logger = logging.getLogger(__name__)
 
 _EWXPWSDB_URL_VAR = "EWXPWSDB_URL"
 
+# connection pool settings of engines from get_engine(), environment variable name and default
+_POOL_SETTING_VARS:dict[str, tuple[str, int|bool]] = {
+    'pool_size':     ("EWXPWSDB_POOL_SIZE", 5),
+    'max_overflow':  ("EWXPWSDB_MAX_OVERFLOW", 10),
+    # test each connection before it's used, so connections dropped by the server while idle are replaced
+    'pool_pre_ping': ("EWXPWSDB_POOL_PRE_PING", True),
+    # seconds after which a connection is replaced, -1 for never
+    'pool_recycle':  ("EWXPWSDB_POOL_RECYCLE", 1800),
+}
+
+# engines from get_engine() by url and echo
+_engines:dict[tuple[str, bool], Engine] = {}
+_engines_lock = threading.Lock()
+
 def default_db_env_var_name():
     return _EWXPWSDB_URL_VAR
     
@@ -87,8 +105,34 @@ def check_engine(engine:Engine)->bool:
 
 
 
+def pool_settings()->dict:
+    """connection pool arguments for create_engine(), from the environment variables in _POOL_SETTING_VARS or their defaults
+
+    Raises:
+        ValueError: if one of the variables is set but is not a whole number (or true/false for pre-ping)
+
+    Returns:
+        dict: pool_size, max_overflow, pool_pre_ping and pool_recycle
+    """
+    settings:dict = {}
+    for arg, (var_name, default) in _POOL_SETTING_VARS.items():
+        value = os.environ.get(var_name, '').strip()
+        if not value:
+            settings[arg] = default
+        elif isinstance(default, bool):
+            settings[arg] = value.lower() not in ('0', 'false', 'no', 'off')
+        else:
+            try:
+                settings[arg] = int(value)
+            except ValueError:
+                raise ValueError(f"environment variable {var_name} must be a whole number, got {value}")
+
+    return settings
+
+
 def get_engine(db_url = None, echo = False):
-    """ create an engine using sqlmodel and database URL. 
+    """ get the engine for a database URL, creating it using sqlmodel the first time.   The same engine is returned
+    for the same URL for the life of the process, so all users share one connection pool, sized by pool_settings().
     Sets a connection argument to ask DB not to convert datetimes using the timezone of the server, 
     but always return UTC since datatimes are stored with out timezone info in SQL
     
@@ -111,18 +155,46 @@ def get_engine(db_url = None, echo = False):
     if "postgres" not in  db_url:
         raise ValueError("not a postgresql connection string, this system requires postgresql")
         
-    if not  check_db_url(db_url):
-        raise ValueError("not a valid connection string, can't connect to the database")
-    
-    db_connect_args = {"options": "-c timezone=utc"}
-    
-    engine = create_engine(url = db_url, 
-                           echo=echo, 
-                           connect_args=db_connect_args)        
+    with _engines_lock:
+        engine = _engines.get((db_url, echo))
+        if engine is not None:
+            return engine
+
+        db_connect_args = {"options": "-c timezone=utc"}
+        
+        engine = create_engine(url = db_url, 
+                               echo=echo, 
+                               connect_args=db_connect_args,
+                               **pool_settings())        
+
+        # the engine is only kept once it's known to connect
+        if not check_engine(engine):
+            engine.dispose()
+            raise ValueError("not a valid connection string, can't connect to the database")
+
+        _engines[(db_url, echo)] = engine
 
     return engine
 
 
+def dispose_engines(db_name:str|None = None)->int:
+    """close the connection pools of engines from get_engine() and forget them, for example before dropping a database 
+    or at the end of a process.  get_engine() creates a new engine after this
+
+    Args:
+        db_name (str | None, optional): only engines for this database name. Defaults to None for all engines.
+
+    Returns:
+        int: number of engines disposed
+    """
+    with _engines_lock:
+        keys = [key for key, engine in _engines.items() if db_name is None or engine.url.database == db_name]
+        for key in keys:
+            _engines.pop(key).dispose()
+
+    return len(keys)
+
+
 def db_name_from_url(db_url:str)->str:
     """extract the just the name of the database from a SQLAlchemy connection URL
 
@@ -185,7 +257,7 @@ def check_db_table_list(engine)->bool:
         bool:  True is there is a table created in the engine for each models.  
     """
     
-    if check_db_url(engine.url) == False:
+    if check_engine(engine) == False:
         Warning('unable to connect with given URL')
         return False
     
@@ -322,6 +394,8 @@ def create_temp_pg_engine(admin_db_url:str, name_prefix:str='' )->Engine:
 
 
 def drop_pg_db(db_name_to_delete:str, admin_db_url:str)->bool:    
+    # postgresql won't drop a database with open connections, e.g. in the pool of a shared engine
+    dispose_engines(db_name_to_delete)
     try:
         with create_engine(admin_db_url,
             isolation_level='AUTOCOMMIT').connect() as connection:
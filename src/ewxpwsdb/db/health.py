@@ -0,0 +1,107 @@
+"""database health checks in the background, so that requests don't each test the connection before their query.
+
+A HealthMonitor runs a simple query every interval in a thread and keeps the result, which is what the http api
+reports at /health.  The interval is set with the environment variable EWXPWSDB_HEALTH_INTERVAL, in seconds.
+"""
+
+import logging, os, threading
+from datetime import datetime, timezone
+from time import perf_counter
+
+from pydantic import BaseModel, Field
+from sqlalchemy import Engine, text
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_HEALTH_INTERVAL_VAR = "EWXPWSDB_HEALTH_INTERVAL"
+DEFAULT_HEALTH_INTERVAL:float = 30.0
+
+
+def health_interval()->float:
+    """seconds between health checks, from the environment or the default"""
+    value = os.environ.get(_HEALTH_INTERVAL_VAR, '').strip()
+    if not value:
+        return DEFAULT_HEALTH_INTERVAL
+
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"environment variable {_HEALTH_INTERVAL_VAR} must be a number of seconds, got {value}")
+
+
+class HealthStatus(BaseModel):
+    """result of the most recent database check"""
+
+    ok: bool = Field(description="true if the database answered the check")
+    checked_datetime: datetime|None = Field(default=None, description="time of the check, UTC")
+    latency_ms: float|None = Field(default=None, description="time for the check query in milliseconds")
+    message: str = Field(default='', description="error from the check, if any")
+
+
+class HealthMonitor:
+    """check the database connection every interval seconds in a daemon thread, and keep the latest result
+
+    example
+        monitor = HealthMonitor(engine)
+        monitor.start()
+        monitor.status.ok
+    """
+
+    def __init__(self, engine:Engine, interval_seconds:float|None = None):
+        """
+        Args:
+            engine (Engine): sqlalchemy engine to check
+            interval_seconds (float | None, optional): seconds between checks. Defaults to None for health_interval().
+        """
+        self._engine = engine
+        self.interval_seconds = health_interval() if interval_seconds is None else interval_seconds
+        self._status:HealthStatus|None = None
+        self._stop_event = threading.Event()
+        self._thread:threading.Thread|None = None
+
+
+    def check(self)->HealthStatus:
+        """run the check query now, save and return the result"""
+        start_time = perf_counter()
+        try:
+            with self._engine.connect() as connection:
+                connection.execute(text('SELECT 1;'))
+            status = HealthStatus(ok = True, latency_ms = round((perf_counter() - start_time) * 1000, 2))
+        except Exception as e:
+            logger.error(f"database health check failed: {e}")
+            status = HealthStatus(ok = False, message = str(e))
+
+        status.checked_datetime = datetime.now(timezone.utc)
+        self._status = status
+        return status
+
+
+    @property
+    def status(self)->HealthStatus:
+        """result of the latest check, checking now if there hasn't been one"""
+        return self._status or self.check()
+
+
+    def _run(self)->None:
+        while not self._stop_event.is_set():
+            self.check()
+            self._stop_event.wait(self.interval_seconds)
+
+
+    def start(self)->None:
+        """start checking in the background, if not already started"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target = self._run, name = "db-health", daemon = True)
+        self._thread.start()
+
+
+    def stop(self)->None:
+        """stop checking, waiting for a check in progress to finish"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
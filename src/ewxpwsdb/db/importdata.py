@@ -59,6 +59,8 @@ def import_station_records(weatherstation_data:list, engine):
         engine (Engine, optional):  SQLAlchemy/SQLModel Engine from create_engine().  Defaults to global engine created in database.py
     """
 
+    # imported here, as the registry imports the database module, which imports this one
+    from ewxpwsdb.station_registry import station_registry
 
     # uses the global var 'engine' imported above
     with Session(engine) as session:
@@ -69,6 +71,8 @@ def import_station_records(weatherstation_data:list, engine):
             try:
                 session.add(station_record)
                 session.commit()
+                # a record cached before this import would be stale
+                station_registry.invalidate(station_code = station_record.station_code)
             except IntegrityError:
                 session.rollback()
                 logger.warning(f"Station with code '{s['station_code']}' already exists in the database, not overwriting existing record")
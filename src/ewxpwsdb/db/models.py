@@ -1,10 +1,11 @@
-from typing import Optional
+from typing import Any, Optional
 from datetime import datetime, date
 from sqlmodel import SQLModel, Field, UniqueConstraint, Column, DateTime
 from uuid import uuid4
-from sqlalchemy import DateTime
-from pydantic import AwareDatetime, field_serializer
-import json
+from sqlalchemy import DateTime, LargeBinary, Index, text
+from pydantic import AwareDatetime, field_serializer, ValidationError
+from sqlalchemy.orm.instrumentation import manager_of_class
+import json, zlib, hashlib
 import logging
 
 # Set up logging
@@ -12,6 +13,9 @@ logger = logging.getLogger(__name__)
 
 from ewxpwsdb import __version__
 
+# zlib level for APIResponse.response_payload, 6 is the zlib default balance of speed and size
+_PAYLOAD_COMPRESSION_LEVEL:int = 6
+
 class StationType(SQLModel, table = True):
     """code representing the type of station, which dictates which class to use for API connecting and decoding """
     station_type: str = Field(primary_key=True)
@@ -73,19 +77,52 @@ class APIResponse(SQLModel, table=True):
     request_url : str =  Field(description='response.request.url')
     response_status_code : str = Field(description='(response.status_code)')
     response_reason : str = Field(description='response.reason')
-    response_text : str = Field(description='response.text')
-    response_content : str = Field(description='response.content') 
+    # the response body is stored once, compressed.  Rows saved before compression was added have the uncompressed 
+    # response_text and response_content instead, until converted with db.upgrade.compress_api_responses()
+    response_payload : Optional[bytes] = Field(default=None, description='response.text, utf-8 encoded and zlib compressed', sa_column = Column(LargeBinary)) #type: ignore
+    response_text : Optional[str] = Field(default=None, description='response.text, uncompressed (rows saved before response_payload)')
+    response_content : Optional[str] = Field(default=None, description='response.content, uncompressed (rows saved before response_payload)') 
+    response_hash : Optional[str] = Field(default=None, index=True, description='sha256 hex digest of response.text, to find responses with identical content')
+
+    @staticmethod
+    def compress_text(text:str)->bytes:
+        """compress response text for the response_payload field"""
+        return zlib.compress(text.encode('utf-8'), _PAYLOAD_COMPRESSION_LEVEL)
+    
+    @staticmethod
+    def hash_text(text:str)->str:
+        """content hash of response text for the response_hash field"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_response_text(self)->str|None:
+        """the response body as text, decompressed from response_payload when it is used, or from response_text for older rows
+
+        Returns:
+            str|None: response text, or None if there is no response body stored
+        """
+        if self.response_payload is not None:
+            return zlib.decompress(self.response_payload).decode('utf-8')
+        return self.response_text
 
     #TODO redundant fields, enable later?
     # weatherstation_code: str = Field(foreign_key="weatherstation.station_code", description="backup link to the weather station that this readng from via human assigned code")
     # weatherstation_type: str 
 
 
+# fields of Reading copied from the APIResponse rather than from the transformed sensor data
+_READING_METADATA_FIELDS:set[str] = {'id', 'apiresponse_id', 'request_id', 'weatherstation_id', 'station_sampling_interval'}
+
 class Reading(SQLModel, table=True):
     """a reading of a weather stations sensors, as reported by the API and harmonized to EWX standard"""
 
     __table_args__ = (
         UniqueConstraint("data_datetime", "weatherstation_id", name="constraint_one_reading_per_timestamp_per_station"),
+        # readings of one station in a time range, newest first; the unique constraint has time first so can't do this
+        Index("ix_reading_weatherstation_id_data_datetime", "weatherstation_id", text("data_datetime DESC")),
+        # readings of an api response, for finding the responses of an interval
+        Index("ix_reading_apiresponse_id", "apiresponse_id"),
+        # small block range index on time for scans across all stations of very large tables, a btree index on other databases
+        Index("brin_reading_data_datetime", "data_datetime", postgresql_using="brin"),
     )
 
     # meta data fields
@@ -124,6 +161,7 @@ class Reading(SQLModel, table=True):
     def model_validate_from_station(cls, sensor_data:dict, api_response: APIResponse, database = True):
         """ create reading from a list of sensor data from the `transform()` method of WeatherAPI, and add required metadata to dict of transformed weather data.   If the APIResponse record has not been stored 
         in the database already, then it won't have an ID and validation will fail.  set the flag 'database' = False to allow validation.   
+        Every field is validated, use this for sensor data that did not come directly from a WeatherAPI transform.  See model_construct_from_station() for the fast path.
 
         Args:
             sensor_data (list): list of sensor values extracted from APIResponse using the 'transform' method of Weather API
@@ -136,22 +174,120 @@ class Reading(SQLModel, table=True):
          Returns:
             Reading: Reading object. sensor values with metadata.   If database=False and APIResponse do not have an id, apireaponse_id==0    
         """
-        r:dict = sensor_data # start with this dict and add meta data, r == reading
+        # start with the sensor data and add meta data, r == reading
+        r:dict = {**sensor_data, **cls._metadata_from_response(api_response, database)}
+        return(cls.model_validate(r))
 
-        from pydantic import ValidationError
+    @classmethod
+    def model_construct_from_station(cls, sensor_data_list:list[dict], api_response: APIResponse, database = True)->list["Reading"]:
+        """create readings from the sensor data of one response without validating every reading.  For dicts from the 
+        `transform()` methods of WeatherAPI, which are already normalized:  the first reading is fully validated, then the 
+        rest are only checked for unknown fields and a timezone-aware data_datetime, and integer values are converted to float 
+        as validation would.  About 5x faster than model_validate_from_station() for each reading.
+
+        Args:
+            sensor_data_list (list[dict]): sensor values of each reading, from the transform of a WeatherAPI
+            api_response (APIResponse): the response the sensor values come from, see model_validate_from_station()
+            database (bool, optional): see model_validate_from_station(). Defaults to True.
+
+        Raises:
+            ValueError: if a reading has a field that is not in the Reading model or does not have a timezone-aware data_datetime
+            ValidationError: if the first reading is not valid
+
+        Returns:
+            list[Reading]: Reading objects in the same order as the sensor data
+        """
+        if not sensor_data_list:
+            return []
+        
+        metadata = cls._metadata_from_response(api_response, database)
+        data_fields = set(cls.model_fields) - _READING_METADATA_FIELDS
+        mapper_manager = manager_of_class(cls)
 
+        readings:list[Reading] = []
+        for sensor_data in sensor_data_list:
+            if not sensor_data.keys() <= data_fields:
+                raise ValueError(f"unknown reading fields {sensor_data.keys() - data_fields}")
+            
+            if not readings:
+                readings.append(cls.model_validate({**sensor_data, **metadata}))
+                continue
+
+            data_datetime = sensor_data.get('data_datetime')
+            if not isinstance(data_datetime, datetime) or data_datetime.utcoffset() is None:
+                raise ValueError(f"reading data_datetime must be a timezone-aware datetime, got {data_datetime!r}")
+
+            values = {field: float(value) if type(value) is int else value for field, value in sensor_data.items()}
+            reading = cls.model_construct(**values, **metadata)
+            # database state that validation would have set up, needed to add the reading to a session
+            mapper_manager.setup_instance(reading)
+            readings.append(reading)
+
+        return readings
+
+    @staticmethod
+    def _metadata_from_response(api_response: APIResponse, database = True)->dict:
+        """reading fields copied from the api response, see model_validate_from_station()"""
+        metadata:dict[str, Any] = {}
         if not api_response.id:
             if database:
                 raise ValidationError("Reading can't be created from APIResponse without database id, unless add flag 'database=False'")
             else:
                 # this allows the transform to proceed but these reading records can't be inserted into the database
-                r['apiresponse_id']  = 0
+                metadata['apiresponse_id']  = 0
         else:
-            r['apiresponse_id'] = api_response.id
+            metadata['apiresponse_id'] = api_response.id
             
         # redundant columns to reduce the need for joins
-        r['request_id']          = api_response.request_id
-        r['weatherstation_id']   = api_response.weatherstation_id
-        r['station_sampling_interval']   = api_response.station_sampling_interval
-        return(cls.model_validate(r))
+        metadata['request_id']          = api_response.request_id
+        metadata['weatherstation_id']   = api_response.weatherstation_id
+        metadata['station_sampling_interval']   = api_response.station_sampling_interval
+        return metadata
+
+
+class ReadingsPayload:
+    """TransformResult.readings_payload built a batch of readings at a time and compressed as it goes, so the readings 
+    of a large response don't all have to be kept until the last one is transformed.  See TransformResult.compress_readings()"""
+
+    def __init__(self, readings:list[Reading]|None = None):
+        self.reading_count = 0
+        self._compressor = zlib.compressobj(_PAYLOAD_COMPRESSION_LEVEL)
+        self._chunks:list[bytes] = [self._compressor.compress(b'[')]
+        if readings:
+            self.add(readings)
+
+    def add(self, readings:list[Reading])->None:
+        """add the sensor values of the next readings of the response"""
+        for reading in readings:
+            values = reading.model_dump(mode='json', exclude=_READING_METADATA_FIELDS, exclude_none=True)
+            # same separator as json.dumps() of the whole list
+            separator = ', ' if self.reading_count else ''
+            self._chunks.append(self._compressor.compress((separator + json.dumps(values)).encode('utf-8')))
+            self.reading_count += 1
+
+    def compressed(self)->bytes:
+        """the finished payload.  No more readings can be added after this"""
+        return b''.join(self._chunks + [self._compressor.compress(b']'), self._compressor.flush()])
+
+
+class TransformResult(SQLModel, table=True):
+    """readings transformed from one API response by a version of the station type's transform, so that 
+    retransforming can skip responses that were already transformed by the current version (see Collector.retransform)"""
+
+    id: Optional[int] = Field(default=None, primary_key=True, description="database assigned id number")
+    apiresponse_id: int = Field(foreign_key="apiresponse.id", unique=True, description="the response that was transformed")
+    response_hash: Optional[str] = Field(default=None, index=True, description="APIResponse.response_hash, responses with identical content can re-use this result")
+    station_type: str = Field(description="station type whose transform made these readings")
+    transform_version: int = Field(description="WeatherAPI.transform_version of the station type when transformed")
+    transform_datetime: AwareDatetime = Field(description="Timestamp in UTC of when the transform was run", sa_column = Column(DateTime(timezone=True))) #type: ignore
+    reading_count: int = Field(description="number of readings from the response")
+    readings_payload: bytes = Field(description="sensor values of the readings without metadata, JSON utf-8 encoded and zlib compressed", sa_column = Column(LargeBinary)) #type: ignore
+
+    @staticmethod
+    def compress_readings(readings:list[Reading])->bytes:
+        """sensor values of transformed readings for the readings_payload field"""
+        return ReadingsPayload(readings).compressed()
 
+    def get_readings(self)->list[dict]:
+        """the stored sensor values, one dict per reading, to be used with Reading.model_validate_from_station()"""
+        return json.loads(zlib.decompress(self.readings_payload).decode('utf-8'))
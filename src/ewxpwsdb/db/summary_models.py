@@ -347,8 +347,11 @@ class MissingDataSummary(BaseModel):
     missing_data_intervals: list[UTCInterval]
     
     @classmethod
-    def missing_summary_sql(cls, station_id:int, sampling_interval, start_datetime:datetime|None=None, end_datetime:date = date.today())-> str: 
+    def missing_summary_sql(cls, station_id:int, sampling_interval, start_datetime:datetime|None=None, end_datetime:date|None = None)-> str: 
           
+        if end_datetime is None:
+            end_datetime = date.today()
+
 
         utc_interval = UTCInterval(start = start_datetime, end = end_datetime) # type: ignore
         
@@ -0,0 +1,141 @@
+"""Upgrade an existing EWX PWS database to the current models.
+init_db() creates new databases with all current columns and indexes; these functions alter tables in databases
+created by earlier versions of this package and convert existing rows.
+All steps are safe to run more than once."""
+
+import logging
+from sqlalchemy import Engine, text
+from sqlmodel import Session, SQLModel
+
+from ewxpwsdb.db.models import APIResponse, TransformResult
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# statements to bring tables created by earlier versions up to date, in order
+UPGRADE_STATEMENTS:list[str] = [
+    # compressed response payload, response_text/response_content are only kept for older rows
+    "ALTER TABLE apiresponse ADD COLUMN IF NOT EXISTS response_payload bytea",
+    "ALTER TABLE apiresponse ALTER COLUMN response_text DROP NOT NULL",
+    "ALTER TABLE apiresponse ALTER COLUMN response_content DROP NOT NULL",
+    # content hash for finding duplicate responses
+    "ALTER TABLE apiresponse ADD COLUMN IF NOT EXISTS response_hash varchar",
+    "CREATE INDEX IF NOT EXISTS ix_apiresponse_response_hash ON apiresponse (response_hash)",
+]
+
+# indexes on reading declared in models.Reading, for databases created before they were added.  On a large table
+# create these with concurrently = True so that collection can keep writing while they are built
+READING_INDEX_STATEMENTS:list[str] = [
+    "CREATE INDEX IF NOT EXISTS ix_reading_weatherstation_id_data_datetime ON reading (weatherstation_id, data_datetime DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_reading_apiresponse_id ON reading (apiresponse_id)",
+    "CREATE INDEX IF NOT EXISTS brin_reading_data_datetime ON reading USING brin (data_datetime)",
+]
+
+# tables added since the first version, created if they are missing
+NEW_TABLES = [
+    TransformResult.__table__, # type: ignore
+]
+
+
+def upgrade_db(engine:Engine, concurrently:bool = False)->list[str]:
+    """alter tables in an existing database to match the current models, and create tables and indexes that are new
+
+    Args:
+        engine (Engine): sqlalchemy engine for an existing EWX PWS database
+        concurrently (bool, optional): build the reading indexes without locking out writes, see create_reading_indexes(). Defaults to False.
+
+    Returns:
+        list[str]: the statements that were run
+    """
+    SQLModel.metadata.create_all(engine, tables = NEW_TABLES)
+
+    with Session(engine) as session:
+        for sql_str in UPGRADE_STATEMENTS:
+            logger.debug(f"upgrade: {sql_str}")
+            session.exec(text(sql_str)) #type: ignore
+        session.commit()
+
+    return UPGRADE_STATEMENTS + create_reading_indexes(engine, concurrently = concurrently)
+
+
+def create_reading_indexes(engine:Engine, concurrently:bool = False)->list[str]:
+    """create the indexes of the reading table that are missing, then update the table statistics so the query planner
+    uses them.  Building an index locks the table against writes until it's done, which can take minutes on a
+    large table.  With concurrently = True the indexes are built while collection carries on, more slowly, and an index
+    left invalid by an earlier concurrent build that failed is dropped and built again.
+
+    Args:
+        engine (Engine): sqlalchemy engine for an existing EWX PWS database
+        concurrently (bool, optional): use CREATE INDEX CONCURRENTLY. Defaults to False.
+
+    Returns:
+        list[str]: the statements that were run
+    """
+    if not concurrently:
+        statements = READING_INDEX_STATEMENTS + ["ANALYZE reading"]
+        with Session(engine) as session:
+            for sql_str in statements:
+                logger.debug(f"upgrade: {sql_str}")
+                session.exec(text(sql_str)) #type: ignore
+            session.commit()
+        return statements
+
+    index_names = [sql_str.split(' IF NOT EXISTS ')[1].split()[0] for sql_str in READING_INDEX_STATEMENTS]
+    invalid_sql = text("""
+        select c.relname from pg_index i join pg_class c on c.oid = i.indexrelid
+        where not i.indisvalid and c.relname = any(:index_names)
+        """)
+
+    statements = []
+    # concurrent index builds can't run inside a transaction
+    with engine.connect().execution_options(isolation_level = "AUTOCOMMIT") as connection:
+        invalid_indexes = connection.execute(invalid_sql, {'index_names': index_names}).scalars().all()
+        statements += [f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}" for index_name in invalid_indexes]
+        statements += [sql_str.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1) for sql_str in READING_INDEX_STATEMENTS]
+        statements.append("ANALYZE reading")
+        for sql_str in statements:
+            logger.info(f"upgrade: {sql_str}")
+            connection.execute(text(sql_str))
+
+    return statements
+
+
+def compress_api_responses(engine:Engine, batch_size:int = 500)->int:
+    """convert stored API responses from uncompressed response_text/response_content to the compressed
+    response_payload field, in batches so that each transaction stays small.   Rows are only converted once,
+    so this can be stopped and run again.  Run upgrade_db() first.  Space from the old columns is
+    reclaimed by postgresql VACUUM, which is not run here.
+
+    Args:
+        engine (Engine): sqlalchemy engine for an existing EWX PWS database
+        batch_size (int, optional): number of rows to convert per transaction. Defaults to 500.
+
+    Returns:
+        int: number of rows converted
+    """
+    select_sql = text("""
+        select id, response_text from apiresponse
+        where response_payload is null and response_text is not null and id > :last_id
+        order by id limit :batch_size
+        """)
+    update_sql = text("""
+        update apiresponse set response_payload = :payload, response_hash = :hash, response_text = null, response_content = null
+        where id = :id
+        """)
+
+    converted = 0
+    last_id = 0
+    while True:
+        with Session(engine) as session:
+            rows = session.exec(select_sql, params = {'last_id': last_id, 'batch_size': batch_size}).all() #type: ignore
+            if not rows:
+                break
+
+            session.exec(update_sql, params = [{'id': row.id, 'payload': APIResponse.compress_text(row.response_text), 'hash': APIResponse.hash_text(row.response_text)} for row in rows]) #type: ignore
+            session.commit()
+
+        converted += len(rows)
+        last_id = rows[-1].id
+        logger.info(f"compressed {converted} api responses (through id {last_id})")
+
+    return converted
@@ -0,0 +1,149 @@
+"""run the collector for all active weather stations in one process,
+with a bounded number of stations collecting at the same time"""
+
+import logging
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from pydantic import BaseModel, Field
+from sqlmodel import select
+from sqlalchemy import Engine
+
+from ewxpwsdb.db.database import Session
+from ewxpwsdb.db.models import WeatherStation
+from ewxpwsdb.collector import Collector
+from ewxpwsdb.time_intervals import UTCInterval
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class StationCollectionResult(BaseModel):
+    """outcome of running the collector for one station"""
+
+    station_code: str = Field(description="code of the station that was collected")
+    station_type: str = Field(description="vendor type of the station")
+    status: str = Field(description="'ok' if the collection completed, 'incomplete' if some requests failed after retries, 'error' if it did not complete")
+    readings_saved: int = Field(default=0, description="number of readings inserted or updated in the database")
+    seconds: float = Field(default=0.0, description="elapsed time to collect this station")
+    message: str = Field(default='', description="error message, if any")
+    failed_intervals: list[UTCInterval] = Field(default=[], description="intervals of requests that failed after retries, no data was stored for them")
+
+    def add_failed_intervals(self, failed_intervals:list[UTCInterval])->None:
+        """record requests of a completed collection that failed, e.g. from Collector.current_failed_intervals"""
+        if not failed_intervals:
+            return
+        self.failed_intervals.extend(failed_intervals)
+        self.status = 'incomplete'
+        self.message = f"{len(self.failed_intervals)} failed requests, first {self.failed_intervals[0].start} to {self.failed_intervals[0].end}"
+
+
+def active_stations(engine:Engine, station_type:str|None = None)->list[WeatherStation]:
+    """get all active weather stations from the database
+
+    Args:
+        engine (Engine): sqlalchemy engine object with working connection to an EWX database
+        station_type (str, optional): limit to stations of this type, e.g. 'ZENTRA'. Defaults to None for all types
+
+    Returns:
+        list[WeatherStation]: active station records, ordered by station code
+    """
+    stmt = select(WeatherStation).where(WeatherStation.active == True).order_by(WeatherStation.station_code) #type: ignore
+    if station_type:
+        stmt = stmt.where(WeatherStation.station_type == station_type.upper())
+
+    with Session(engine) as session:
+        stations = list(session.exec(stmt).fetchall())
+
+    return stations
+
+
+def catch_up_station(station:WeatherStation, engine:Engine)->StationCollectionResult:
+    """run Collector.catch_up() for one station and record the outcome rather than raising,
+    so one station's failure does not stop the rest
+
+    Args:
+        station (WeatherStation): station record from the database
+        engine (Engine): shared engine, which is not disposed when the collector closes
+
+    Returns:
+        StationCollectionResult: status and number of readings saved
+    """
+    start_time = perf_counter()
+    result = StationCollectionResult(station_code = station.station_code, station_type = station.station_type, status = 'ok')
+
+    collector = None
+    try:
+        collector = Collector(station = station, engine = engine)
+        collector.catch_up()
+        result.readings_saved = len(collector.current_reading_ids)
+        result.add_failed_intervals(collector.current_failed_intervals)
+    except Exception as e:
+        logger.error(f"error on catch-up process for station {station.station_code}: {e}")
+        result.status = 'error'
+        result.message = str(e)
+    finally:
+        if collector:
+            collector.close(dispose_engine = False)
+
+    result.seconds = round(perf_counter() - start_time, 2)
+    return result
+
+
+def catch_up_all(engine:Engine, max_workers:int = 8, workers_per_vendor:int = 2, station_type:str|None = None)->list[StationCollectionResult]:
+    """run catch_up for every active station concurrently.  Stations are grouped by vendor type and each
+    group has its own worker pool of workers_per_vendor, so a slow or throttled vendor API (e.g. Zentra) only delays
+    stations of that type.  No more than max_workers stations are collected at any one time.
+
+    Args:
+        engine (Engine): sqlalchemy engine, shared by all collectors
+        max_workers (int, optional): max number of stations collecting at the same time. Defaults to 8.
+        workers_per_vendor (int, optional): max number of stations of the same vendor type collecting at the same time. Defaults to 2.
+        station_type (str, optional): only collect stations of this type. Defaults to None for all types
+
+    Returns:
+        list[StationCollectionResult]: one result per station, in station code order
+    """
+    stations = active_stations(engine, station_type)
+    logger.debug(f"catching up {len(stations)} stations with max {max_workers} workers, {workers_per_vendor} per vendor")
+
+    stations_by_type:dict[str, list[WeatherStation]] = {}
+    for station in stations:
+        stations_by_type.setdefault(station.station_type, []).append(station)
+
+    # limit for total stations in flight across all of the vendor pools
+    slots = threading.BoundedSemaphore(max(1, max_workers))
+
+    def run_in_slot(station:WeatherStation)->StationCollectionResult:
+        with slots:
+            return catch_up_station(station, engine)
+
+    futures:dict[str, Future] = {}
+    executors = [ThreadPoolExecutor(max_workers = max(1, min(workers_per_vendor, len(vendor_stations))), thread_name_prefix=f"collect-{vendor_type}")
+                 for vendor_type, vendor_stations in stations_by_type.items()]
+    try:
+        for executor, vendor_stations in zip(executors, stations_by_type.values()):
+            for station in vendor_stations:
+                futures[station.station_code] = executor.submit(run_in_slot, station)
+
+        results = [futures[station.station_code].result() for station in stations]
+    finally:
+        for executor in executors:
+            executor.shutdown(wait = True)
+
+    return results
+
+
+def results_summary(results:list[StationCollectionResult])->str:
+    """format collection results as tab-separated lines, one per station plus a totals line"""
+
+    lines = ["station_code\tstation_type\tstatus\treadings\tseconds\tmessage"]
+    for r in results:
+        lines.append(f"{r.station_code}\t{r.station_type}\t{r.status}\t{r.readings_saved}\t{r.seconds}\t{r.message}")
+
+    n_errors = len([r for r in results if r.status == 'error'])
+    n_incomplete = len([r for r in results if r.status == 'incomplete'])
+    n_readings = sum([r.readings_saved for r in results])
+    lines.append(f"{len(results)} stations, {n_errors} errors, {n_incomplete} incomplete, {n_readings} readings")
+    return "\n".join(lines)
@@ -0,0 +1,201 @@
+"""re-run the transform of stored API responses for all stations of a vendor type, for example after fixing
+a bug in that vendor's _transform.  Parsing and transforming responses is CPU bound, so it's spread over a pool of
+processes, while this process reads the responses and writes the readings in batches.
+
+Each batch of readings is committed together with a TransformResult for each of its responses (see
+Collector.retransform), and only responses without a result from the current transform_version are selected, so a
+run that is stopped can be started again and continues where it left off."""
+
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from datetime import datetime
+from time import perf_counter
+from typing import Callable
+
+from pydantic import BaseModel, Field
+from sqlalchemy import Engine, and_, func
+from sqlmodel import select
+
+from ewxpwsdb.db.database import Session
+from ewxpwsdb.db.models import WeatherStation, APIResponse, Reading, TransformResult
+from ewxpwsdb.weather_apis import API_CLASS_TYPES
+from ewxpwsdb.weather_apis.weather_api import WeatherAPI
+from ewxpwsdb.collector import upsert_reading_rows, upsert_transform_results, transform_result_values
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class RetransformProgress(BaseModel):
+    """running totals of a retransform of one station type"""
+
+    station_type: str = Field(description="vendor type of the stations being retransformed")
+    responses_total: int = Field(default=0, description="number of api responses that needed transforming when the run started")
+    responses_done: int = Field(default=0, description="number of api responses transformed and saved so far")
+    readings_saved: int = Field(default=0, description="number of readings inserted or updated so far")
+    errors: list[str] = Field(default=[], description="api responses that could not be transformed, these are tried again on the next run")
+    seconds: float = Field(default=0.0, description="elapsed time so far")
+
+    def summary(self)->str:
+        return (f"{self.station_type}: {self.responses_done}/{self.responses_total} api responses, {self.readings_saved} readings, "
+                f"{len(self.errors)} errors, {self.seconds} seconds")
+
+
+# weather api objects in a worker process, by station id, re-used for each chunk of responses sent to that process
+_worker_weather_apis:dict[int, WeatherAPI] = {}
+
+
+def _worker_weather_api(station_record:dict)->WeatherAPI:
+    wapi = _worker_weather_apis.get(station_record['id'])
+    if wapi is None:
+        weather_station = WeatherStation(**station_record)
+        wapi = API_CLASS_TYPES[weather_station.station_type](weather_station)
+        _worker_weather_apis[station_record['id']] = wapi
+    return wapi
+
+
+def transform_responses(station_records:dict[int, dict], response_records:list[dict])->tuple[list[dict], list[dict], list[str]]:
+    """transform a chunk of api responses, run in a worker process.  Records are sent as dicts rather than
+    database objects so they pickle simply.
+
+    Args:
+        station_records (dict[int, dict]): WeatherStation fields, including api_config, by station id
+        response_records (list[dict]): APIResponse fields of the responses to transform
+
+    Returns:
+        tuple[list[dict], list[dict], list[str]]: reading rows for upsert_reading_rows(), transform results for
+            upsert_transform_results(), and an error message for each response that could not be transformed
+    """
+    reading_rows:list[dict] = []
+    results:list[dict] = []
+    errors:list[str] = []
+
+    for response_record in response_records:
+        api_response = APIResponse(**response_record)
+        try:
+            wapi = _worker_weather_api(station_records[api_response.weatherstation_id])
+            readings = wapi.transform([api_response])
+        except Exception as e:
+            errors.append(f"api response {api_response.id}: {e}")
+            continue
+
+        reading_rows.extend([reading.model_dump(exclude={'id'}) for reading in readings])
+        results.append(transform_result_values(api_response, wapi, readings))
+
+    return reading_rows, results, errors
+
+
+def _stale_responses_stmt(station_type:str, since:datetime|None = None):
+    """select api responses linked to readings of stations of this type, that have no transform result from the
+    current transform version"""
+    transform_version = API_CLASS_TYPES[station_type].transform_version # type: ignore
+
+    readings_of_type = select(Reading.apiresponse_id).join(WeatherStation, WeatherStation.id == Reading.weatherstation_id).where(WeatherStation.station_type == station_type) # type: ignore
+    if since:
+        readings_of_type = readings_of_type.where(Reading.data_datetime >= since)
+
+    return (select(APIResponse)
+            .outerjoin(TransformResult, and_(TransformResult.apiresponse_id == APIResponse.id,  # type: ignore
+                                             TransformResult.station_type == station_type, # type: ignore
+                                             TransformResult.transform_version == transform_version))
+            .where(APIResponse.id.in_(readings_of_type), TransformResult.id == None) # type: ignore
+            )
+
+
+def _save_batch(engine:Engine, reading_rows:list[dict], results:list[dict], batch_size:int)->int:
+    """save readings and transform results in one transaction, returning the number of readings saved"""
+    # responses are transformed in id order, so for a timestamp in more than one response the latest response wins
+    rows_by_key = {(row['data_datetime'], row['weatherstation_id']): row for row in reading_rows}
+    with Session(engine) as session:
+        upsert_reading_rows(session, list(rows_by_key.values()), batch_size)
+        upsert_transform_results(session, results)
+        session.commit()
+
+    return len(rows_by_key)
+
+
+def retransform_station_type(engine:Engine, station_type:str, since:datetime|None = None, max_workers:int|None = None,
+                             batch_size:int = 200, chunk_size:int = 20,
+                             progress:Callable[[RetransformProgress], None]|None = None)->RetransformProgress:
+    """transform again all of the stored api responses of stations of a type that are not current, and save the readings.
+    Responses are read from the database batch_size at a time in id order, split into chunks of chunk_size for the
+    worker processes, and the readings of each batch are saved in one transaction.  The next batch is transformed while
+    one is being saved.
+
+    Args:
+        engine (Engine): sqlalchemy engine for the database
+        station_type (str): vendor type, e.g. 'LOCOMOS'
+        since (datetime | None, optional): only responses of readings at or after this time. Defaults to None for all readings.
+        max_workers (int | None, optional): number of worker processes. Defaults to None for the number of CPUs.
+        batch_size (int, optional): number of api responses saved per transaction. Defaults to 200.
+        chunk_size (int, optional): number of api responses sent to a worker process at once. Defaults to 20.
+        progress (Callable, optional): called with the running totals after each batch is saved. Defaults to None.
+
+    Raises:
+        ValueError: if station_type is not a known station type
+
+    Returns:
+        RetransformProgress: totals for the run
+    """
+    station_type = station_type.upper()
+    if station_type not in API_CLASS_TYPES:
+        raise ValueError(f"unknown station type {station_type}")
+
+    start_time = perf_counter()
+    status = RetransformProgress(station_type = station_type)
+    stale_responses = _stale_responses_stmt(station_type, since)
+
+    with Session(engine) as session:
+        stations = session.exec(select(WeatherStation).where(WeatherStation.station_type == station_type)).all()
+        # model_dump hides the api config, which the weather api needs
+        station_records:dict[int, dict] = {station.id: {**station.model_dump(), 'api_config': station.api_config} for station in stations} # type: ignore
+        status.responses_total = session.exec(select(func.count()).select_from(stale_responses.subquery())).one()
+
+    logger.info(f"retransforming {status.responses_total} api responses for {len(station_records)} {station_type} stations")
+
+    def next_batch(last_id:int)->list[dict]:
+        with Session(engine) as session:
+            api_responses = session.exec(stale_responses.where(APIResponse.id > last_id).order_by(APIResponse.id).limit(batch_size)).all() # type: ignore
+            return [api_response.model_dump() for api_response in api_responses]
+
+    # batches in flight, each a list of futures for its chunks
+    pending:deque[list[Future]] = deque()
+    last_id = 0
+    responses_remain = True
+
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        while True:
+            # keep the workers busy with the next batch while the current one is saved
+            while responses_remain and len(pending) < 2:
+                response_records = next_batch(last_id)
+                if not response_records:
+                    responses_remain = False
+                    break
+
+                last_id = response_records[-1]['id']
+                pending.append([executor.submit(transform_responses, station_records, response_records[i:i+chunk_size])
+                                for i in range(0, len(response_records), chunk_size)])
+
+            if not pending:
+                break
+
+            reading_rows:list[dict] = []
+            results:list[dict] = []
+            for future in pending.popleft():
+                chunk_rows, chunk_results, chunk_errors = future.result()
+                reading_rows.extend(chunk_rows)
+                results.extend(chunk_results)
+                status.errors.extend(chunk_errors)
+
+            status.readings_saved += _save_batch(engine, reading_rows, results, batch_size = 1000)
+            status.responses_done += len(results)
+            status.seconds = round(perf_counter() - start_time, 2)
+            logger.info(f"retransform {status.summary()}")
+            if progress:
+                progress(status)
+
+    for error in status.errors:
+        logger.error(f"retransform {station_type} {error}")
+
+    return status
@@ -0,0 +1,211 @@
+"""long running collection of current weather data for all active stations, in one process.
+
+Each station is collected on a regular schedule aligned to the quarter hour (e.g. 10:00, 10:15, ...), with a random
+delay (jitter) after the mark so requests to a vendor API are spread out.  The database engine, and a Collector for each
+station with its weather api object, are created once and kept for the life of the process.
+
+The period of the schedule for a station comes from its weather api's standard_time_interval_minutes, the length of
+time requested for current data:  the period is the largest multiple of 15 minutes no longer than that, so requests
+overlap or meet and no time is missed between runs (e.g. 15 min for most stations, 60 min for Locomos).   Readings
+missed while the scheduler was not running are not collected, use `ewxpws catchup-all` or Collector.backfill() for those.
+"""
+
+import heapq
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+from sqlalchemy import Engine
+
+from ewxpwsdb.collector import Collector
+from ewxpwsdb.fleet import active_stations, StationCollectionResult
+from ewxpwsdb.time_intervals import UTCInterval
+from ewxpwsdb.weather_apis.weather_api import WeatherAPI
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# runs are aligned to these marks, in minutes after the hour
+SCHEDULE_MARK_MINUTES = 15
+
+
+def schedule_period_minutes(weather_api:WeatherAPI)->int:
+    """minutes between collections for a station, the largest multiple of 15 minutes that is not longer than the time
+    requested on each run, and at least 15 minutes
+
+    Args:
+        weather_api (WeatherAPI): weather api object of the station
+
+    Returns:
+        int: minutes between runs, e.g. 15 for most stations and 60 for Locomos
+    """
+    request_minutes = max(weather_api.standard_time_interval_minutes, weather_api.sampling_interval)
+    return max(SCHEDULE_MARK_MINUTES, request_minutes // SCHEDULE_MARK_MINUTES * SCHEDULE_MARK_MINUTES)
+
+
+def next_run_mark(period_minutes:int, after:datetime)->datetime:
+    """the next time after the given time that is a multiple of period_minutes from midnight UTC
+
+    Args:
+        period_minutes (int): minutes between runs, a multiple of 15
+        after (datetime): timezone-aware datetime
+
+    Returns:
+        datetime: the next mark in UTC, always later than after, e.g. 10:15 for after = 10:07 and period_minutes = 15
+    """
+    after_utc = after.astimezone(timezone.utc)
+    midnight = after_utc.replace(hour = 0, minute = 0, second = 0, microsecond = 0)
+    periods_so_far = int((after_utc - midnight) / timedelta(minutes = period_minutes))
+    return midnight + timedelta(minutes = period_minutes * (periods_so_far + 1))
+
+
+def request_interval(weather_api:WeatherAPI, mark:datetime)->UTCInterval:
+    """the interval of weather data to request on the run at the given mark, standard_time_interval_minutes ending at the mark"""
+    return UTCInterval.previous_interval(mark, delta_mins = weather_api.standard_time_interval_minutes)
+
+
+class CollectorScheduler:
+    """collect current weather data for all active stations on a schedule, until stopped.
+
+    example
+        scheduler = CollectorScheduler(engine)
+        scheduler.run()   # blocks, call scheduler.stop() from another thread or a signal handler to end
+    """
+
+    def __init__(self, engine:Engine, station_type:str|None = None, max_workers:int = 8, jitter_seconds:float = 60.0, reload_minutes:int = 60):
+        """
+        Args:
+            engine (Engine): sqlalchemy engine, shared by all collectors and not disposed when they close
+            station_type (str, optional): only collect stations of this type. Defaults to None for all types
+            max_workers (int, optional): max number of stations collecting at the same time. Defaults to 8.
+            jitter_seconds (float, optional): each run starts a random number of seconds up to this after its mark. Defaults to 60.0.
+            reload_minutes (int, optional): how often to reload the list of active stations from the database. Defaults to 60.
+        """
+        self._engine = engine
+        self.station_type = station_type
+        self.max_workers = max_workers
+        self.jitter_seconds = jitter_seconds
+        self.reload_minutes = reload_minutes
+        self.collectors:dict[str, Collector] = {}
+        self._running:dict[str, Future] = {}
+        self._stop_event = threading.Event()
+
+
+    def load_stations(self)->list[str]:
+        """create collectors for active stations that don't have one, and close collectors of stations that are no
+        longer active
+
+        Returns:
+            list[str]: station codes that were added
+        """
+        stations = {station.station_code: station for station in active_stations(self._engine, self.station_type)}
+
+        for station_code in list(self.collectors):
+            if station_code not in stations:
+                logger.info(f"scheduler: station {station_code} is no longer active")
+                self.collectors.pop(station_code).close(dispose_engine = False)
+
+        added = []
+        for station_code, station in stations.items():
+            if station_code not in self.collectors:
+                try:
+                    self.collectors[station_code] = Collector(station = station, engine = self._engine)
+                    added.append(station_code)
+                except Exception as e:
+                    logger.error(f"scheduler: could not create collector for station {station_code}: {e}")
+
+        logger.info(f"scheduler: {len(self.collectors)} active stations, {len(added)} added")
+        return added
+
+
+    def next_run(self, station_code:str, after:datetime)->tuple[datetime, datetime]:
+        """the next run for a station after the given time
+
+        Returns:
+            tuple[datetime, datetime]: time to start the run, which is the next mark of the station's period plus random jitter, and the mark
+        """
+        period_minutes = schedule_period_minutes(self.collectors[station_code].weather_api)
+        mark = next_run_mark(period_minutes, after)
+        return mark + timedelta(seconds = random.uniform(0, self.jitter_seconds)), mark
+
+
+    def collect_station(self, station_code:str, mark:datetime)->StationCollectionResult:
+        """request and store the weather data for one station for the run at mark, recording the outcome rather than raising"""
+        collector = self.collectors[station_code]
+        start_time = perf_counter()
+        result = StationCollectionResult(station_code = station_code, station_type = collector.station_type, status = 'ok') # type: ignore
+
+        try:
+            interval = request_interval(collector.weather_api, mark)
+            collector.request_and_store_weather_data_utc(interval)
+            result.readings_saved = len(collector.current_reading_ids)
+            result.add_failed_intervals(collector.current_failed_intervals)
+        except Exception as e:
+            logger.error(f"scheduler: error collecting station {station_code} for {mark}: {e}")
+            result.status = 'error'
+            result.message = str(e)
+
+        result.seconds = round(perf_counter() - start_time, 2)
+        logger.info(f"scheduler: {station_code} {result.status} {result.readings_saved} readings in {result.seconds} seconds")
+        return result
+
+
+    def _submit(self, executor:ThreadPoolExecutor, station_code:str, mark:datetime)->None:
+        """start a run for the station unless its previous run is still going"""
+        previous = self._running.get(station_code)
+        if previous and not previous.done():
+            logger.warning(f"scheduler: previous run of station {station_code} has not finished, skipping run for {mark}")
+            return
+
+        self._running[station_code] = executor.submit(self.collect_station, station_code, mark)
+
+
+    def run(self)->None:
+        """collect stations on their schedules until stop() is called.  Runs in progress finish before this returns,
+        and the collectors are closed"""
+        self._stop_event.clear()
+        self.load_stations()
+        now = datetime.now(timezone.utc)
+        # heap of (run time, mark, station code)
+        schedule = [(*self.next_run(station_code, now), station_code) for station_code in self.collectors]
+        heapq.heapify(schedule)
+        next_reload = now + timedelta(minutes = self.reload_minutes)
+
+        with ThreadPoolExecutor(max_workers = max(1, self.max_workers), thread_name_prefix = "scheduler") as executor:
+            while not self._stop_event.is_set():
+                now = datetime.now(timezone.utc)
+
+                if now >= next_reload:
+                    for station_code in self.load_stations():
+                        heapq.heappush(schedule, (*self.next_run(station_code, now), station_code))
+                    next_reload = now + timedelta(minutes = self.reload_minutes)
+
+                while schedule and schedule[0][0] <= now:
+                    _, mark, station_code = heapq.heappop(schedule)
+                    if station_code not in self.collectors:
+                        # station was deactivated
+                        continue
+                    self._submit(executor, station_code, mark)
+                    # from now rather than the mark, so marks missed while the process was suspended are skipped
+                    heapq.heappush(schedule, (*self.next_run(station_code, now), station_code))
+
+                wake_time = min(schedule[0][0], next_reload) if schedule else next_reload
+                self._stop_event.wait(max(0.0, (wake_time - datetime.now(timezone.utc)).total_seconds()))
+
+        self.close()
+
+
+    def stop(self)->None:
+        """end run() after the runs in progress finish, safe to call from another thread or a signal handler"""
+        self._stop_event.set()
+
+
+    def close(self)->None:
+        """close all collectors, leaving the shared engine open"""
+        for collector in self.collectors.values():
+            collector.close(dispose_engine = False)
+        self.collectors = {}
+        self._running = {}
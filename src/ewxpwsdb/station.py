@@ -8,9 +8,9 @@ from sqlalchemy.sql import text
 from sqlalchemy.exc import NoResultFound
 
 from ewxpwsdb.db.models import WeatherStation, Reading
-from ewxpwsdb.db.database import Session, Engine, check_engine
-from ewxpwsdb.weather_apis import API_CLASS_TYPES
+from ewxpwsdb.db.database import Session, Engine
 from ewxpwsdb.time_intervals import DateInterval
+from ewxpwsdb.station_registry import station_registry
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -65,8 +65,6 @@ class WeatherStationDetail(BaseModel):
     def with_detail(cls, station_code, engine)->Self:
         """ add info to a WeatherStation model"""
         
-        if not check_engine(engine):
-            raise ValueError("invalid engine/connection string: {engine}")
         with Session(engine) as session:             
             result = session.exec(text(cls.weatherstation_plus_sql(station_code))).one()   #type: ignore
         
@@ -82,7 +80,7 @@ class Station():
 
         self.station_code:str = weather_station.station_code
         self.weather_station = weather_station
-        self.weather_api = API_CLASS_TYPES[weather_station.station_type](weather_station)
+        self.weather_api = station_registry.weather_api(weather_station)
 
         logger.debug(f"Initialized Station object for station code {self.station_code}")
 
@@ -95,13 +93,10 @@ class Station():
 
     @classmethod 
     def from_station_code(cls, station_code:str, engine:Engine)->Self:
-        if not check_engine(engine):
-            raise ValueError("invalid engine/connection string: {engine}")
-
+        # connection errors are raised by the query, see db/health.py for checking the database separately
+        # station records are cached for a time, see station_registry.py
         try:
-            with Session(engine) as session:            
-                stmt = select(WeatherStation).where(WeatherStation.station_code == station_code)
-                station_record:WeatherStation= session.exec(stmt).one()
+            station_record:WeatherStation = station_registry.station_by_code(station_code, engine)
         except NoResultFound as e:
             logger.error(f"No result found for station code {station_code}")
             raise NoResultFound(f"No station found with code {station_code}")
@@ -118,17 +113,8 @@ class Station():
 
     @classmethod
     def from_station_id(cls, station_id:int, engine:Engine) -> Self:
-        if not check_engine(engine):
-            logger.error(f"invalid engine when retrieving station id")
-            raise ValueError("invalid engine/connection string: {engine}")
-        
         try:
-            with Session(engine) as session:
-            # note this is SQLModel syntax, not SQLAlchemy
-                station_record:WeatherStation|None = session.get(WeatherStation, station_id)
-                if not station_record:
-                    logger.debug(f"no station record found with id {station_id}")
-                    raise NoResultFound()
+            station_record:WeatherStation|None = station_registry.station_by_id(station_id, engine)
         except NoResultFound:
             logger.debug(f"No result found for station ID {station_id}")
             raise NoResultFound(f"No station found with ID {station_id}")
@@ -187,9 +173,6 @@ class Station():
 
     def station_with_detail(self, engine)->WeatherStationDetail:
         """ add info to a WeatherStation model for API output"""
-        if not check_engine(engine):
-            raise ValueError("invalid engine/connection string: {engine}")
-        
         with Session(engine) as session:             
             result = session.exec(text(self.weatherstation_plus_sql())).one()   #type: ignore
             weatherstation_plus = result._asdict()
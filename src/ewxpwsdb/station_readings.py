@@ -2,7 +2,7 @@
 
 import logging
 from datetime import datetime, date, timezone
-from sqlmodel import select, Session, text
+from sqlmodel import select, Session, text, func
 from typing import Self, Sequence
 from zoneinfo import ZoneInfo
 from sqlalchemy.exc import NoResultFound
@@ -10,10 +10,10 @@ from sqlalchemy.exc import NoResultFound
 from ewxpwsdb.db.models import Reading, WeatherStation, APIResponse
 from ewxpwsdb.db.summary_models import HourlySummary, DailySummary, MissingDataSummary, LatestWeatherSummary
 from ewxpwsdb.db.database import Engine
-from ewxpwsdb.time_intervals import UTCInterval, is_utc, DateInterval
+from ewxpwsdb.time_intervals import UTCInterval, is_utc, DateInterval, missing_intervals, sampling_grid_start
 
 from ewxpwsdb.station import Station
-from ewxpwsdb.weather_apis import API_CLASS_TYPES
+from ewxpwsdb.station_registry import station_registry
 
 from ewxpwsdb.weather_apis.weather_api import WeatherAPI
 
@@ -39,7 +39,7 @@ class StationReadings():
             raise ValueError("weather station must be saved in the database and have an ID value")
         
         self.station:WeatherStation = station
-        self.weather_api:WeatherAPI = API_CLASS_TYPES[station.station_type](station)
+        self.weather_api:WeatherAPI = station_registry.weather_api(station)
         self._engine:Engine = engine
 
         #TODO find or write converter from Python timezone to PG timezones 
@@ -190,6 +190,17 @@ class StationReadings():
             return []
         
     
+    def reading_count_by_interval_utc(self, interval:UTCInterval)->int:
+        """number of readings in the DB for this station in the interval (inclusive), without loading them"""
+        stmt = select(func.count(Reading.id)).where(Reading.weatherstation_id == self.station.id).where(Reading.data_datetime >= interval.start).where(Reading.data_datetime <= interval.end) #type:ignore
+
+        with Session(self._engine) as session:
+            reading_count = session.exec(stmt).one()
+
+        logger.debug(f"Counted {reading_count} readings for station ID {self.station.id} within interval {interval}")
+        return reading_count
+
+
     def readings_by_date_interval_local(self, dates: DateInterval)->list[Reading|None]:    
         """get some readings from the DB for this station during the times that occur within the dates (local time)
         
@@ -238,14 +249,17 @@ class StationReadings():
         
         sql_str = f"""
         select 
-            distinct apiresponse.* 
+            apiresponse.* 
         from 
-            reading inner join apiresponse on reading.apiresponse_id = apiresponse.id
-        where 
-	        reading.data_datetime >= '{interval.start.isoformat()}'::timestamp with time zone
-	        and 
-            reading.data_datetime <= '{interval.end.isoformat()}'::timestamp with time zone
-            and reading.weatherstation_id = {self.station.id};
+            apiresponse
+        where apiresponse.id in (
+            select distinct reading.apiresponse_id from reading
+            where 
+                reading.data_datetime >= '{interval.start.isoformat()}'::timestamp with time zone
+                and 
+                reading.data_datetime <= '{interval.end.isoformat()}'::timestamp with time zone
+                and reading.weatherstation_id = {self.station.id}
+            );
         """          
         print(sql_str)
         
@@ -257,18 +271,44 @@ class StationReadings():
         return apiresponses
         
     
-    def missing_summary(self, start_datetime:datetime|None=None, end_datetime:date = date.today())->list[UTCInterval]:
-        
+    def missing_summary(self, start_datetime:datetime|None=None, end_datetime:date|None = None, method:str = 'sql')->list[UTCInterval]:
+        """intervals of missing readings for this station, where readings are expected every sampling interval on the clock 
+        from the start (see time_intervals.sampling_grid_start)
+
+        Args:
+            start_datetime (datetime | None, optional): start of the time to look in, local time unless it has a timezone. 
+            end_datetime (date | None, optional): end of the time to look in. Defaults to None for today.
+            method (str, optional): 'python' to fetch only the reading times in the interval and find the gaps in this process, 
+                or 'sql' to find them in the database with MissingDataSummary.missing_summary_sql(). Defaults to 'sql'.
+
+        Returns:
+            list[UTCInterval]: first and last missing reading time of each gap
+        """
+        if end_datetime is None:
+            end_datetime = date.today()
+
         if self.station.id is None:
             raise RuntimeError("this station must be in the database and have an ID")
         else:
             station_id:int = self.station.id
             
         interval = UTCInterval.init_from_local(local_start = start_datetime, local_end = end_datetime, local_timezone=self.station.timezone)
+
+        if method == 'python':
+            stmt = (select(Reading.data_datetime)
+                    .where(Reading.weatherstation_id == station_id)
+                    .where(Reading.data_datetime >= interval.start)
+                    .where(Reading.data_datetime <= interval.end)
+                    .order_by(Reading.data_datetime)) # type: ignore
+            with Session(self._engine) as session:
+                timestamps = session.exec(stmt).all()
+            return missing_intervals(timestamps, interval, self.weather_api._sampling_interval)
+        elif method != 'sql':
+            raise ValueError(f"unknown missing summary method {method}, use 'python' or 'sql'")
         
         missing_summary_sql = MissingDataSummary.missing_summary_sql(station_id = self.station.id, 
                                                                      sampling_interval = self.weather_api._sampling_interval, 
-                                                                     start_datetime = interval.start, 
+                                                                     start_datetime = sampling_grid_start(interval.start, self.weather_api._sampling_interval), 
                                                                      end_datetime = interval.end) 
         
         missing_data_intervals = []   
@@ -0,0 +1,150 @@
+"""in-process cache of weather station records and their weather api objects.
+
+Looking up a station for each http request or collection means a database query, parsing the station's api_config
+JSON into its vendor config model, and creating the WeatherAPI object.  The registry keeps the station records from the
+database for a time to live (TTL), and keeps one parsed WeatherAPI per station config.  Callers get a copy of that
+WeatherAPI, so state from a request (current responses, tokens, etc.) is not shared between users.
+
+Records are reloaded after the TTL, set with the environment variable EWXPWSDB_STATION_CACHE_SECONDS (default 300, 0
+turns off the cache of records).  Call station_registry.invalidate() after changing a station in the database.
+"""
+
+import copy, logging, os, threading, time
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import NoResultFound
+from sqlmodel import select
+
+from ewxpwsdb.db.database import Session
+from ewxpwsdb.db.models import WeatherStation
+from ewxpwsdb.weather_apis import API_CLASS_TYPES
+from ewxpwsdb.weather_apis.weather_api import WeatherAPI
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_STATION_CACHE_SECONDS_VAR = "EWXPWSDB_STATION_CACHE_SECONDS"
+DEFAULT_STATION_CACHE_SECONDS:float = 300.0
+
+
+def station_cache_seconds()->float:
+    """time to live of cached station records, from the environment or the default"""
+    value = os.environ.get(_STATION_CACHE_SECONDS_VAR, '').strip()
+    if not value:
+        return DEFAULT_STATION_CACHE_SECONDS
+
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"environment variable {_STATION_CACHE_SECONDS_VAR} must be a number of seconds, got {value}")
+
+
+class StationRegistry:
+    """cache of WeatherStation records by station code and id, and of WeatherAPI objects by station config.
+    Safe to use from several threads.  The WeatherStation records returned are shared, so don't modify them."""
+
+    def __init__(self, ttl_seconds:float|None = None):
+        """
+        Args:
+            ttl_seconds (float | None, optional): seconds to keep a station record before reading it from the database
+                again. Defaults to None for station_cache_seconds().
+        """
+        self.ttl_seconds = station_cache_seconds() if ttl_seconds is None else ttl_seconds
+        # (engine, 'code' or 'id', value) -> (station record, time it expires)
+        self._stations:dict[tuple, tuple[WeatherStation, float]] = {}
+        # (station id, station type, api config) -> weather api that is copied for each user
+        self._weather_apis:dict[tuple, WeatherAPI] = {}
+        self._lock = threading.Lock()
+
+
+    def _cached_station(self, key:tuple)->WeatherStation|None:
+        with self._lock:
+            cached = self._stations.get(key)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+        return None
+
+
+    def _add_station(self, engine:Engine, station:WeatherStation)->None:
+        if self.ttl_seconds <= 0:
+            return
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._stations[(engine, 'code', station.station_code)] = (station, expires)
+            self._stations[(engine, 'id', station.id)] = (station, expires)
+
+
+    def station_by_code(self, station_code:str, engine:Engine)->WeatherStation:
+        """station record for a station code, from the cache or the database
+
+        Raises:
+            NoResultFound: if there is no station with that code
+        """
+        station = self._cached_station((engine, 'code', station_code))
+        if station is None:
+            with Session(engine) as session:
+                station = session.exec(select(WeatherStation).where(WeatherStation.station_code == station_code)).one()
+            self._add_station(engine, station)
+        return station
+
+
+    def station_by_id(self, station_id:int, engine:Engine)->WeatherStation:
+        """station record for a station database id, from the cache or the database
+
+        Raises:
+            NoResultFound: if there is no station with that id
+        """
+        station = self._cached_station((engine, 'id', station_id))
+        if station is None:
+            with Session(engine) as session:
+                station = session.get(WeatherStation, station_id)
+            if station is None:
+                raise NoResultFound(f"No station found with ID {station_id}")
+            self._add_station(engine, station)
+        return station
+
+
+    def weather_api(self, station:WeatherStation)->WeatherAPI:
+        """a weather api object for the station.  The api config of each station is parsed once, and each call returns
+        a new copy of that weather api, for this station record
+
+        Args:
+            station (WeatherStation): station record, from the registry or not
+
+        Returns:
+            WeatherAPI: the subclass of WeatherAPI for the station type
+        """
+        # the config is in the key, so a station whose config has changed gets a new weather api
+        key = (station.id, station.station_type, station.api_config)
+        with self._lock:
+            template = self._weather_apis.get(key)
+
+        if template is None:
+            template = API_CLASS_TYPES[station.station_type](station)
+            with self._lock:
+                self._weather_apis[key] = template
+
+        weather_api = copy.copy(template)
+        weather_api.weather_station = station
+        return weather_api
+
+
+    def invalidate(self, station_code:str|None = None, station_id:int|None = None)->None:
+        """forget cached records and weather apis, for one station by code or id, or all stations if neither is given"""
+        with self._lock:
+            if station_code is None and station_id is None:
+                self._stations.clear()
+                self._weather_apis.clear()
+                return
+
+            stations = [station for station, _ in self._stations.values()
+                        if station.station_code == station_code or station.id == station_id]
+            ids = {station.id for station in stations} | {station_id}
+            codes = {station.station_code for station in stations} | {station_code}
+            self._stations = {key: value for key, value in self._stations.items()
+                              if not (key[1] == 'code' and key[2] in codes) and not (key[1] == 'id' and key[2] in ids)}
+            self._weather_apis = {key: value for key, value in self._weather_apis.items() if key[0] not in ids}
+
+
+# registry shared by everything in this process
+station_registry = StationRegistry()
@@ -2,6 +2,7 @@
 
 import logging
 from datetime import datetime, timedelta, date, UTC, time, tzinfo, timezone 
+from typing import Iterable
 
 from dateutil import tz
 from dateutil.parser import parse # type: ignore
@@ -216,7 +217,7 @@ class UTCInterval(BaseModel):
         return( cls(start = s, end = e))
     
     @classmethod
-    def previous_interval(cls, dtm = datetime.now(timezone.utc), delta_mins:int=14):
+    def previous_interval(cls, dtm:datetime|None = None, delta_mins:int=14):
         """ returns  that is on the quarter hour and inclusive. 
         input datetime object with timezone , e.g. 03:10:15+00
         output: tuple of two datetime objects, e.g (02:45:00, 03:00:00)
@@ -227,6 +228,10 @@ class UTCInterval(BaseModel):
         set arbitrary delta (15 minutes, 14 minutes, 30 minutes, etc)
         
         """
+        # default is evaluated at call time, not import time, so this is current in long running processes
+        if dtm is None:
+            dtm = datetime.now(timezone.utc)
+
         # starter time - 
         if not is_utc(dtm):
             raise ValueError("input dtm must be a timezone aware value in UTC")
@@ -241,7 +246,7 @@ class UTCInterval(BaseModel):
         return cls(start = start_datetime_utc, end = end_datetime_utc )
         
     @classmethod
-    def one_day_interval(cls, d:date = datetime.now(timezone.utc).date() ):
+    def one_day_interval(cls, d:date|None = None):
         """Create a time interval for the date in question, in UTC
 
         Args:
@@ -251,6 +256,9 @@ class UTCInterval(BaseModel):
             UTCInterval: interval for the date, starting 00:00 to  21:59 unless the date is today, when it ends at the more recent 15 minute mark 
         """
 
+        if d is None:
+            d = today_utc()
+
         if not isinstance(d,date):
             raise ValueError("value sent was not a date object")
         
@@ -362,17 +370,21 @@ class DateInterval(BaseModel):
                            )
 
 
-def fifteen_minute_mark(dtm:datetime=datetime.now(timezone.utc))->datetime:
+def fifteen_minute_mark(dtm:datetime|None = None)->datetime:
     """return the nearest previous 15 minute mark.  e.g. 10:49 -> 10:45, preserves timezone if any. 
     parameter dtm = optional datetime, default is 'now' using utc timezone """
+    if dtm is None:
+        dtm = datetime.now(timezone.utc)
     dtm -= timedelta(minutes=dtm.minute % 15,
                      seconds=dtm.second,
                      microseconds=dtm.microsecond)
     return(dtm)
 
-def fifteen_minute_mark_utc(dtm:datetime=datetime.now(timezone.utc))->datetime:
+def fifteen_minute_mark_utc(dtm:datetime|None = None)->datetime:
     """return the nearest previous 15 minute mark.  e.g. 10:49 -> 10:45, preserves timezone if any. 
     parameter dtm = optional datetime, default is 'now' using utc timezone """
+    if dtm is None:
+        dtm = datetime.now(timezone.utc)
 
     if not is_utc(dtm):
         raise ValueError("dtm must have timezone set to UTC")
@@ -382,7 +394,7 @@ def fifteen_minute_mark_utc(dtm:datetime=datetime.now(timezone.utc))->datetime:
                      microseconds=dtm.microsecond)
     return(dtm)
 
-def previous_fifteen_minute_period(dtm:datetime=datetime.now(timezone.utc))->tuple[datetime, datetime]:
+def previous_fifteen_minute_period(dtm:datetime|None = None)->tuple[datetime, datetime]:
     """ returns tuple of start/end times that is on the quarter hour and inclusive. 
     input datetime object with timezone , e.g. 03:10:15+00
     output: tuple of two datetime objects, e.g (02:45:00, 03:00:00)
@@ -396,7 +408,7 @@ def previous_fifteen_minute_period(dtm:datetime=datetime.now(timezone.utc))->tup
     return((start_datetime, end_datetime))
 
 
-def previous_fourteen_minute_period( dtm:datetime = datetime.now(timezone.utc) )->tuple[datetime, datetime]:
+def previous_fourteen_minute_period(dtm:datetime|None = None)->tuple[datetime, datetime]:
     """ returns tuple of start/end times that is on the quarter hour and not inclusive.   
     input datetime object with timezone , e.g. 03:10:15+00
     output: tuple of two datetime objects, e.g (02:46:00, 03:00:00)
@@ -428,7 +440,7 @@ def one_day_interval_utc(local_date, local_timezone)-> UTCInterval:
     )
         
     
-def one_day_interval(d:date = datetime.now(timezone.utc).date() )->UTCInterval:
+def one_day_interval(d:date|None = None)->UTCInterval:
     """Create a time interval for the date in question, in UTC
 
     Args:
@@ -438,6 +450,9 @@ def one_day_interval(d:date = datetime.now(timezone.utc).date() )->UTCInterval:
         UTCInterval: interval for the date, starting 00:00 to  21:59 unless the date is today, when it ends at the more recent 15 minute mark 
     """
 
+    if d is None:
+        d = today_utc()
+
     if not isinstance(d,date):
         raise ValueError("value sent was not a date object")
     
@@ -463,7 +478,7 @@ def tomorrow_utc()->datetime:
     return datetime.now(UTC)+ timedelta(days=1)
 
 
-def previous_fourteen_minute_interval(dtm:datetime=datetime.now(timezone.utc))->UTCInterval:
+def previous_fourteen_minute_interval(dtm:datetime|None = None)->UTCInterval:
     """ convenience method for using previous interval above for 14 intervals, 
     which are non-overlapping ranges of an hour
     00:00 - 00:14, 00:15 - 00:29, 00:30 - 00:44, 00:45 - 00:59
@@ -472,6 +487,125 @@ def previous_fourteen_minute_interval(dtm:datetime=datetime.now(timezone.utc))->
     return(dti)
 
 
+def _missing_tick_runs(offsets:list[int], step_seconds:int, n_ticks:int)->list[tuple[int, int]]:
+    """first and last index of each run of clock ticks in range(n_ticks) with no reading
+
+    Args:
+        offsets (list[int]): sorted seconds from the first tick to each reading
+        step_seconds (int): seconds between ticks
+        n_ticks (int): number of ticks
+    """
+    runs = []
+    previous = -1
+    for offset in offsets:
+        index = offset // step_seconds
+        if offset % step_seconds or index < 0 or index >= n_ticks:
+            continue
+        if index > previous + 1:
+            runs.append((previous + 1, index - 1))
+        previous = max(previous, index)
+    if previous < n_ticks - 1:
+        runs.append((previous + 1, n_ticks - 1))
+    return runs
+
+
+def sampling_grid_start(dtm:datetime, sampling_interval:int)->datetime:
+    """the first reading time on or after dtm, for a station reading every sampling interval on the clock, 
+    e.g. 23:57:13 -> 00:00 for 5 or 15 minute intervals.  The clock counts from midnight UTC, preserves timezone. 
+
+    Args:
+        dtm (datetime): timezone-aware datetime, e.g. the start of a time span that is 90 days before 'now'
+        sampling_interval (int): minutes between readings of the station
+
+    Returns:
+        datetime: dtm if it's already on the clock, otherwise the next tick
+    """
+    step_seconds = sampling_interval * 60
+    past_tick = (dtm - datetime(1970, 1, 1, tzinfo = UTC)) % timedelta(seconds = step_seconds)
+    if not past_tick:
+        return dtm
+    return dtm - past_tick + timedelta(seconds = step_seconds)
+
+
+def missing_intervals(timestamps:Iterable[datetime], interval:UTCInterval, sampling_interval:int)->list[UTCInterval]:
+    """find the gaps in a station's readings, given the reading times.  Readings are expected at every sampling interval
+    on the clock (see sampling_grid_start) from the start of the interval up to the end, and readings at other times are ignored.
+
+    Args:
+        timestamps (Iterable[datetime]): timezone-aware data_datetime of the readings, sorted
+        interval (UTCInterval): time span to look for gaps
+        sampling_interval (int): minutes between readings of the station
+
+    Returns:
+        list[UTCInterval]: first and last missing reading time of each gap, in time order.  A single missing reading has start = end
+    """
+    step_seconds = sampling_interval * 60
+    # an interval that starts between readings, e.g. 'now' minus 90 days, would otherwise put no stored reading on a tick
+    first_tick = sampling_grid_start(interval.start, sampling_interval)
+    if first_tick > interval.end:
+        return []
+    start_seconds = int(first_tick.timestamp())
+    n_ticks = int(interval.end.timestamp() - start_seconds) // step_seconds + 1
+
+    offsets = [int(timestamp.timestamp()) - start_seconds for timestamp in timestamps]
+
+    step = timedelta(seconds = step_seconds)
+    return [UTCInterval(start = first_tick + first * step, end = first_tick + last * step) 
+            for first, last in _missing_tick_runs(offsets, step_seconds, n_ticks)]
+
+
+def plan_gap_requests(gaps:list[UTCInterval], sampling_interval:int, max_window:timedelta, request_cost_readings:int)->list[UTCInterval]:
+    """merge intervals of missing readings into the fewest intervals to request from a vendor API.  Two gaps are requested 
+    together when the readings already stored between them cost less to download again than one more request, and the
+    merged interval fits in the vendor's window.  Gaps longer than the window are split.
+
+    The gap intervals include both ends (as returned by StationReadings.missing_summary) and many APIs do not include 
+    the end time in a response, so the end of each planned interval is one sampling interval after the last missing reading.
+
+    Args:
+        gaps (list[UTCInterval]): intervals of missing readings, first and last missing timestamps, in any order
+        sampling_interval (int): minutes between readings of the station
+        max_window (timedelta): longest interval to request at once, e.g. WeatherAPI._max_request_window
+        request_cost_readings (int): number of already stored readings worth downloading again to save one request.  0 only merges gaps that touch
+
+    Returns:
+        list[UTCInterval]: intervals to request, in time order
+    """
+    step = timedelta(minutes = sampling_interval)
+    if max_window <= step:
+        raise ValueError(f"request window {max_window} must be longer than the sampling interval of {sampling_interval} minutes")
+
+    # readings between the end of one gap and the start of the next are already stored
+    max_join = step * (request_cost_readings + 1)
+    # last missing timestamp that fits in one request starting at a given time, leaving room for the end padding
+    max_span = max_window - step
+
+    planned:list[UTCInterval] = []
+    current:UTCInterval|None = None
+    for gap in sorted(gaps, key = lambda interval: interval.start):
+        if current and gap.start - current.end <= max_join and gap.end - current.start <= max_span:
+            current.end = max(current.end, gap.end)
+            continue
+
+        if current:
+            planned.append(current)
+        
+        # split gaps that don't fit in one request
+        start = gap.start
+        while gap.end - start > max_span:
+            planned.append(UTCInterval(start = start, end = start + max_span))
+            start = start + max_span + step
+        current = UTCInterval(start = start, end = max(start, gap.end))
+
+    if current:
+        planned.append(current)
+
+    for interval in planned:
+        interval.end = interval.end + step
+
+    return planned
+
+
 def parse_and_validate(dt:str)->datetime:
     """given a timestamp string, attempt to parse and ensure it has a timezone
 
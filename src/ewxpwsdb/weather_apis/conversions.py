@@ -0,0 +1,73 @@
+"""
+unit conversions applied to a whole column of sensor values at once, for columnar transforms (currently ZentraAPI._transform).
+
+These give the same values as the per-value conversion methods of WeatherAPI (f_to_c, mph_to_ms, etc.),
+including None for any value that is not a number, but look up the conversion once per sensor rather 
+than once per value.  See scripts/benchmark_transforms.py for timings.
+"""
+
+import logging
+from typing import Any, Sequence
+
+# Initialize the logger
+logger = logging.getLogger(__name__)
+
+Column = list[float|None]
+
+
+def _is_number(value:Any)->bool:
+    return isinstance(value, (int, float))
+
+
+def linear(values:Sequence[Any], scale:float, offset:float = 0.0)->Column:
+    """(value + offset) * scale for each value
+
+    Args:
+        values (Sequence[Any]): sensor values, any non-numeric value (e.g. None) is converted to None
+        scale (float): multiplier
+        offset (float, optional): added to the value before scaling. Defaults to 0.0.
+
+    Returns:
+        list[float|None]: converted values in the same order
+    """
+    if offset:
+        return [(v + offset) * scale if _is_number(v) else None for v in values]
+    return [v * scale if _is_number(v) else None for v in values]
+
+
+def identity(values:Sequence[Any])->list[Any]:
+    """values unchanged, for sensors that are already in the units we store"""
+    return list(values)
+
+
+def f_to_c(values:Sequence[Any])->Column:
+    """Fahrenheit to Celsius, see WeatherAPI.f_to_c()"""
+    return linear(values, scale = 5.0 / 9.0, offset = -32.0)
+
+
+def mph_to_ms(values:Sequence[Any])->Column:
+    """miles per hour to meters per second, see WeatherAPI.mph_to_ms()"""
+    return linear(values, scale = 0.44704)
+
+
+def kph_to_ms(values:Sequence[Any])->Column:
+    """kilometers per hour to meters per second rounded to 2 places, see WeatherAPI.kph_to_ms()"""
+    return [None if v is None else round(v, 2) for v in linear(values, scale = 1000.0 / (60*60))]
+
+
+def in_to_mm(values:Sequence[Any])->Column:
+    """inches to millimeters, see WeatherAPI.in_to_mm()"""
+    return linear(values, scale = 25.5)
+
+
+def wet_or_dry(values:Sequence[Any], threshold:float)->list[int|None]:
+    """leaf wetness sensor values to the EWX standard of 1 = wet, 0 = not wet
+
+    Args:
+        values (Sequence[Any]): wetness sensor values, any non-numeric value is converted to None
+        threshold (float): value at or above which the leaf is wet
+
+    Returns:
+        list[int|None]: 1 or 0 for each value
+    """
+    return [None if not _is_number(v) else (1 if v >= threshold else 0) for v in values]
@@ -58,7 +58,7 @@ The list of variables available from Davis are (not in sensor order):
 
 import hashlib, hmac
 import json
-from requests import Session, Request
+from requests import Request
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 import logging
@@ -85,17 +85,24 @@ class DavisAPI(WeatherAPI):
     APIConfigClass: type[DavisAPIConfig] = DavisAPIConfig
     _station_type = 'DAVIS'
     _sampling_interval = interval_min = 5
+    base_url = 'https://api.weatherlink.com/v2'
+    # daily chunks of a window are requested concurrently, see _get_readings
+    _max_request_window = timedelta(days = 7)
+    # WeatherLink v2 allows 10 calls per second per API key
+    _rate_limit = (10, 1.0)
     supported_variables = ['atmp', 'atmp_min', 'atmp_max', 'dwpt', 'lws', 'pcpn', 'relh', 'srad', 'smst', 'stmp','wdir', 'wspd', 'wspd_max']
     lws_threshold = 0.5
     # this is a Davis-only value to make it obvious which of the several wetness variables we are using for LWS threshold
     lws_variable = 'wetness_hi'
     
     def __init__(self, weather_station:WeatherStation):
-        self.apisig  = ""
         super().__init__(weather_station)
         # cast api config to correct type for static type checking
         self.api_config: DavisAPIConfig = self.api_config
         logger.debug("Initialized DavisAPI for station %s", weather_station.station_code)
+
+    def _rate_limit_credential(self)->str:
+        return self.api_config.apikey
  
         
 
@@ -130,45 +137,53 @@ class DavisAPI(WeatherAPI):
         Builds, sends, and stores raw response from Davis API
         The Davis stations will only collect data for at most 24 hrs. 
         If a multi-day request is made, would have to return a list of responses for each daily request
-        So this _always_ returns a list of responses
+        So this _always_ returns a list of responses, in the same order as the daily chunks.  
+        Chunks are requested concurrently and chunks that fail are retried, see WeatherAPI._fetch_intervals_concurrently
         """
         tsplits = self.get_intervals(start_datetime=start_datetime, end_datetime=end_datetime)
+        return self._fetch_intervals_concurrently(tsplits, self._get_chunk)
+
+    def _get_chunk(self, start_datetime:datetime, end_datetime:datetime)->Response:
+        """request one chunk of at most 24 hours from the historic endpoint, signed for the time of the request
+
+        Args:
+            start_datetime (datetime): start of the chunk, timezone aware 
+            end_datetime (datetime): end of the chunk, timezone aware
+
+        Raises:
+            HTTPError: if the response was not successful, so that the chunk can be retried if the error is transient
+
+        Returns:
+            Response: response from the API
+        """
+        # wait for a request slot before computing the signature, which includes the current time
+        self._wait_for_rate_limit()
+        now = self.dt_local_from_utc(datetime.now(timezone.utc))
+        now_timestamp_integer = int(now.timestamp())
+
+        start_timestamp=int(start_datetime.timestamp())
+        end_timestamp=int(end_datetime.timestamp())
+
+        apisig = self._compute_signature(timestamp_integer=now_timestamp_integer, start_timestamp=start_timestamp, end_timestamp=end_timestamp)
+        api_request = Request('GET',
+                                url=f"{self.base_url}/historic/{self.api_config.sn}",
+                                params={'api-key': self.api_config.apikey,
+                                        't': now_timestamp_integer,
+                                        'start-timestamp': start_timestamp,
+                                        'end-timestamp': end_timestamp,
+                                        'api-signature': apisig}).prepare()
         
-        response_list = []
-        for tsplit in tsplits:
-            start_datetime = tsplit[0]
-            end_datetime = tsplit[1]
-            now = self.dt_local_from_utc(datetime.now(timezone.utc))
-            now_timestamp_integer = int(now.timestamp())
-
-            start_timestamp=int(start_datetime.timestamp())
-            end_timestamp=int(end_datetime.timestamp())
-
-
-            apisig = self._compute_signature(timestamp_integer=now_timestamp_integer, start_timestamp=start_timestamp, end_timestamp=end_timestamp)
-            self.current_api_request = Request('GET',
-                                               url='https://api.weatherlink.com/v2/historic/' + self.api_config.sn,
-                                               params={'api-key': self.api_config.apikey,
-                                                       't': now_timestamp_integer,
-                                                       'start-timestamp': start_timestamp,
-                                                       'end-timestamp': end_timestamp,
-                                                       'api-signature': apisig}).prepare()
-            try:
-                response = Session().send(self.current_api_request)
-                response.raise_for_status()
-                response_list.append(response)
-                logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
-            except Exception as e:
-                logger.error("Failed to retrieve data for interval %s - %s: %s", start_datetime, end_datetime, e)
-                continue
-
-        return response_list
+        response = self._http_session.send(api_request)
+        response.raise_for_status()
+        logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
+        return response
 
     def _compute_signature(self, timestamp_integer:int, start_timestamp:int, end_timestamp:int) -> str:
         """
         This method computes the API signature used to call the Davis API historic endpoint.
         NOTE: datetimes should be in unix timestamp format already
         More info on this process can be found at https://weatherlink.github.io/v2-api/api-signature-calculator
+        The signature is returned rather than stored on this object since chunks are requested concurrently.
         """
 
         msg = "api-key{}end-timestamp{}start-timestamp{}station-id{}t{}".format(self.api_config.apikey,
@@ -177,13 +192,13 @@ class DavisAPI(WeatherAPI):
                                                                                 self.api_config.sn,
                                                                                 timestamp_integer)
         
-        self.apisig = hmac.new(
+        apisig = hmac.new(
             self.api_config.apisec.encode('utf-8'),
             msg.encode('utf-8'),
             hashlib.sha256).hexdigest()
         
-        logger.debug("Computed API signature: %s", self.apisig)
-        return self.apisig
+        logger.debug("Computed API signature: %s", apisig)
+        return apisig
 
     def _data_present_in_response(self, response_data:dict)->bool:
         """check for presence of data in response
@@ -0,0 +1,109 @@
+"""
+small JSON values from vendor APIs kept in local files, so they can be shared by every process on a machine and
+survive restarts, e.g. the variable list of a Locomos (Ubidots) device.
+
+Files are in the directory set with the environment variable EWXPWS_CACHE_DIR, or ~/.cache/ewxpwsdb by default.
+Each value is written to a temporary file and moved into place with os.replace(), so a process never reads a partly
+written file.  The cache is only an optimization:  if the directory can't be written, values are not cached and a
+warning is logged.
+"""
+
+import hashlib, json, logging, os, tempfile, time
+from pathlib import Path
+from typing import Any
+
+# Initialize the logger
+logger = logging.getLogger(__name__)
+
+_CACHE_DIR_VAR = "EWXPWS_CACHE_DIR"
+
+
+def cache_dir()->Path:
+    """directory for cache files, from EWXPWS_CACHE_DIR or the user's cache directory"""
+    configured = os.environ.get(_CACHE_DIR_VAR, '').strip()
+    if configured:
+        return Path(configured).expanduser()
+
+    user_cache = os.environ.get('XDG_CACHE_HOME', '').strip() or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(user_cache) / 'ewxpwsdb'
+
+
+class FileCache:
+    """JSON values by key in one sub-directory of the cache directory, each kept for ttl_seconds
+
+    example
+        cache = FileCache('locomos_variables', ttl_seconds = 24*60*60)
+        cache.set(device_id, variables)
+        variables = cache.get(device_id)  # None if missing or expired
+    """
+
+    def __init__(self, namespace:str, ttl_seconds:float, directory:str|Path|None = None, file_mode:int = 0o644, directory_mode:int = 0o755):
+        """
+        Args:
+            namespace (str): name of the sub-directory for this kind of value
+            ttl_seconds (float): seconds a value is used after it's saved
+            directory (str | Path | None, optional): cache directory. Defaults to None for cache_dir().
+            file_mode (int, optional): permissions of the cache files, e.g. 0o600 for secrets. Defaults to 0o644.
+            directory_mode (int, optional): permissions of the namespace sub-directory when it's created. Defaults to 0o755.
+        """
+        self.directory = Path(directory or cache_dir()) / namespace
+        self.ttl_seconds = ttl_seconds
+        self.file_mode = file_mode
+        self.directory_mode = directory_mode
+
+
+    def _path(self, key:str)->Path:
+        # keys may have characters that aren't allowed in file names, or identify accounts, so the file name is a hash
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+
+    def get(self, key:str)->Any|None:
+        """the value saved for key, or None if there is none, it has expired or the file can't be read"""
+        try:
+            cached = json.loads(self._path(key).read_text())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"could not read cache file for {self.directory.name}: {e}")
+            return None
+
+        if not isinstance(cached, dict) or time.time() - cached.get('saved', 0) > self.ttl_seconds:
+            return None
+
+        return cached.get('value')
+
+
+    def set(self, key:str, value:Any)->bool:
+        """save a value for key, replacing any saved before
+
+        Returns:
+            bool: True if the value was saved
+        """
+        path = self._path(key)
+        try:
+            self.directory.parent.mkdir(parents = True, exist_ok = True)
+            self.directory.mkdir(mode = self.directory_mode, exist_ok = True)
+            fd, temp_path = tempfile.mkstemp(dir = self.directory, prefix = '.', suffix = '.tmp')
+            try:
+                os.chmod(temp_path, self.file_mode)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'saved': time.time(), 'value': value}, f)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"could not write cache file for {self.directory.name} in {self.directory}: {e}")
+            return False
+
+        return True
+
+
+    def delete(self, key:str)->None:
+        """remove the value saved for key, if any"""
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"could not remove cache file for {self.directory.name}: {e}")
@@ -0,0 +1,200 @@
+"""
+shared keep-alive HTTP sessions for the vendor weather APIs.
+
+One connection pool (HTTPAdapter) is kept per vendor base url for the life of the process so that
+repeated requests (e.g. daily chunks for Davis, pages for Zentra, or many stations of the same type
+in a fleet catch-up) re-use pooled connections rather than making a new TCP/TLS connection each time.
+Each thread has its own requests.Session mounting that shared adapter, as a Session is not documented as
+thread-safe, and the sessions don't keep cookies, so cookies from one station's account are never sent with
+another station's requests.  Credentials are sent explicitly by each WeatherAPI subclass.
+
+For asyncio collection (WeatherAPI.aget_readings), get_async_client() keeps one httpx.AsyncClient per vendor base url
+for each event loop, with the same pool size, keep-alive, timeout and cookie settings.  Call aclose_async_clients()
+before the event loop finishes.  Responses from it are converted with requests_response() so that the rest of the 
+package only handles requests.Response objects.
+
+Pool size, keep-alive and timeout are set from environment variables:
+
+- EWXPWS_HTTP_POOL_CONNECTIONS : number of hosts to keep pools for, per session (default 10)
+- EWXPWS_HTTP_POOL_MAXSIZE : max connections kept open per host (default 32)
+- EWXPWS_HTTP_KEEP_ALIVE : set to 'false' to close connections after each request (default true)
+- EWXPWS_HTTP_TIMEOUT : seconds to wait to connect or for a response, when the caller does not set a timeout (default 60)
+"""
+
+import os, logging, threading, asyncio, weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import httpx
+from requests import Session, Request, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Initialize the logger
+logger = logging.getLogger(__name__)
+
+POOL_CONNECTIONS:int = int(os.environ.get('EWXPWS_HTTP_POOL_CONNECTIONS', 10))
+POOL_MAXSIZE:int = int(os.environ.get('EWXPWS_HTTP_POOL_MAXSIZE', 32))
+KEEP_ALIVE:bool = os.environ.get('EWXPWS_HTTP_KEEP_ALIVE', 'true').lower() not in ('false', '0', 'no')
+TIMEOUT:float = float(os.environ.get('EWXPWS_HTTP_TIMEOUT', 60))
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request sent through it,
+    including prepared requests sent with Session.send()"""
+
+    def __init__(self, *args, timeout:float|None = None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+_adapters:dict[str, TimeoutHTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+# sessions of each thread, base url -> (adapter, session)
+_thread_sessions = threading.local()
+# async clients of each event loop, base url -> client
+_async_clients:weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = weakref.WeakKeyDictionary()
+
+
+def new_adapter(pool_connections:int = POOL_CONNECTIONS, pool_maxsize:int = POOL_MAXSIZE, timeout:float|None = TIMEOUT)->TimeoutHTTPAdapter:
+    """create an adapter with a connection pool and default timeout, which can be mounted in sessions of several threads
+
+    Args:
+        pool_connections (int, optional): number of host pools to cache. Defaults to EWXPWS_HTTP_POOL_CONNECTIONS
+        pool_maxsize (int, optional): max connections to save in each pool. Defaults to EWXPWS_HTTP_POOL_MAXSIZE
+        timeout (float, optional): default timeout in seconds. Defaults to EWXPWS_HTTP_TIMEOUT
+
+    Returns:
+        TimeoutHTTPAdapter: adapter
+    """
+    return TimeoutHTTPAdapter(pool_connections = pool_connections, pool_maxsize = pool_maxsize, timeout = timeout)
+
+
+def new_session(adapter:HTTPAdapter|None = None, keep_alive:bool = KEEP_ALIVE)->Session:
+    """create a requests Session that sends requests through the adapter and does not keep cookies
+
+    Args:
+        adapter (HTTPAdapter, optional): adapter to mount for http and https. Defaults to a new adapter from new_adapter()
+        keep_alive (bool, optional): if False, ask the server to close the connection after each response. Defaults to EWXPWS_HTTP_KEEP_ALIVE
+
+    Returns:
+        Session: requests session
+    """
+    session = Session()
+    # an empty list of allowed domains rejects every cookie
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains = []))
+    adapter = adapter or new_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def get_adapter(base_url:str)->TimeoutHTTPAdapter:
+    """get the shared adapter (connection pool) for a vendor API, creating it on first use
+
+    Args:
+        base_url (str): root url of the vendor API, see WeatherAPI.base_url
+
+    Returns:
+        TimeoutHTTPAdapter: adapter shared by all threads in this process for that base url
+    """
+    with _adapters_lock:
+        adapter = _adapters.get(base_url)
+        if adapter is None:
+            logger.debug(f"creating http connection pool for {base_url}")
+            adapter = new_adapter()
+            _adapters[base_url] = adapter
+    return adapter
+
+
+def get_session(base_url:str)->Session:
+    """get this thread's session for a vendor API, which uses the connection pool shared by all threads
+
+    Args:
+        base_url (str): root url of the vendor API, see WeatherAPI.base_url
+
+    Returns:
+        Session: session for requests from this thread to that base url
+    """
+    adapter = get_adapter(base_url)
+    sessions:dict[str, tuple[TimeoutHTTPAdapter, Session]] = _thread_sessions.__dict__.setdefault('sessions', {})
+    session_adapter, session = sessions.get(base_url, (None, None))
+    # a session made before close_sessions() has a closed adapter
+    if session is None or session_adapter is not adapter:
+        session = new_session(adapter)
+        sessions[base_url] = (adapter, session)
+    return session
+
+
+def close_sessions():
+    """close all shared connection pools.  Sessions from earlier get_session() calls get a new pool on their next call"""
+    with _adapters_lock:
+        for adapter in _adapters.values():
+            adapter.close()
+        _adapters.clear()
+
+
+def new_async_client(pool_maxsize:int = POOL_MAXSIZE, keep_alive:bool = KEEP_ALIVE, timeout:float|None = TIMEOUT)->httpx.AsyncClient:
+    """create an httpx async client with a connection pool and default timeout, that does not keep cookies
+
+    Args:
+        pool_maxsize (int, optional): max connections open at once. Defaults to EWXPWS_HTTP_POOL_MAXSIZE
+        keep_alive (bool, optional): if False, close connections after each response. Defaults to EWXPWS_HTTP_KEEP_ALIVE
+        timeout (float, optional): default timeout in seconds. Defaults to EWXPWS_HTTP_TIMEOUT
+
+    Returns:
+        httpx.AsyncClient: client
+    """
+    limits = httpx.Limits(max_connections = pool_maxsize, max_keepalive_connections = pool_maxsize if keep_alive else 0)
+    return httpx.AsyncClient(limits = limits, timeout = timeout, 
+                             cookies = CookieJar(policy = DefaultCookiePolicy(allowed_domains = [])))
+
+
+def get_async_client(base_url:str)->httpx.AsyncClient:
+    """get the async client for a vendor API shared by all tasks in the running event loop, creating it on first use
+
+    Args:
+        base_url (str): root url of the vendor API, see WeatherAPI.base_url
+
+    Returns:
+        httpx.AsyncClient: client for requests from this event loop to that base url
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(base_url)
+    if client is None or client.is_closed:
+        logger.debug(f"creating async http client for {base_url}")
+        client = new_async_client()
+        clients[base_url] = client
+    return client
+
+
+async def aclose_async_clients():
+    """close the async clients of the running event loop"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def requests_response(response:httpx.Response)->Response:
+    """copy an httpx response into a requests Response, for code that stores or transforms vendor responses
+
+    Args:
+        response (httpx.Response): response that has been read, e.g. from AsyncClient.get()
+
+    Returns:
+        Response: requests response with the same status, headers, body and request url
+    """
+    converted = Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.encoding = response.encoding
+    converted._content = response.content
+    converted.url = str(response.url)
+    converted.request = Request(method = response.request.method, url = str(response.request.url)).prepare()
+    return converted
@@ -0,0 +1,73 @@
+"""
+incremental parsing of large JSON API responses.
+
+Some vendor responses are tens of megabytes (e.g. a month of Licor data is ~90,000 sensor records), and
+json.loads() builds every record of the document at once before any can be transformed.  The functions here
+decode the items of one array in the response one at a time with the standard library decoder, so only the
+item being transformed is held as python objects.
+
+The response text itself is still held in full: it is stored compressed and decompressed to one string before
+it's parsed, so memory grows with the size of the payload, but by far less than the decoded document.
+"""
+
+import json, re
+from typing import Any, Iterator
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'[ \t\n\r]*')
+
+
+def _skip_whitespace(text:str, idx:int)->int:
+    return _whitespace.match(text, idx).end() # type: ignore
+
+
+def _expect(text:str, idx:int, char:str)->int:
+    """check for char at idx, returning the index of the next non-whitespace character after it"""
+    if text[idx:idx+1] != char:
+        raise json.JSONDecodeError(f"Expecting '{char}'", text, idx)
+    return _skip_whitespace(text, idx + 1)
+
+
+def iter_json_array_items(text:str, key:str)->Iterator[Any]:
+    """yield the items of the array stored under `key` of the top level JSON object in text, one at a time,
+    without decoding the rest of the array.   Other top level values that come before the key are decoded
+    and discarded, values after the array are not read.
+
+    Args:
+        text (str): JSON document, must be an object at the top level
+        key (str): name of a top level key whose value is an array
+
+    Raises:
+        json.JSONDecodeError: if the text is not a JSON object, or is malformed before the end of the array
+
+    Yields:
+        Any: each item of the array, as json.loads() would decode it.  Nothing if the key is missing or is not an array
+    """
+    idx = _expect(text, _skip_whitespace(text, 0), '{')
+
+    while text[idx:idx+1] != '}':
+        name, idx = _decoder.raw_decode(text, idx)
+        idx = _expect(text, _skip_whitespace(text, idx), ':')
+
+        if name == key:
+            if text[idx:idx+1] != '[':
+                return
+
+            idx = _skip_whitespace(text, idx + 1)
+            while text[idx:idx+1] != ']':
+                item, idx = _decoder.raw_decode(text, idx)
+                yield item
+                idx = _skip_whitespace(text, idx)
+                if text[idx:idx+1] == ',':
+                    idx = _skip_whitespace(text, idx + 1)
+                elif text[idx:idx+1] != ']':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", text, idx)
+            return
+
+        # skip value for any other key
+        _, idx = _decoder.raw_decode(text, idx)
+        idx = _skip_whitespace(text, idx)
+        if text[idx:idx+1] == ',':
+            idx = _skip_whitespace(text, idx + 1)
+        elif text[idx:idx+1] != '}':
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, idx)
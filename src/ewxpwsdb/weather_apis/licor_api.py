@@ -23,22 +23,25 @@ This API returns a max of 100,000 records, each item in response counts.
 There are about 288 obs/readings per day for 5 mninute interval, approx 10 "records" 
 per reading for 31 day month estimate 89,280 and the API reported 88,891 records
 
-TODO: if the timedelta of start/end is > 31 days, break it up into chunks like 
-Davis does.  
+Requests are split into chunks that stay under that limit, estimated from the 
+sampling interval and the number of sensors (see LicorAPI.get_intervals), and the 
+chunks are requested concurrently.
 
 """
 
 import json
-from requests import get, Response
+from requests import Response
 from requests.utils import quote
-from datetime import datetime, timezone, UTC
+from datetime import datetime, timedelta, timezone, UTC
 import logging
+from typing import Iterable, Iterator
 
 from pydantic import Field
 
 
 from . import STATION_TYPE
 from ewxpwsdb.weather_apis.weather_api import WeatherAPIConfig, WeatherAPI
+from ewxpwsdb.weather_apis.json_stream import iter_json_array_items
 from ewxpwsdb.db.models import WeatherStation
 
 
@@ -50,12 +53,27 @@ class LicorAPIConfig(WeatherAPIConfig):
     _station_type : STATION_TYPE  = 'LICOR'
     sn : str  = Field(description="The serial number of the device")
     api_token: str = Field(description="API key obtained from the portal")
+    sensor_count: int|None = Field(default = None, description="number of sensors (records per timestamp) on this logger, used to size requests. Defaults to LicorAPI._DEFAULT_RECORDS_PER_READING")
 
 class LicorAPI(WeatherAPI):
     APIConfigClass: type[LicorAPIConfig] = LicorAPIConfig
     _station_type: STATION_TYPE = 'LICOR'
     _sampling_interval = interval_min = 5
+    base_url = 'https://api.licor.cloud/v1'
+    # max records the API returns per request, each sensor value at each timestamp is one record
+    _MAX_RECORDS_PER_REQUEST:int = 100000
+    # about 10 records per reading (see notes above) if the station config does not list sensor_count
+    _DEFAULT_RECORDS_PER_READING:int = 10
+    # fraction of the max records to plan for in each chunk, to allow for extra records
+    _chunk_fill:float = 0.9
+    # long ranges are split into chunks under the record limit by _get_readings, so windows can be long
+    _max_request_window = timedelta(days = 90)
     _lws_threshold = 0.5
+    # the LI-COR Cloud API limits records per request (above) but does not publish a request limit, so chunk requests 
+    # are not throttled beyond _max_concurrent_requests.  A limit set here would be shared per api token
+    _rate_limit = None
+    # timestamps held back by _iter_transform for sensor records that arrive out of timestamp order
+    _timestamp_lookback:int = 16
     # supported_variables = ['atmp', 'dwpt', 'lws', 'pcpn', 'relh', 'srad', 'wdir', 'wspd', 'wspd_max']
     # lws sensor down since May 31, 2024.  removing completely from the variables here. 
     supported_variables = ['atmp', 'dwpt', 'pcpn', 'relh', 'srad', 'wdir', 'wspd', 'wspd_max']
@@ -72,14 +90,62 @@ class LicorAPI(WeatherAPI):
         # TODO implement 
         return(True)
             
+    @property
+    def records_per_reading(self)->int:
+        """number of records the API returns for each timestamp, one per sensor"""
+        return self.api_config.sensor_count or self._DEFAULT_RECORDS_PER_READING
+
+    @property
+    def max_chunk_duration(self)->timedelta:
+        """longest time span that can be requested without going over the record limit of the API"""
+        readings_per_chunk = int(self._MAX_RECORDS_PER_REQUEST * self._chunk_fill) // self.records_per_reading
+        return timedelta(minutes = max(1, readings_per_chunk) * self._sampling_interval)
+
+    def get_intervals(self, start_datetime:datetime, end_datetime:datetime)->list[tuple[datetime,datetime]]:
+        """split a time span into chunks of at most max_chunk_duration
+
+        Args:
+            start_datetime (datetime): start of the span, UTC
+            end_datetime (datetime): end of the span, UTC
+
+        Returns:
+            list[tuple[datetime,datetime]]: start, end of each chunk in time order
+        """
+        chunk = self.max_chunk_duration
+        splits = []
+        chunk_start = start_datetime
+        while chunk_start < end_datetime:
+            chunk_end = min(chunk_start + chunk, end_datetime)
+            splits.append((chunk_start, chunk_end))
+            chunk_start = chunk_end
+        logger.debug("Generated intervals: %s", splits)
+        return splits
+
+    def _rate_limit_credential(self)->str:
+        return self.api_config.api_token
+
     def _get_readings(self,start_datetime:datetime,end_datetime:datetime) ->list[Response] :
         """ use Licor API to pull data from this station for times between start and end.  Called by the parent 
-        class method get_readings().   
+        class method get_readings().   Spans that would return more records than the API allows are split
+        into chunks which are requested concurrently, see get_intervals().  Returns one response per chunk in time order
         
         parameters:
             start_datetime: datetime object in UTC timezone.  
             end_datetime: datetime object in UTC timezone.  
         """
+        tsplits = self.get_intervals(start_datetime, end_datetime)
+        return self._fetch_intervals_concurrently(tsplits, self._get_chunk)
+
+    def _get_chunk(self, start_datetime:datetime, end_datetime:datetime)->Response:
+        """request data for one chunk
+
+        parameters:
+            start_datetime: datetime object in UTC timezone.  
+            end_datetime: datetime object in UTC timezone.  
+
+        raises:
+            HTTPError if the response was not successful, so the chunk can be retried if the error is transient
+        """
  
         start_datetime_str = self._format_time(start_datetime)
         end_datetime_str = self._format_time(end_datetime)
@@ -93,21 +159,16 @@ class LicorAPI(WeatherAPI):
         # in the requests.get() params - have to build the URL with the query 
         # string params ourselves.  This is a limit of requests.get
         # unlike the predecessor API (Onset/hobolink), date times are UTC in and out
-        url_with_params = f"https://api.licor.cloud/v1/data?loggers={self.api_config.sn}&start_date_time={quote(start_datetime_str)}&end_date_time={quote(end_datetime_str)}"
-        try:
-            response = get( url=url_with_params,
-                            headers={'Authorization': "Bearer " + 
-                                     self.api_config.api_token},
-                            )
-            
-            response.raise_for_status()
-            
-        except Exception as e:
-            logger.error("Failed to retrieve data from %s API for interval %s - %s: %s", 
-                         self._station_type, start_datetime, end_datetime, e)
-            return []
-
-        return([response])    
+        self._wait_for_rate_limit()
+        url_with_params = f"{self.base_url}/data?loggers={self.api_config.sn}&start_date_time={quote(start_datetime_str)}&end_date_time={quote(end_datetime_str)}"
+        response = self._http_session.get( url=url_with_params,
+                        headers={'Authorization': "Bearer " + 
+                                    self.api_config.api_token},
+                        )
+        
+        response.raise_for_status()
+        logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
+        return response
     
     def _data_present_in_response(self, response_data:dict)->bool:
         """check for presence of data in response
@@ -165,18 +226,51 @@ class LicorAPI(WeatherAPI):
         if not self._data_present_in_response(response_data):
             return None
         
-        readings = {}
+        # the whole response is in memory already, so records for a timestamp are combined wherever they are in the list
+        transformed_readings = list(self._group_sensor_readings(response_data["data"], lookback = None))
+        return transformed_readings
     
-        for sensor_reading in response_data["data"]:
-            
-            ts = sensor_reading["timestamp"]  
-            
+    def _iter_transform(self, response_text:str|None)->Iterator[dict]:
+        """decode the flat list of sensor records one at a time and yield a reading once its timestamp is more than 
+        _timestamp_lookback timestamps old, see WeatherAPI._iter_transform().  The response text itself is still 
+        held in full (see json_stream.py), only the decoded records and readings are kept small."""
+        if not response_text:
+            return
+        
+        yield from self._group_sensor_readings(iter_json_array_items(response_text, 'data'), lookback = self._timestamp_lookback)
+
+    def _group_sensor_readings(self, sensor_readings:Iterable[dict], lookback:int|None)->Iterator[dict]:
+        """combine the per-sensor records of the 'data' list into one reading per timestamp.  The API lists records 
+        in timestamp order, so only the readings of the latest `lookback` timestamps are held to add records that 
+        arrive out of order.  A record for a timestamp that was already yielded is logged and skipped, so each 
+        timestamp is yielded once.
+
+        Args:
+            sensor_readings (Iterable[dict]): items of 'data' in the response
+            lookback (int | None): number of timestamps to hold before yielding the oldest, None to hold all of them
+
+        Yields:
+            dict: reading for one timestamp, in the order the timestamps first appear
+        """
+        readings:dict[str,dict] = {}
+        last_yielded:datetime|None = None
+
+        for sensor_reading in sensor_readings:
             # timestamp is actually UTC, not localtime, convert to UTC, but has no timezone info
             # ts = local_datetime_to_utc_datetime(local_datetime = ts, local_timezone = self.weather_station.timezone) 
-            
-            # Create new entry if time hasn't been encountered yet
-            if ts not in readings.keys():                
-                readings[ts] = {"data_datetime" : datetime.fromisoformat(ts) }
+            ts = sensor_reading["timestamp"]
+            if ts not in readings:
+                data_datetime = datetime.fromisoformat(ts)
+                if last_yielded is not None and data_datetime <= last_yielded:
+                    logger.warning(f"Licor sensor record for {ts} is more than {lookback} timestamps out of order and was skipped")
+                    continue
+
+                # Create new entry if time hasn't been encountered yet
+                readings[ts] = {"data_datetime" : data_datetime }
+                if lookback is not None and len(readings) > lookback:
+                    oldest = readings.pop(next(iter(readings)))
+                    last_yielded = oldest['data_datetime'] if last_yielded is None else max(last_yielded, oldest['data_datetime'])
+                    yield oldest
                         
             match sensor_reading["sensor_measurement_type"]:
                 case 'Dew Point':
@@ -198,9 +292,7 @@ class LicorAPI(WeatherAPI):
                 case 'Gust Speed':
                     readings[ts]['wspd_max'] = sensor_reading["value"]  
 
-        transformed_readings = list(readings.values())
-        from ewxpwsdb.db.models import Reading
-        return transformed_readings
+        yield from readings.values()
         
 
     def wetness_transform(self, w):
@@ -6,12 +6,13 @@ methods in the parent class.
 
 
 import json
-from requests import post, Session, Request, Response
+from requests import Request, Response
 from datetime import datetime, timezone
 import logging
 
 from . import STATION_TYPE
 from ewxpwsdb.weather_apis.weather_api import WeatherAPIConfig, WeatherAPI
+from ewxpwsdb.weather_apis.file_cache import FileCache
 from ewxpwsdb.db.models import WeatherStation
 
 # Initialize the logger
@@ -38,11 +39,20 @@ class LocomosAPI(WeatherAPI):
     APIConfigClass: type[LocomosAPIConfig] = LocomosAPIConfig
     _station_type: STATION_TYPE = 'LOCOMOS'
     _sampling_interval:int =  30
+    base_url = 'https://industrial.api.ubidots.com/api'
     ewx_var_mapping:dict[str,str] = {}
     supported_variables:list[str] = []
     
     # this is the interval on the hour when the API can be queried
     standard_time_interval_minutes = 60
+    # Ubidots limits depend on the account plan rather than a published per-token rate, and each interval is at most
+    # a variable list request (usually cached) and one data request, so requests are not throttled.  
+    # A limit set here would be shared per device token
+    _rate_limit = None
+
+    # the variable list of a device rarely changes, so it's kept in a cache file shared by all processes for this long. 
+    # It's loaded again sooner if a response has a variable that isn't in the list, see _transform()
+    _variables_cache_seconds:float = 24 * 60 * 60
     
     def __init__(self, weather_station:WeatherStation, lws_threshold:int = LOCOMOS_LWS_THRESHOLD):    
 
@@ -57,7 +67,15 @@ class LocomosAPI(WeatherAPI):
         logger.debug("Initialized LocomosAPI for station %s", weather_station.station_code)
 
 
-    def _get_variables(self) -> dict[str,str]:
+    def _rate_limit_credential(self)->str:
+        return self.api_config.token
+
+    def _variables_cache(self)->tuple[FileCache, str]:
+        """the cache of variable lists, and the key for this device"""
+        return FileCache('locomos_variables', ttl_seconds = self._variables_cache_seconds), f"{self.base_url}/{self.api_config.id}"
+
+
+    def _get_variables(self, refresh:bool = False) -> dict[str,str]:
         """load ubidots variable list
         
         gets the list of variables and their IDS for this Ubidots device via the Ubidots API. 
@@ -66,18 +84,27 @@ class LocomosAPI(WeatherAPI):
         when the LOCOMOS station is set-up, sensors are defined with standardized labels.  
         Those labels are used to transform the data to EWX standard naming
 
-        If this object already has a non-empty variable list, does not make the request a second time
+        If this object already has a non-empty variable list, or there is one in the cache file for this device 
+        (see file_cache.py), does not make the request
+
+        Args:
+            refresh (bool, optional): request the list from the API even if there is one saved, and save it. Defaults to False.
 
         returns : dictionary keyed on serial id and values are common names (label)
         """
-        if self.variables is None or len(self.variables) == 0:
+        variables_cache, cache_key = self._variables_cache()
+        if not refresh and not self.variables:
+            self.variables = variables_cache.get(cache_key)
+
+        if refresh or self.variables is None or len(self.variables) == 0:
             # object member is empty, load and save list of variables from API
             variables_request = Request(method='GET',
-                    url=f"https://industrial.api.ubidots.com/api/v2.0/devices/{self.api_config.id}/variables/", 
+                    url=f"{self.base_url}/v2.0/devices/{self.api_config.id}/variables/", 
                     headers={'X-Auth-Token': self.api_config.token}, 
                     params={'page_size':'ALL'}).prepare()
             
-            response = Session().send(variables_request)
+            self._wait_for_rate_limit()
+            response = self._http_session.send(variables_request)
 
             if response.status_code != 200:
                 logger.error("Failed to get variable list from LOCOMOS API")
@@ -93,6 +120,7 @@ class LocomosAPI(WeatherAPI):
                 variables[result['id']] = result['label']
             logger.debug("Loaded variables: %s", variables)
             self.variables = variables
+            variables_cache.set(cache_key, variables)
         
         return(self.variables)
     
@@ -144,7 +172,8 @@ class LocomosAPI(WeatherAPI):
         }            
         
         try:
-            response = post(url='https://industrial.api.ubidots.com/api/v1.6/data/raw/series',
+            self._wait_for_rate_limit()
+            response = self._http_session.post(url=f"{self.base_url}/v1.6/data/raw/series",
                             headers=request_headers,
                             json=request_params)
             response.raise_for_status()
@@ -217,6 +246,8 @@ class LocomosAPI(WeatherAPI):
 
         # the variables and IDs we are interested in
         variables:dict[str,str] = self._get_variables()
+        variables_refreshed = False
+        unknown_variable_ids:set[str] = set()
         readings:dict[int, dict[str,any]] = {}
 
         if isinstance(response_data,str):
@@ -232,7 +263,18 @@ class LocomosAPI(WeatherAPI):
 
                 # convert this record's variable from an id to it's name 
                 this_variable_id = sensor_record[colnumber["variable.id"]]
-                this_variable_name = variables[this_variable_id]
+                if this_variable_id not in variables and not variables_refreshed:
+                    # a variable was added to the device since the saved list was loaded
+                    logger.debug(f"LOCOMOS variable {this_variable_id} not in variable list, loading it again")
+                    variables = self._get_variables(refresh = True) or variables
+                    variables_refreshed = True
+                
+                this_variable_name = variables.get(this_variable_id)
+                if this_variable_name is None:
+                    if this_variable_id not in unknown_variable_ids:
+                        logger.warning(f"LOCOMOS station {self.id} response has unknown variable {this_variable_id}, skipping it")
+                        unknown_variable_ids.add(this_variable_id)
+                    continue
 
                 # we are not interested in all the values in the data, only those in our list of self.variables
                 if this_variable_name in self.ewx_var_mapping.keys():
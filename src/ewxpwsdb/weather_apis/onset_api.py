@@ -5,7 +5,7 @@ methods in the parent class.
 """
 
 import json
-from requests import get, post, Response 
+from requests import Response 
 from datetime import datetime, timezone, UTC
 import logging
 
@@ -14,6 +14,7 @@ from pydantic import Field
 
 from . import STATION_TYPE
 from ewxpwsdb.weather_apis.weather_api import WeatherAPIConfig, WeatherAPI
+from ewxpwsdb.weather_apis.token_cache import TokenCache
 from ewxpwsdb.db.models import WeatherStation
 
 # Initialize the logger
@@ -46,10 +47,16 @@ class OnsetAPI(WeatherAPI):
     APIConfigClass: type[OnsetAPIConfig] = OnsetAPIConfig
     _station_type: STATION_TYPE = 'ONSET'
     _sampling_interval = interval_min = 5
+    base_url = 'https://webservice.hobolink.com/ws'
     _lws_threshold = 50
+    # HOBOlink does not publish a request limit, so requests are not throttled.  Each interval is one data request, 
+    # and tokens are shared (see token_cache.py) so auth requests are rare.  A limit set here would be shared per client id
+    _rate_limit = None
     # supported_variables = ['atmp', 'dwpt', 'lws', 'pcpn', 'relh', 'srad', 'wdir', 'wspd', 'wspd_max']
     # lws sensor down since May 31, 2024.  removing completely from the variables here. 
     supported_variables = ['atmp', 'dwpt', 'pcpn', 'relh', 'srad', 'wdir', 'wspd', 'wspd_max']
+    # seconds an access token is used when the auth response doesn't say how long it's valid
+    _default_token_seconds:float = 10 * 60
 
     def __init__(self, weather_station:WeatherStation):    
         """ create class from config Type"""
@@ -63,21 +70,34 @@ class OnsetAPI(WeatherAPI):
         # TODO implement 
         return(True)
     
+    def _rate_limit_credential(self)->str:
+        return self.api_config.client_id
+
+    def _token_cache_key(self)->str:
+        return f"{self.base_url}/{self.api_config.client_id}"
+
+
     def _get_auth(self):
         """
-        uses the api to generate an access token required by Onset API
-        adds 'access_token' field to the config dictionary  ( will that affect the type?)
+        get the access token required by Onset API.  Tokens are shared by all stations with the same client id, across 
+        threads and processes, until shortly before they expire (see token_cache.py).  A new one is requested when
+        there is none saved
 
-        note that this must be done immediately before the request, as it can 
-        otherwise cause a race condition with
-        Raises Exception If the return code is not 200.
+        Returns:
+            str|None: access token, None if the token request failed
         """
+        self._access_token = TokenCache('onset').get_or_fetch(self._token_cache_key(), fetch = self._request_token)
+        return self._access_token
 
-        # pull from cache/store if present
-        if self._access_token:
-            return self._access_token
-        
-        response = post(url='https://webservice.hobolink.com/ws/auth/token',
+
+    def _request_token(self)->tuple[str, float]|None:
+        """request a new access token from the Onset auth api
+
+        Returns:
+            tuple[str, float]|None: the token and the seconds it's valid for, None if the request failed
+        """
+        self._wait_for_rate_limit()
+        response = self._http_session.post(url=f"{self.base_url}/auth/token",
                         headers={
                             'Content-Type': 'application/x-www-form-urlencoded'},
                             data={'grant_type': 'client_credentials',
@@ -90,10 +110,8 @@ class OnsetAPI(WeatherAPI):
             logger.error("Get Auth request failed with status code %s and message %s", response.status_code, response.text)
             return None
         
-        response = response.json()
-        # store this in the object
-        self._access_token = response['access_token']
-        return self._access_token    
+        token_data = response.json()
+        return token_data['access_token'], float(token_data.get('expires_in') or self._default_token_seconds)
 
     def _get_readings(self,start_datetime:datetime,end_datetime:datetime) ->list[Response] :
         """ use Onset API to pull data from this station for times between start and end.  Called by the parent 
@@ -114,7 +132,8 @@ class OnsetAPI(WeatherAPI):
         end_datetime_str = self._format_time(end_datetime)
 
         try:
-            response = get( url=f"https://webservice.hobolink.com/ws/data/file/{self.api_config.ret_form}/user/{self.api_config.user_id}",
+            self._wait_for_rate_limit()
+            response = self._http_session.get( url=f"{self.base_url}/data/file/{self.api_config.ret_form}/user/{self.api_config.user_id}",
                             headers={'Authorization': "Bearer " + access_token},
                             params={
                                 'loggers': self.api_config.sn,
@@ -122,6 +141,9 @@ class OnsetAPI(WeatherAPI):
                                 'end_date_time': end_datetime_str
                                 }
                             )
+            if response.status_code == 401:
+                # the saved token was revoked or expired early, the next request gets a new one
+                TokenCache('onset').invalidate(self._token_cache_key())
             response.raise_for_status()
             logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
         except Exception as e:
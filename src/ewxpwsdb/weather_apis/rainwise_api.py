@@ -39,12 +39,13 @@ The following variables are availabe from the Rainwise API:
 
 
 import json
-from requests import get, Response
-from datetime import datetime
+from requests import Response
+from datetime import datetime, timedelta
 import logging
 
 from . import STATION_TYPE
 from ewxpwsdb.weather_apis.weather_api import WeatherAPIConfig, WeatherAPI
+from ewxpwsdb.weather_apis.http_sessions import requests_response
 from ewxpwsdb.db.models import WeatherStation, APIResponse
 
 # Initialize the logger
@@ -65,7 +66,13 @@ class RainwiseAPI(WeatherAPI):
     APIConfigClass: type[RainwiseAPIConfig] = RainwiseAPIConfig
     _station_type: STATION_TYPE = 'RAINWISE'
     _sampling_interval = interval_min = 15
+    base_url = 'http://api.rainwise.net/main/v1.5'
+    # date range is limited to 105 days for a 15 minute interval
+    _max_request_window = timedelta(days = 30)
     _lws_threshold = 0.50 # percent minutes wet
+    # the registered Rainwise API has no published request limit, only a limit on the date range of each request 
+    # (see doc/external_apis/rainwise.md), so requests are not throttled.  A limit set here would be shared per username
+    _rate_limit = None
     supported_variables = ['atmp', 'lws', 'pcpn', 'relh', 'srad', 'smst', 'wspd', 'wdir', 'wspd_max']
     standard_time_interval_minutes = 44 # this should get 3 readings
     
@@ -93,27 +100,10 @@ class RainwiseAPI(WeatherAPI):
             api response in a list with metadata (uses a list for compatibility with other station types)
         """
 
-        # note start/end times in station timezone
-        
-        from datetime import timedelta
-        start_local_time_early = self._format_time(self.dt_local_from_utc( start_datetime ) - timedelta(minutes=16) )
-        end_local_time = self._format_time(self.dt_local_from_utc( end_datetime ))
-        
-        url = 'http://api.rainwise.net/main/v1.5/registered/get-historical.php'
-        params: dict[str,int|str] = {
-                                'username': self.api_config.username,
-                                'sid': self.api_config.sid,
-                                'pid': self.api_config.pid,
-                                'mac': self.api_config.mac,
-                                'format': self.api_config.ret_form,
-                                'interval': interval,
-                                'sdate': start_local_time_early,
-                                'edate': end_local_time,
-                                'units':'metric' 
-                                }
-        
         try:
-            response = get(url= url, params=params)
+            self._wait_for_rate_limit()
+            response = self._http_session.get(url= f"{self.base_url}/registered/get-historical.php", 
+                                              params=self._request_params(start_datetime, end_datetime, interval))
             response.raise_for_status()
             logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
         except Exception as e:
@@ -123,11 +113,46 @@ class RainwiseAPI(WeatherAPI):
         # response should have 1 extra previous reading
         return [response]
 
+    async def _aget_readings(self, start_datetime:datetime, end_datetime:datetime, 
+                      interval:int = 5) -> list[Response]:
+        """ async version of _get_readings, see WeatherAPI.aget_readings()"""
+        try:
+            await self._await_rate_limit()
+            response = requests_response(await self._async_client.get(url= f"{self.base_url}/registered/get-historical.php", 
+                                              params=self._request_params(start_datetime, end_datetime, interval)))
+            response.raise_for_status()
+            logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
+        except Exception as e:
+            logger.error("Failed to retrieve data for interval %s - %s: %s", start_datetime, end_datetime, e)
+            return []
+
+        return [response]
+
+    def _rate_limit_credential(self)->str:
+        return self.api_config.username
+
+    def _request_params(self, start_datetime:datetime, end_datetime:datetime, interval:int)->dict[str,int|str]:
+        """query parameters for the historical data request, see _get_readings()"""
+        # note start/end times in station timezone, starting early to include 1 extra previous reading
+        start_local_time_early = self._format_time(self.dt_local_from_utc( start_datetime ) - timedelta(minutes=16) )
+        end_local_time = self._format_time(self.dt_local_from_utc( end_datetime ))
+        
+        return {'username': self.api_config.username,
+                'sid': self.api_config.sid,
+                'pid': self.api_config.pid,
+                'mac': self.api_config.mac,
+                'format': self.api_config.ret_form,
+                'interval': interval,
+                'sdate': start_local_time_early,
+                'edate': end_local_time,
+                'units':'metric' 
+                }
+
     
     def _get_readings_current(self) -> Response:
         """ use the Rainwse public api to get 'current' data.  This has different output format than the historical data"""
-        current_data_url = f"http://api.rainwise.net/main/v1.5/get-data.php?mac={self.api_config.mac}&format=json"
-        response = get(url= current_data_url)
+        current_data_url = f"{self.base_url}/get-data.php?mac={self.api_config.mac}&format=json"
+        response = self._http_session.get(url= current_data_url)
         return response
     
 
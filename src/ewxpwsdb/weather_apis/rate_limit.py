@@ -0,0 +1,117 @@
+"""
+rate limiting for vendor API requests, shared by all stations in a process that use the same vendor account.
+
+Vendor APIs limit requests per credential (e.g. Zentra allows 1 call per 60 seconds per token) and many stations
+share one account token, so limiters are kept in a registry keyed on vendor and credential.  Callers reserve
+the next free slot before sending a request and wait until it comes up, rather than sending and sleeping after
+a 'too many requests' error.
+
+Works from threads (acquire) and from asyncio code (aacquire).
+"""
+
+import asyncio, hashlib, logging, threading, time
+
+# Initialize the logger
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """token bucket allowing `calls` requests per `period` seconds, with up to `burst` requests at once.
+
+    Slots are handed out in the order they are reserved, so callers queue for the next slot rather than
+    all retrying at once when the bucket is empty.  Thread-safe.
+    """
+
+    def __init__(self, calls:int, period:float, burst:int = 1):
+        """
+        Args:
+            calls (int): number of requests allowed per period
+            period (float): length of period in seconds
+            burst (int, optional): number of requests that may be made back-to-back when the bucket is full. Defaults to 1.
+        """
+        if calls < 1 or period <= 0:
+            raise ValueError("rate limit must allow at least 1 call in a positive period")
+
+        self.calls = calls
+        self.period = period
+        self.burst = max(1, burst)
+        self._interval = period / calls
+        # time at which the bucket would be full again if no more requests are made
+        self._full_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self)->float:
+        """take the next free slot
+
+        Returns:
+            float: seconds the caller must wait before sending its request, 0 if it may send now
+        """
+        with self._lock:
+            now = time.monotonic()
+            full_at = max(self._full_at, now)
+            # a slot is free once the bucket has at least one token, i.e.
+            # no more than (burst - 1) intervals away from being full
+            available_at = full_at - (self.burst - 1) * self._interval
+            self._full_at = full_at + self._interval
+            return max(0.0, available_at - now)
+
+    def defer(self, seconds:float):
+        """push back the next free slot by at least `seconds` from now, for example when the
+        API reports a lock-out period that this process did not know about (other processes, same token)
+
+        Args:
+            seconds (float): seconds from now until the next request may be sent
+        """
+        with self._lock:
+            # next slot is 'seconds' from now and the bucket is empty
+            self._full_at = max(self._full_at, time.monotonic() + seconds + (self.burst - 1) * self._interval)
+
+    def acquire(self)->float:
+        """block the current thread until a slot is free
+
+        Returns:
+            float: seconds waited
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self)->float:
+        """wait in the event loop until a slot is free, without blocking other tasks
+
+        Returns:
+            float: seconds waited
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+_limiters:dict[tuple[str,str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(vendor:str, credential:str, calls:int, period:float, burst:int = 1)->RateLimiter:
+    """get the limiter for this vendor and credential, creating it on first use.
+    All stations using the same credential with the same vendor share one limiter.
+
+    Args:
+        vendor (str): station type, e.g. 'ZENTRA'
+        credential (str): api token or key that the vendor counts requests against. Only a hash of it is kept
+        calls (int): number of requests allowed per period
+        period (float): length of period in seconds
+        burst (int, optional): number of requests allowed back-to-back. Defaults to 1.
+
+    Returns:
+        RateLimiter: shared limiter
+    """
+    key = (vendor, hashlib.sha256(credential.encode()).hexdigest())
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            logger.debug(f"creating {vendor} rate limiter for {calls} calls per {period} seconds")
+            limiter = RateLimiter(calls, period, burst)
+            _limiters[key] = limiter
+    return limiter
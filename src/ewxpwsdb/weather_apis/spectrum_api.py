@@ -14,16 +14,17 @@ Spectrum Sensor Names:
 - Wind Speed
 """
 
-import json
-from requests import get, Response
+from requests import Response
 from datetime import datetime,timezone
 from zoneinfo import ZoneInfo
 import logging
 
-from typing import Any
+from typing import Any, Iterator
 
 from . import STATION_TYPE
 from .weather_api import WeatherAPI, WeatherAPIConfig
+from .http_sessions import requests_response
+from .json_stream import iter_json_array_items
 from ewxpwsdb.db.models import WeatherStation, APIResponse
 
 # Initialize the logger
@@ -40,7 +41,11 @@ class SpectrumAPI(WeatherAPI):
     APIConfigClass: type[SpectrumAPIConfig] = SpectrumAPIConfig
     _station_type: STATION_TYPE = 'SPECTRUM'
     _sampling_interval = interval_min = 5
+    base_url = 'https://api.specconnect.net:6703/api'
     _lws_threshold = 7  # any value over 6 is considered wet -- spectrum manual
+    # SpecConnect does not publish a request limit and we make one request per station interval, so requests are 
+    # not throttled.  A limit set here would be shared per customer api key
+    _rate_limit = None
 
 
     supported_variables = ['atmp', 'lws', 'pcpn', 'relh', 'srad', 'wspd', 'wdir', 'wspd_max']
@@ -66,6 +71,16 @@ class SpectrumAPI(WeatherAPI):
         dt = self.dt_local_from_utc(dt) # .replace(tzinfo=timezone.utc).astimezone(tz=ZoneInfo(self.weather_station.timezone))
         return(dt.strftime('%m-%d-%Y %H:%M'))
     
+    def _rate_limit_credential(self)->str:
+        return self.api_config.apikey
+
+    def _request_params(self, start_datetime:datetime, end_datetime:datetime)->dict[str,str]:
+        """query parameters to request data for a range of dates, see _get_readings()"""
+        return {'customerApiKey': self.api_config.apikey, 
+                'serialNumber': self.api_config.sn,
+                'startDate': self._format_time(start_datetime), 
+                'endDate': self._format_time(end_datetime)}
+
     def _get_readings(self,start_datetime:datetime, end_datetime:datetime)->list[Response]:
         """ request weather data from the specconnect API for a range of dates
         
@@ -73,15 +88,10 @@ class SpectrumAPI(WeatherAPI):
             start_datetime: datetime object in UTC timezone.  
             end_datetime: datetime object in UTC timezone.  
         """
-        start_datetime_str = self._format_time(start_datetime)
-        end_datetime_str = self._format_time(end_datetime)
-        
         try:
-            response = get( url='https://api.specconnect.net:6703/api/Customer/GetDataInDateTimeRange',
-                            params={'customerApiKey': self.api_config.apikey, 
-                                    'serialNumber': self.api_config.sn,
-                                    'startDate': start_datetime_str, 
-                                    'endDate': end_datetime_str}
+            self._wait_for_rate_limit()
+            response = self._http_session.get( url=f"{self.base_url}/Customer/GetDataInDateTimeRange",
+                            params=self._request_params(start_datetime, end_datetime)
                           )
             response.raise_for_status()
             logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
@@ -91,6 +101,21 @@ class SpectrumAPI(WeatherAPI):
 
         return [response]
 
+    async def _aget_readings(self,start_datetime:datetime, end_datetime:datetime)->list[Response]:
+        """ async version of _get_readings, see WeatherAPI.aget_readings()"""
+        try:
+            await self._await_rate_limit()
+            response = requests_response(await self._async_client.get( url=f"{self.base_url}/Customer/GetDataInDateTimeRange",
+                            params=self._request_params(start_datetime, end_datetime)
+                          ))
+            response.raise_for_status()
+            logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
+        except Exception as e:
+            logger.error("Failed to retrieve data for interval %s - %s: %s", start_datetime, end_datetime, e)
+            return []
+
+        return [response]
+
 
     def _data_present_in_response(self, response_data:dict)->bool:
         """check for presence of data in response
@@ -139,42 +164,50 @@ class SpectrumAPI(WeatherAPI):
         """
         
         if isinstance(response_data,str):
-            response_data = json.loads(response_data)
-
-        if 'EquipmentRecords' not in response_data.keys():
+            readings = list(self._iter_transform(response_data))
+        elif 'EquipmentRecords' in response_data.keys():
+            readings = [self._transform_record(record) for record in response_data['EquipmentRecords']]
+        else:
             return []
         
-        readings:list[dict] = []
-        for record in response_data['EquipmentRecords']:
-            reading:dict[str,Any] = { 'data_datetime': self.dt_utc_from_str(record['TimeStamp'])}
-            for sensor in record['SensorData']:
-                match sensor['SensorType']:
-                    case 'Temperature':
-                        reading['atmp'] = round(self.f_to_c(sensor["DecimalValue"]), 2)
-                    case 'Leaf Wetness':
-                        reading['lws'] = self._wetness_transform(sensor["DecimalValue"])
-                    case 'Rainfall':
-                        reading['pcpn'] = sensor["DecimalValue"]  * 25.4
-                    case 'Relative Humidity':
-                        reading['relh'] = sensor["DecimalValue"]
-                    case 'Solar Radiation Light':
-                        reading['srad'] = sensor["DecimalValue"]
-                    case 'Wind Direction':
-                        reading['wdir'] = sensor["DecimalValue"]
-                    case 'Wind Speed':
-                        reading['wspd'] =  self.mph_to_ms(sensor["DecimalValue"])
-                    case 'Wind Gust':
-                        reading['wspd_max'] = self.mph_to_ms(sensor["DecimalValue"])
-                    case _:
-                        # we are only collecting the sensors above
-                        pass
-
-            readings.append(reading)
-
-        
         logger.debug("Transformed readings: %s", readings)
         return readings
     
+    def _iter_transform(self, response_text:str|None)->Iterator[dict[str,Any]]:
+        """decode and transform one equipment record at a time, see WeatherAPI._iter_transform()"""
+        if not response_text:
+            return
+        
+        for record in iter_json_array_items(response_text, 'EquipmentRecords'):
+            yield self._transform_record(record)
+
+    def _transform_record(self, record:dict)->dict[str,Any]:
+        """convert one item of EquipmentRecords into a reading dict"""
+        reading:dict[str,Any] = { 'data_datetime': self.dt_utc_from_str(record['TimeStamp'])}
+        for sensor in record['SensorData']:
+            match sensor['SensorType']:
+                case 'Temperature':
+                    reading['atmp'] = round(self.f_to_c(sensor["DecimalValue"]), 2)
+                case 'Leaf Wetness':
+                    reading['lws'] = self._wetness_transform(sensor["DecimalValue"])
+                case 'Rainfall':
+                    reading['pcpn'] = sensor["DecimalValue"]  * 25.4
+                case 'Relative Humidity':
+                    reading['relh'] = sensor["DecimalValue"]
+                case 'Solar Radiation Light':
+                    reading['srad'] = sensor["DecimalValue"]
+                case 'Wind Direction':
+                    reading['wdir'] = sensor["DecimalValue"]
+                case 'Wind Speed':
+                    reading['wspd'] =  self.mph_to_ms(sensor["DecimalValue"])
+                case 'Wind Gust':
+                    reading['wspd_max'] = self.mph_to_ms(sensor["DecimalValue"])
+                case _:
+                    # we are only collecting the sensors above
+                    pass
+
+        return reading
+    
     def _handle_error(self):
         """ place holder to remind that we need to add err handling to each class"""
         pass
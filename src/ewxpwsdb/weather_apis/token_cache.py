@@ -0,0 +1,112 @@
+"""
+bearer tokens from vendor auth endpoints, kept until just before they expire and shared by all threads and processes
+on a machine, so each collection doesn't request a new token first.
+
+Tokens are held in memory, and in cache files (see file_cache.py) that only the owner can read.  A vendor api uses
+it like this:
+
+    token = self._token_cache.get_or_fetch(client_id, fetch = self._request_token)
+
+where _request_token() makes the auth request and returns the token and the seconds it's valid for.
+"""
+
+import logging, threading, time
+from pathlib import Path
+from typing import Callable
+
+from ewxpwsdb.weather_apis.file_cache import FileCache
+
+# Initialize the logger
+logger = logging.getLogger(__name__)
+
+# tokens in memory for every TokenCache in this process, by (vendor, key): (token, expiry as time.time())
+_tokens:dict[tuple[str, str], tuple[str, float]] = {}
+_tokens_lock = threading.Lock()
+# one lock per (vendor, key) so only one thread at a time requests a new token for a client
+_fetch_locks:dict[tuple[str, str], threading.Lock] = {}
+
+
+class TokenCache:
+    """bearer tokens of one vendor by key (e.g. client id), with their expiry"""
+
+    def __init__(self, vendor:str, refresh_margin_seconds:float = 60.0, directory:str|Path|None = None):
+        """
+        Args:
+            vendor (str): name of the vendor api, e.g. 'onset'
+            refresh_margin_seconds (float, optional): a token is replaced this many seconds before it expires. Defaults to 60.0.
+            directory (str | Path | None, optional): cache directory. Defaults to None for file_cache.cache_dir().
+        """
+        self.vendor = vendor
+        self.refresh_margin_seconds = refresh_margin_seconds
+        # expiry is checked per token, the file cache ttl only clears out tokens that were never replaced
+        self._file_cache = FileCache(f"tokens_{vendor}", ttl_seconds = 7 * 24 * 60 * 60, directory = directory,
+                                     file_mode = 0o600, directory_mode = 0o700)
+
+
+    def _usable(self, expires_at:float)->bool:
+        return expires_at - self.refresh_margin_seconds > time.time()
+
+
+    def get(self, key:str)->str|None:
+        """a saved token for key that is not about to expire, or None"""
+        with _tokens_lock:
+            token_expiry = _tokens.get((self.vendor, key))
+        if token_expiry is not None and self._usable(token_expiry[1]):
+            return token_expiry[0]
+
+        saved = self._file_cache.get(key)
+        if isinstance(saved, dict) and saved.get('token') and self._usable(saved.get('expires_at', 0)):
+            with _tokens_lock:
+                _tokens[(self.vendor, key)] = (saved['token'], saved['expires_at'])
+            return saved['token']
+
+        return None
+
+
+    def set(self, key:str, token:str, expires_in:float)->None:
+        """save a token that is valid for expires_in seconds from now"""
+        expires_at = time.time() + expires_in
+        with _tokens_lock:
+            _tokens[(self.vendor, key)] = (token, expires_at)
+        self._file_cache.set(key, {'token': token, 'expires_at': expires_at})
+
+
+    def invalidate(self, key:str)->None:
+        """forget the token for key, e.g. when the vendor api rejects it"""
+        with _tokens_lock:
+            _tokens.pop((self.vendor, key), None)
+        self._file_cache.delete(key)
+
+
+    def get_or_fetch(self, key:str, fetch:Callable[[], tuple[str, float]|None])->str|None:
+        """a saved token for key, or a new one from fetch() which is then saved.  Threads asking for the same key
+        wait for one fetch rather than each requesting a token
+
+        Args:
+            key (str): identifies the credential, e.g. client id
+            fetch (Callable): requests a new token, returning (token, seconds it's valid for), or None if it fails
+
+        Returns:
+            str | None: the token, or None if there is none saved and fetch failed
+        """
+        token = self.get(key)
+        if token:
+            return token
+
+        with _tokens_lock:
+            fetch_lock = _fetch_locks.setdefault((self.vendor, key), threading.Lock())
+
+        with fetch_lock:
+            # another thread may have fetched it while this one waited
+            token = self.get(key)
+            if token:
+                return token
+
+            fetched = fetch()
+            if not fetched:
+                return None
+
+            token, expires_in = fetched
+            self.set(key, token, expires_in)
+            logger.debug(f"new {self.vendor} token, valid for {expires_in} seconds")
+            return token
@@ -8,19 +8,25 @@ The class WeatherAPI is abstract and must be sub-classed and is not used directl
 # #   see models.py for example
 
 from pydantic import BaseModel, ConfigDict
-from typing import get_args, Self
-import json, warnings, logging
+from typing import get_args, Self, Iterator, Callable
+import json, warnings, logging, time, asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from abc import ABC, abstractmethod
 from uuid import uuid4
-from requests import Response
+from requests import Response, Session
+from requests.exceptions import HTTPError, Timeout, ConnectionError as RequestsConnectionError
+import httpx
 
 
 from ewxpwsdb import __version__ # from importlib.metadata import version didn't work
 from ewxpwsdb.time_intervals import is_tz_aware, UTCInterval, is_utc
 from ewxpwsdb.db.models import WeatherStation, Reading, APIResponse
 from . import STATION_TYPE 
+from .http_sessions import get_session, get_async_client
+from .rate_limit import RateLimiter, get_rate_limiter
+from . import conversions
 
 # Initialize the logger
 logger = logging.getLogger(__name__)
@@ -74,6 +80,39 @@ class WeatherAPI(ABC):
     # methods like get_readings to set default time periods
     standard_time_interval_minutes:int = 15
 
+    # root url of the vendor API, set per vendor.  Override on an instance to point at a different server, e.g. a test stub
+    base_url:str = ''
+
+    # published request limit of the vendor API as (calls, seconds) per credential, None if there is no limit.  
+    # see rate_limit.py and _rate_limit_credential()
+    _rate_limit:tuple[int,float]|None = None
+    _rate_limit_burst:int = 1
+
+    # for APIs that split an interval into several requests (e.g. days), the max number of those requests in 
+    # flight at once, and how many times to retry the ones that fail.  see _fetch_intervals_concurrently()
+    _max_concurrent_requests:int = 4
+    _request_retries:int = 2
+    _request_retry_delay:float = 1.0
+
+    # largest time span to request in one call to get_readings when loading historic data, 
+    # based on each vendor's limits on records per request.  see Collector.get_historic_data()
+    _max_request_window:timedelta = timedelta(days = 1)
+
+    # cost of one more request to this vendor, as the number of readings we already have that are worth downloading
+    # again to avoid it.  Used to merge nearby gaps into fewer requests, see Collector.backfill() and plan_gap_requests()
+    _request_cost_readings:int = 12
+
+    # number of readings per list yielded by iter_transform(), so readings can be saved in batches
+    transform_batch_size:int = 1000
+
+    # validate every reading from the transform (True), or fully validate the first reading of each batch and only check
+    # the rest (False), see Reading.model_construct_from_station()
+    strict_reading_validation:bool = False
+
+    # version of this station type's _transform.  Increment in the subclass when a change to its transform would 
+    # change the readings, so that Collector.retransform() recomputes responses transformed by earlier versions
+    transform_version:int = 1
+
     supported_variables:list[str] = ['atmp', 'atmp_min', 'atmp_max', 'lws', 'pcpn', 'relh', 'srad', 'smst', 'stmp', 'wspd', 'wsp_max', 'wdir']
     empty_response = ['{}']
 
@@ -100,6 +139,8 @@ class WeatherAPI(ABC):
         # store latest resp object as returned from request but don't need to declare them here
         # self.current_responses = [] # type: ignore
         # self.current_api_response_records = []  # type: ignore
+        # start, end of requests that still failed after retries in the latest get_readings, see _fetch_intervals_concurrently()
+        self.current_failed_intervals:list[tuple[datetime,datetime]] = []
 
     #### convenience/hiding methods
     @property
@@ -112,6 +153,45 @@ class WeatherAPI(ABC):
         """interval between weather readings in minutes.   Hourly frequency is sampling_interval/60 """
         return(self._station_type)
     
+    @property
+    def _http_session(self)->Session:
+        """this thread's session for the vendor's base url, with a keep-alive connection pool shared by all stations using it, see http_sessions.py"""
+        return get_session(self.base_url)
+
+    @property
+    def _async_client(self)->httpx.AsyncClient:
+        """the running event loop's async client for the vendor's base url, shared by all stations using it, see http_sessions.py"""
+        return get_async_client(self.base_url)
+
+    def _rate_limit_credential(self)->str:
+        """the credential that the vendor counts requests against, e.g. the account token.  
+        Override per vendor; the default shares one limit across all stations of this type"""
+        return self.base_url
+
+    @property
+    def _rate_limiter(self)->RateLimiter|None:
+        """limiter shared by all stations using the same vendor credential, or None if this API has no limit"""
+        if self._rate_limit is None:
+            return None
+        calls, period = self._rate_limit
+        return get_rate_limiter(self.station_type, self._rate_limit_credential(), calls, period, self._rate_limit_burst) # type: ignore
+
+    def _wait_for_rate_limit(self):
+        """block until a request slot is free for this station's credential.  Call before each request to the vendor API"""
+        limiter = self._rate_limiter
+        if limiter:
+            waited = limiter.acquire()
+            if waited:
+                logger.debug(f"station {self.weather_station.station_code} waited {waited:.1f}s for {self.station_type} rate limit")
+
+    async def _await_rate_limit(self):
+        """async version of _wait_for_rate_limit, call before each request in _aget_readings"""
+        limiter = self._rate_limiter
+        if limiter:
+            waited = await limiter.aacquire()
+            if waited:
+                logger.debug(f"station {self.weather_station.station_code} waited {waited:.1f}s for {self.station_type} rate limit")
+
     @property
     def id(self):
         return self.weather_station.id
@@ -137,6 +217,25 @@ class WeatherAPI(ABC):
         """transforms a response into a json to be exported"""
         return None
     
+    def _iter_transform(self, response_text:str|None)->Iterator[dict]:
+        """yield the sensor readings in one response as dicts, one at a time.  By default this runs _transform()
+        on the whole response.  Station types with large responses override it to parse the response 
+        incrementally (see json_stream.py) so the whole document is never decoded at once.
+
+        Args:
+            response_text (str | None): JSON text of the response
+
+        Yields:
+            dict: reading values for one timestamp
+        """
+        sensor_data = self._transform(response_text)
+
+        # ensure sensor_data is always a list for uniform processing
+        if not isinstance(sensor_data, list):
+            sensor_data = [sensor_data]
+
+        yield from sensor_data
+
     @abstractmethod
     def _get_readings(self,start_datetime:datetime, end_datetime:datetime)->list[Response]:
         """create API request and return str of json
@@ -163,18 +262,97 @@ class WeatherAPI(ABC):
         return(dt.strftime('%Y-%m-%d %H:%M:%S'))
     
 
-    #### primary class interface
-    def get_readings(self, start_datetime : datetime|None = None, end_datetime : datetime|None = None)->list[APIResponse]:
-        """prepare start/end times and other params generically and then call station-specific method with that.
+    def _iter_get_readings(self, start_datetime:datetime, end_datetime:datetime)->Iterator[Response]:
+        """yield responses from the vendor API as each arrives.  The default yields the list returned by _get_readings;
+        override for APIs that make several requests per interval (e.g. pages) so each can be handled as soon as it arrives. 
 
-        args:
-            start_datetime: optional, timezone-aware datetime in UTC that the readings start. Defaults to current time - station sampling interval 
-            end_datetime: date time in UTC time zone.  If start_datetime is empty this is ignored, defaults to start_datetime + station sampling interval (5, 10, 15 minutes)
-        
-        returns:
-            WeatherAPIData object containing request metadata and dict of responses
+        params:
+            start_datetime: timezone aware datetime in UTC
+            end_datetime: timezone aware datetime in UTC
         """
-        
+        responses = self._get_readings(start_datetime = start_datetime, end_datetime = end_datetime)
+        if not isinstance(responses, list):
+            responses = [responses]
+        yield from responses
+
+
+    @staticmethod
+    def _is_transient_error(error:Exception)->bool:
+        """True for request failures that may succeed if the request is sent again: connection errors, timeouts,
+        and 'too many requests' or server error responses.  Others, e.g. a rejected credential, fail the same way every time"""
+        if isinstance(error, (RequestsConnectionError, Timeout)):
+            return True
+        if isinstance(error, HTTPError) and error.response is not None:
+            return error.response.status_code == 429 or error.response.status_code >= 500
+        return False
+
+
+    def _fetch_intervals_concurrently(self, intervals:list[tuple[datetime,datetime]], fetch:Callable[[datetime,datetime],Response])->list[Response]:
+        """call fetch(start, end) for each interval, with up to _max_concurrent_requests in flight at once. 
+        Intervals for which fetch raises a transient error (see _is_transient_error) are retried, and only those, up to 
+        _request_retries times.  Intervals still failing after that, or that failed with any other error, are logged and 
+        saved in current_failed_intervals, which the Collector reports with its results rather than dropping them.
+
+        Args:
+            intervals (list[tuple[datetime,datetime]]): start, end pairs, in order
+            fetch (Callable): function to request one interval that returns a Response and raises if the request was unsuccessful
+
+        Returns:
+            list[Response]: responses for the intervals that succeeded, in the same order as intervals
+        """
+        results:dict[int, Response] = {}
+        pending:list[int] = list(range(len(intervals)))
+        # intervals that failed with an error that retrying won't fix
+        given_up:list[int] = []
+        attempt = 0
+
+        while pending and attempt <= self._request_retries:
+            if attempt:
+                logger.warning(f"station {self.weather_station.station_code} retrying {len(pending)} failed requests, attempt {attempt} of {self._request_retries}")
+                time.sleep(self._request_retry_delay * attempt)
+
+            failed:list[int] = []
+            with ThreadPoolExecutor(max_workers = max(1, min(self._max_concurrent_requests, len(pending)))) as executor:
+                futures = {executor.submit(fetch, *intervals[i]): i for i in pending}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to retrieve data for interval {intervals[i][0]} - {intervals[i][1]}: {e}")
+                        if self._is_transient_error(e):
+                            failed.append(i)
+                        else:
+                            given_up.append(i)
+
+            pending = sorted(failed)
+            attempt += 1
+
+        self.current_failed_intervals = [intervals[i] for i in sorted(pending + given_up)]
+        if self.current_failed_intervals:
+            logger.error(f"station {self.weather_station.station_code}: {len(self.current_failed_intervals)} requests failed, {len(pending)} of them after {self._request_retries} retries: {self.current_failed_intervals}")
+
+        return [results[i] for i in sorted(results)]
+
+
+    async def _aget_readings(self, start_datetime:datetime, end_datetime:datetime)->list[Response]:
+        """async version of _get_readings.  Override with a native async client (see _async_client and 
+        http_sessions.requests_response) so one event loop can keep many station requests in flight.  The default 
+        is for vendors that make several dependent requests per interval, and runs the blocking _get_readings in a worker thread.
+
+        params:
+            start_datetime: timezone aware datetime in UTC
+            end_datetime: timezone aware datetime in UTC
+
+        returns: list of Response object
+        """
+        return await asyncio.to_thread(self._get_readings, start_datetime, end_datetime)
+
+
+    #### primary class interface
+    def _request_interval(self, start_datetime : datetime|None = None, end_datetime : datetime|None = None)->UTCInterval:
+        """interval to request from the API given optional start and end.  See get_readings for the defaults"""
+
         if end_datetime and start_datetime:
             interval = UTCInterval(start = start_datetime, end = end_datetime)
 
@@ -187,10 +365,41 @@ class WeatherAPI(ABC):
         else : # both are null
             # let UTCInterval class pick endtime, startime standard interval minutes before that. 
             interval = UTCInterval.previous_interval(delta_mins=self.standard_time_interval_minutes)
-    
+
+        return interval
+
+
+    def _api_response_records(self, responses:list[Response]|Response, interval:UTCInterval, request_datetime:datetime)->list[APIResponse]:
+        """convert responses from _get_readings to APIResponse records and save them in this object"""
+
+        # ensure what is returned is _always_ a list
+        if not isinstance(responses, list):
+            responses = [responses]
+
+        self.current_request_datetime = request_datetime
+        self.current_responses = responses
+
+        # convert each to our serializer model 
+        self.current_api_response_records = [self._add_response_metadata(r, interval.start, interval.end, request_datetime) for r in responses]
+        return(self.current_api_response_records)
+
+
+    def get_readings(self, start_datetime : datetime|None = None, end_datetime : datetime|None = None)->list[APIResponse]:
+        """prepare start/end times and other params generically and then call station-specific method with that.
+
+        args:
+            start_datetime: optional, timezone-aware datetime in UTC that the readings start. Defaults to current time - station sampling interval 
+            end_datetime: date time in UTC time zone.  If start_datetime is empty this is ignored, defaults to start_datetime + station sampling interval (5, 10, 15 minutes)
+        
+        returns:
+            WeatherAPIData object containing request metadata and dict of responses
+        """
+        
+        interval = self._request_interval(start_datetime, end_datetime)
        
         ###### call the sub-class to pull data from the station vendor API
         # save the response object in this object
+        self.current_failed_intervals = []
         try:
             # get the request timestamp right away, save in object only if request was successful, in UTC
             request_datetime = datetime.now(timezone.utc)
@@ -203,36 +412,90 @@ class WeatherAPI(ABC):
             logger.error(f"Error getting reading from station {self.id}: {e}")
             raise e
 
-        # ensure what is returned is _always_ a list
-        if not isinstance(responses, list):
-            responses = [responses]
+        return self._api_response_records(responses, interval, request_datetime)
 
-        self.current_request_datetime = request_datetime
-        self.current_responses = responses
 
-        # convert each to our serializer model 
+    async def aget_readings(self, start_datetime : datetime|None = None, end_datetime : datetime|None = None)->list[APIResponse]:
+        """async version of get_readings, returning the same APIResponse records.  Use with asyncio.gather() to have
+        requests for many stations in flight at the same time, then close the shared clients, e.g. 
 
-        self.current_api_response_records = [self._add_response_metadata(r, interval.start, interval.end, request_datetime) for r in responses]
+            responses = await asyncio.gather(*[wapi.aget_readings(start, end) for wapi in weather_apis])
+            await http_sessions.aclose_async_clients()
 
-        # print("DEBUG CURRENT RESPONSES IN API CLASS")
-        # print(self.current_api_response_records)
-        # print("---------")
-        return(self.current_api_response_records)
+        args:
+            start_datetime: optional, timezone-aware datetime in UTC that the readings start. see get_readings
+            end_datetime: optional, date time in UTC time zone. see get_readings
+        
+        returns:
+            list of APIResponse records
+        """
+        
+        interval = self._request_interval(start_datetime, end_datetime)
+
+        self.current_failed_intervals = []
+        try:
+            request_datetime = datetime.now(timezone.utc)
+            responses = await self._aget_readings(
+                    start_datetime = interval.start,
+                    end_datetime = interval.end
+            )
+
+        except Exception as e:
+            logger.error(f"Error getting reading from station {self.id}: {e}")
+            raise e
+
+        return self._api_response_records(responses, interval, request_datetime)
+
+
+    def iter_readings(self, start_datetime : datetime|None = None, end_datetime : datetime|None = None)->Iterator[APIResponse]:
+        """same as get_readings but yields each APIResponse record as soon as its response arrives, so that 
+        the caller can transform and save data for one page while the others are still being requested.
+        Records are added to current_api_response_records as they are yielded.
+
+        args:
+            start_datetime: optional, timezone-aware datetime in UTC that the readings start. see get_readings
+            end_datetime: optional, date time in UTC time zone. see get_readings
+        
+        yields:
+            APIResponse record for each response
+        """
+        
+        interval = self._request_interval(start_datetime, end_datetime)
+        request_datetime = datetime.now(timezone.utc)
+
+        self.current_request_datetime = request_datetime
+        self.current_responses = []
+        self.current_api_response_records = []
+        self.current_failed_intervals = []
 
+        try:
+            for response in self._iter_get_readings(start_datetime = interval.start, end_datetime = interval.end):
+                api_response_record = self._add_response_metadata(response, interval.start, interval.end, request_datetime)
+                self.current_responses.append(response)
+                self.current_api_response_records.append(api_response_record)
+                yield api_response_record
+
+        except Exception as e:
+            logger.error(f"Error getting reading from station {self.id}: {e}")
+            raise e
 
-    def _add_response_metadata(self, response: Response, start_datetime: datetime, end_datetime: datetime, request_datetime: datetime = datetime.now(timezone.utc)) -> APIResponse:
+
+    def _add_response_metadata(self, response: Response, start_datetime: datetime, end_datetime: datetime, request_datetime: datetime|None = None) -> APIResponse:
         """combine a response object with metadata from this station, etc
         
         parameters
             response: a single response object
             start_datetime: datetime for start of time span of weather data
             end_datetime: datetime for end of time span of weather data
-            request_datatime: a datetime timestamp assumed to be UTC
+            request_datatime: a datetime timestamp assumed to be UTC, default is now
             
         returns
             APIResponse model object
         """
-        
+        if request_datetime is None:
+            request_datetime = datetime.now(timezone.utc)
+
+        response_text = response.text
         api_response_record = APIResponse(
             request_id = str(uuid4()),  # locally generate a unique key for this response 
             weatherstation_id = self.weather_station.id,
@@ -245,8 +508,8 @@ class WeatherAPI(ABC):
             request_url =  response.request.url,
             response_status_code  = response.status_code,
             response_reason = response.reason,
-            response_text = response.text,
-            response_content  = response.content,
+            response_payload = APIResponse.compress_text(response_text),
+            response_hash = APIResponse.hash_text(response_text),
 
             )
     
@@ -269,7 +532,7 @@ class WeatherAPI(ABC):
         if str(api_response.response_status_code) != '200':
             return False
         
-        response_text:str = api_response.response_text
+        response_text:str|None = api_response.get_response_text()
 
         # check if JSON
         if isinstance(response_text,str):
@@ -277,10 +540,54 @@ class WeatherAPI(ABC):
                 response_data:dict = json.loads(response_text)
             except Exception as e:
                 return False
+        else:
+            # no response body stored
+            return False
         
         return self._data_present_in_response(response_data)
 
 
+    def iter_transform(self, api_response_records:list[APIResponse]|None = None, database:bool = True, batch_size:int|None = None)->Iterator[list[Reading]]:
+        """transform responses into Readings and yield them in batches, so a caller can save each batch before the 
+        next is built rather than holding the readings of every response at once. 
+
+        Args:
+            api_response_records (list[APIResponse] | None, optional): APIresponse model objects, not simple Response. Defaults to the responses from the latest request
+            database (bool, optional): see transform(). Defaults to True.
+            batch_size (int | None, optional): max number of readings per batch. Defaults to transform_batch_size.
+
+        Yields:
+            list[Reading]: next batch of Reading records with metadata
+        """
+        batch_size = batch_size or self.transform_batch_size
+        # if no data was sent, use data stored from latest request
+        api_response_records = api_response_records or self.current_api_response_records
+
+        batch:list[Reading] = []
+        for api_response_record in api_response_records:
+            # call station subclass method to convert response content into sensor readings
+            # decompress the stored response only when it is transformed
+            sensor_data_list:list[dict] = []
+            for data in self._iter_transform(api_response_record.get_response_text()):
+                sensor_data_list.append(data)
+                if len(batch) + len(sensor_data_list) >= batch_size:
+                    batch.extend(self._readings_from_sensor_data(sensor_data_list, api_response_record, database))
+                    yield batch
+                    batch = []
+                    sensor_data_list = []
+
+            batch.extend(self._readings_from_sensor_data(sensor_data_list, api_response_record, database))
+
+        if batch:
+            yield batch
+
+    def _readings_from_sensor_data(self, sensor_data_list:list[dict], api_response_record:APIResponse, database:bool)->list[Reading]:
+        """convert sensor data from the transform to Reading model objects with meta data"""
+        if self.strict_reading_validation:
+            return [Reading.model_validate_from_station(data, api_response_record, database) for data in sensor_data_list]
+        return Reading.model_construct_from_station(sensor_data_list, api_response_record, database)
+
+
     def transform(self, api_response_records:list[APIResponse]|None = None, database:bool = True)->list[Reading]:
         """
         Transforms data and return it in a standardized format. 
@@ -297,27 +604,7 @@ class WeatherAPI(ABC):
         Returns:
             list[Reading]: List of Reading records with metadata.   If database=False and APIResponse do not have an id, readings will have id==0
         """
-        
-        
-        # if no data was sent, use data stored from latest request
-        api_response_records = api_response_records or self.current_api_response_records
-        
-        all_response_readings = []
-        # run-time conversion and validation to allow for list of dictionaries for example
-        for api_response_record in api_response_records:
-            # call station subclass private method to convert response content into a list of sensor readings
-            # TODO create class to hold sensor data, currently just a dictionary
-            sensor_data =  self._transform(api_response_record.response_text)
-            
-            # ensure sensor_data is always a list for uniform processing
-            if not isinstance(sensor_data, list):
-                sensor_data = [sensor_data]
-
-            # convert those to Reading model objects with meta data
-            readings = [Reading.model_validate_from_station(data, api_response_record, database) for data in sensor_data]
-            all_response_readings.extend(readings)
-
-        self.current_readings = all_response_readings
+        self.current_readings = [reading for batch in self.iter_transform(api_response_records, database) for reading in batch]
         logger.debug("Transformed readings: %s", self.current_readings)
         return self.current_readings
         
@@ -446,6 +733,26 @@ class WeatherAPI(ABC):
         else:
             return(None)
     
+    def column_transform(self, sensor_transform:Callable[[float],float|None])->Callable[[list],list]:
+        """get the columnar version of one of the per-value conversions above (see conversions.py) to 
+        convert all of the values of a sensor at once.   Transforms without a columnar version are 
+        applied to each value in turn.
+
+        Args:
+            sensor_transform (Callable): per-value conversion, e.g. self.f_to_c
+
+        Returns:
+            Callable[[list],list]: function converting a list of values and returning a list of the same length
+        """
+        column_transforms = {
+            self.identity: conversions.identity,
+            self.f_to_c: conversions.f_to_c,
+            self.mph_to_ms: conversions.mph_to_ms,
+            self.kph_to_ms: conversions.kph_to_ms,
+            self.in_to_mm: conversions.in_to_mm,
+        }
+        return column_transforms.get(sensor_transform, lambda values: [sensor_transform(value) for value in values])
+    
     def get_test_reading(self):
         """ test that current config is working and station is online
         returns:
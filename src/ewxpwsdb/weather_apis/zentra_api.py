@@ -41,15 +41,18 @@ Unit strings:
 
 """
 
-import json, logging, time
-from requests import get, Response
+import json, logging, re
+from requests import Response
 from datetime import datetime,timezone, timedelta
-from typing import Self
+from typing import Self, Iterator
 from math import ceil
+from functools import partial
+from operator import itemgetter
 
 # from pydantic import Field
 from . import STATION_TYPE
 from .weather_api import WeatherAPI, WeatherAPIConfig
+from . import conversions
 
 from ewxpwsdb.db.models import WeatherStation
 
@@ -64,15 +67,22 @@ class ZentraAPIConfig(WeatherAPIConfig):
 
 class ZentraAPI(WeatherAPI):
     """Subclass of WeatherAPI with methods specific to Zentra weather stations from the Meter Group.  
-    This API allows one call per 60s, so this includes code to determine if it must wait and delays returning for that long """
+    This API allows one call per 60s per token, so requests wait for the token's shared rate limiter (see rate_limit.py) """
 
     APIConfigClass = ZentraAPIConfig    # type: ignore[assignment]
     _station_type = 'ZENTRA'
     _sampling_interval = interval_min = 5
+    base_url = 'https://zentracloud.com/api/v4'
+    # one call per 60 seconds per token
+    _rate_limit = (1, 60.0)
     _lws_threshold = 450
 
     standard_time_interval_minutes:int = 20
     _MAX_READINGS_PER_PAGE:int = 2000
+    # one full page of readings per historic window, just under 7 days
+    _max_request_window = timedelta(minutes = _MAX_READINGS_PER_PAGE * interval_min)
+    # with one call a minute, any gaps that fit in one page are cheaper to get with a single request
+    _request_cost_readings = _MAX_READINGS_PER_PAGE
     supported_variables = ['atmp', 'lws', 'pcpn', 'relh', 'srad', 'smst', 'stmp', 'wspd', 'wdir', 'wspd_max']
 
 
@@ -172,6 +182,12 @@ class ZentraAPI(WeatherAPI):
         using the 'Wetness Level' of the last minute.   This also has a "Leaf Wetness(min) which is (n minutes > 450) / minutes """
         return 1 if lws_value >= self._lws_threshold else 0
     
+    def column_transform(self, sensor_transform):
+        """columnar version of sensor_transform, adding the Zentra leaf wetness transform, see WeatherAPI.column_transform()"""
+        if sensor_transform == self._zentra_leaf_wetness_transform:
+            return partial(conversions.wet_or_dry, threshold = self._lws_threshold)
+        return super().column_transform(sensor_transform)
+
     def __init__(self, weather_station:WeatherStation, max_retries: int = 3):
         self._max_retries : int = max_retries
         super().__init__(weather_station)  
@@ -179,6 +195,9 @@ class ZentraAPI(WeatherAPI):
         self.api_config: ZentraAPIConfig = self.api_config
         logger.debug("Initialized ZentraAPI for station %s", weather_station.station_code)
 
+    def _rate_limit_credential(self)->str:
+        return self.api_config.token
+
     @property
     def max_retries(self) -> int:
         return self._max_retries
@@ -218,13 +237,59 @@ class ZentraAPI(WeatherAPI):
         return expected_page_count
         
 
-    def _get_readings(self, start_datetime:datetime, end_datetime:datetime)->list[Response]:
-        """ Builds, sends, and stores raw response from Zentra API
-        start_datetime, end_datetime : timezone aware datetimes in UTC, zentra converts to station-local time
+    def _get_page(self, url:str, params:dict[str,int|str], headers:dict[str,str])->Response:
+        """request one page of readings, waiting for the token's rate limiter before each request
+
+        Args:
+            url (str): get_readings url
+            params (dict): request parameters including page_num
+            headers (dict): request headers including token
+
+        Returns:
+            Response: response for this page
         """
+        self._wait_for_rate_limit()
+        response = self._http_session.get(url, params=params, headers=headers) 
+
+        # the token may still be locked out if it was used outside of this process. 
+        # push back the shared limiter by the lock out time and queue again
+        retry_counter = 0
+        while response.status_code == 429 and self.max_retries > 0:
+            retry_counter += 1
+            if retry_counter > self.max_retries:
+                err_message = f"Zentra timed out {self.max_retries} times"
+                logger.error(err_message)
+                raise RuntimeError(err_message) 
+
+            lockout = self._lockout_seconds(response.text)
+            logger.warning(f"Zentra station {self.weather_station.station_code} API too-frequent request throttle, retrying in {lockout+1} seconds...")
+            limiter = self._rate_limiter
+            if limiter:
+                limiter.defer(lockout + 1)
+            self._wait_for_rate_limit()
+
+            response = self._http_session.get(url, params=params, headers=headers)
         
+        if response.status_code != 200:
+            logger.error("Failed to retrieve data for page %s: %s", params['page_num'], response.text)
+
+        return response
+
+
+    def _iter_pages(self, start_datetime:datetime, end_datetime:datetime)->Iterator[tuple[int,Response]]:
+        """request the pages for the interval one after another and yield each page as it arrives.   The token allows 
+        one call a minute so pages can't usefully be requested at the same time, but the caller can transform and save 
+        each page while the next one waits for the token's rate limiter.  If the caller stops early no more pages are requested.
+
+        Args:
+            start_datetime (datetime): timezone aware datetime in UTC
+            end_datetime (datetime): timezone aware datetime in UTC
+
+        Yields:
+            tuple[int,Response]: page number (starting at 1) and response, in page order
+        """
         
-        url = "https://zentracloud.com/api/v4/get_readings/"
+        url = f"{self.base_url}/get_readings/"
         token =  f"Token {self.api_config.token}" # "Token {TOKEN}".format(TOKEN="your_ZENTRACLOUD_API_token")
         headers = {'content-type': 'application/json', 'Authorization': token}
         params: dict[str,int|str] = {'device_sn' : self.api_config.sn, 
@@ -234,37 +299,42 @@ class ZentraAPI(WeatherAPI):
         
         #TODO near this point, call API to determine the units being used
         
-        responses = []
         expected_page_count:int = self._expected_page_count(start_datetime, end_datetime, page_len = self._MAX_READINGS_PER_PAGE)
         
-        for page_num in range(expected_page_count):
-            params['page_num'] = page_num+1  # zero-based languages are annoying
-            response = get(url, params=params, headers=headers) 
-
-            # Handles the 1 request/60 second throttling error
-            retry_counter = 0
-            while response.status_code == 429 and self.max_retries > 0:
-                retry_counter += 1
-                if retry_counter > self.max_retries:
-                    err_message = f"Zentra timed out {self.max_retries} times"
-                    logger.error(err_message)
-                    raise RuntimeError(err_message) 
-
-                lockout = int(response.text[response.text.find("Lock out expires in ")+20:response.text.find("Lock out expires in ")+22])
-                logger.warning(f"Zentra station {self.weather_station.station_code} API too-frequent request throttle, retrying in {lockout+1} seconds...")
-                time.sleep(lockout + 1)
-
-                response = get(url, params=params, headers=headers)
-            
-            if response.status_code != 200:
-                logger.error("Failed to retrieve data for page %s: %s", page_num+1, response.text)
+        # zero-based languages are annoying, pages start at 1
+        for page_num in range(1, expected_page_count + 1):
+            yield page_num, self._get_page(url, {**params, 'page_num': page_num}, headers)
 
-            responses.append(response)
+
+    def _get_readings(self, start_datetime:datetime, end_datetime:datetime)->list[Response]:
+        """ Builds, sends, and stores raw response from Zentra API
+        start_datetime, end_datetime : timezone aware datetimes in UTC, zentra converts to station-local time
+
+        returns list of responses, one per page in page order
+        """
+        
+        responses = [response for page_num, response in self._iter_pages(start_datetime, end_datetime)]
 
         logger.debug("Successfully retrieved data for interval %s - %s", start_datetime, end_datetime)
         return responses
 
 
+    def _iter_get_readings(self, start_datetime:datetime, end_datetime:datetime)->Iterator[Response]:
+        """yield page responses as they arrive rather than after all pages are complete, see _iter_pages"""
+        for page_num, response in self._iter_pages(start_datetime, end_datetime):
+            yield response
+
+
+    def _lockout_seconds(self, response_text:str)->int:
+        """number of seconds until the token can be used again, from the text of a 429 response, 
+        e.g. '... Lock out expires in 52 seconds'.  Defaults to the full rate limit period if not found"""
+        
+        match = re.search(r"Lock out expires in (\d+)", response_text)
+        if match:
+            return int(match.group(1))
+        return int(self._rate_limit[1])
+
+
     def _data_present_in_response(self, response_data:dict)->bool:
         """check for presence of data in response
 
@@ -306,13 +376,9 @@ class ZentraAPI(WeatherAPI):
              logging.debug(response_data)
              return []
 
-        # Build a ZentraReading object for each and put it into the readings_list
-        # the readings are sensor-wise, not timestamp-wise, so we need to 
-        # collect all the timestamps to build a timestamp-wise list to store
-        # each sensor has a list
-
-        # a dict of dict keyed on timestamp to be filled
-        readings_by_timestamp = {}
+        # the readings are sensor-wise, not timestamp-wise, so this is done by column:  collect the timestamps 
+        # and values of each sensor, convert each sensor's values all at once, then build the timestamp-wise list to store
+        columns:list[tuple[str, list[int], list]] = []
 
         # loop through the keys of the 'data' dictionary, the sensor names
         for sensor in response_data.get('data'): 
@@ -333,18 +399,35 @@ class ZentraAPI(WeatherAPI):
                 if ewx_field_name == "":  
                     continue 
                 
-                # loop through the readings of this sensor, build up timestamp-keyed dict of dict
-                for zentra_reading in sensor_data['readings']:                    
-                    timestamp = zentra_reading['timestamp_utc']
-
-                    # if we haven't seen this timestamp before, create a new entry in our readings dict
-                    if timestamp not in readings_by_timestamp:
-                        # add the datetime which would be the same for all readings with this time stamp
-                        reading_datetime = datetime.fromtimestamp(timestamp).astimezone(timezone.utc)
-                        readings_by_timestamp[timestamp] = {'data_datetime': reading_datetime}
-
-                    # add the transformed reading to the db for that field name                    
-                    readings_by_timestamp[timestamp][ewx_field_name] = this_sensor_transform(zentra_reading['value'])
+                timestamps = list(map(itemgetter('timestamp_utc'), sensor_data['readings']))
+                values = self.column_transform(this_sensor_transform)(list(map(itemgetter('value'), sensor_data['readings'])))
+                columns.append((ewx_field_name, timestamps, values))
+
+        if not columns:
+            return []
+
+        # usually every sensor reports at the same timestamps, so readings can be built row by row from the columns 
+        timestamps = columns[0][1]
+        if all([column_timestamps == timestamps for _, column_timestamps, _ in columns]):
+            field_names = ['data_datetime'] + [ewx_field_name for ewx_field_name, _, _ in columns]
+            datetimes = [datetime.fromtimestamp(timestamp, timezone.utc) for timestamp in timestamps]
+            readings = [dict(zip(field_names, row)) for row in zip(datetimes, *[values for _, _, values in columns])]
+            # a timestamp listed twice keeps only its last reading
+            if len(set(timestamps)) == len(timestamps):
+                return readings
+            
+            return list({reading['data_datetime']: reading for reading in readings}.values())
+
+        # otherwise a dict of dict keyed on timestamp to be filled, in the order timestamps are first seen
+        readings_by_timestamp = {}
+        for ewx_field_name, timestamps, values in columns:
+            for timestamp, value in zip(timestamps, values):
+                # if we haven't seen this timestamp before, create a new entry in our readings dict
+                if timestamp not in readings_by_timestamp:
+                    # add the datetime which would be the same for all readings with this time stamp
+                    readings_by_timestamp[timestamp] = {'data_datetime': datetime.fromtimestamp(timestamp, timezone.utc)}
+
+                readings_by_timestamp[timestamp][ewx_field_name] = value
 
         readings = list(readings_by_timestamp.values())
         
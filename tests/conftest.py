@@ -1,5 +1,6 @@
-import pytest, os
+import pytest, os, json
 import logging
+from datetime import date
 from sqlmodel import select, Session
 from sqlalchemy import Engine
 
@@ -158,6 +159,16 @@ def weather_station(station_type, db_with_data):
 
     return(weather_station)
 
+@pytest.fixture()
+def stub_station():
+    """make station records that are not in the database, to create weather api objects without credentials or a database, 
+    e.g. stub_station('ZENTRA', {'sn': 'stub', 'token': 'stub'}).  The station code defaults to STUB_<station type>"""
+    def make_stub_station(station_type:str, api_config:dict, station_id:int = 1, station_code:str|None = None)->WeatherStation:
+        return WeatherStation(id = station_id, station_code = station_code or f"STUB_{station_type}", station_type = station_type, 
+                              install_date = date(2024,1,1), timezone = 'US/Eastern', ewx_user_id = 'test', lat = 42.7, lon = -84.5, 
+                              background_place = 'test', api_config = json.dumps(api_config))
+    return make_stub_station
+
 @pytest.fixture(scope = 'function')
 def db_with_data_session(db_with_data: Engine):
 
@@ -61,7 +61,7 @@ def test_get_responses_and_transform(station_type, db_with_data_session):
         api_response_records = wapi.get_readings(interval.start, interval.end)
 
     # check that there is some weather data, and 200 status
-    assert isinstance(api_response_records[0].response_text, str)
+    assert isinstance(api_response_records[0].get_response_text(), str)
 
     
 
@@ -79,8 +79,8 @@ def test_get_responses_and_transform(station_type, db_with_data_session):
     
         # low level tests that are present in the function data_present_in_response
         assert response.response_status_code == '200'
-        assert isinstance(response.response_text,str)
-        response_data = json.loads(response.response_text)
+        assert isinstance(response.get_response_text(),str)
+        response_data = json.loads(response.get_response_text())
         assert isinstance(response_data, dict)
         assert wapi._data_present_in_response(response_data)
 
@@ -89,7 +89,7 @@ def test_get_responses_and_transform(station_type, db_with_data_session):
 
 
     # check the first response record to see if it has what we need to make some readings
-    response_data = api_response_records[0].response_text
+    response_data = api_response_records[0].get_response_text()
     response_data = json.loads(response_data)
 
     # very implementation specific test that response data is not empty
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta, timezone
 # from ewxpwsdb.db.database import Session
 from ewxpwsdb.db.models import APIResponse, Reading
 from ewxpwsdb.collector import Collector
+from ewxpwsdb.station_readings import StationReadings
 # from ewxpwsdb.db.models import WeatherStationStation
 from ewxpwsdb.weather_apis.weather_api import WeatherAPI
 from ewxpwsdb.time_intervals import UTCInterval, previous_fourteen_minute_interval
@@ -268,6 +269,22 @@ def test_collector_retransform(viable_interval, db_with_data,station_collector):
 
     # the API reqs that cover these readings will have many more readings than selected above    
     assert len(retransform_results) > n
+
+
+def test_collector_retransform_skips_current_results(db_with_data, station_collector):
+    readings = station_collector.get_readings(n = 4, order_by ='asc')
+    readings_interval = UTCInterval(start = readings[0].data_datetime, end = readings[-1].data_datetime)
+    
+    # earlier tests in this module may have stored current results for this interval already, so transform everything first
+    first_results = station_collector.retransform(readings_interval, use_cache = False)
+    assert len(first_results) > 0
+    
+    # nothing changed, so nothing is transformed again
+    assert station_collector.retransform(readings_interval) == []
+
+    # a new transform version makes the stored results stale
+    station_collector.weather_api.transform_version += 1
+    assert sorted(station_collector.retransform(readings_interval)) == sorted(first_results)
     
 
 
@@ -277,3 +294,56 @@ def test_collector_retransform(viable_interval, db_with_data,station_collector):
     
 
 
+
+
+def test_bulk_upsert_matches_per_reading_save(station_collector):
+    """the set-based upsert should return the same ids as saving one reading at a time, 
+    and re-saving readings that are already in the database must not change their ids"""
+
+    collector = station_collector
+    responses = collector.current_responses
+    assert len(responses) > 0
+
+    per_reading_ids = collector.save_readings_from_responses(responses, bulk_upsert = False)
+    bulk_ids = collector.save_readings_from_responses(responses, bulk_upsert = True)
+    assert bulk_ids == per_reading_ids
+
+    # second bulk save is all updates, ids are stable
+    assert collector.save_readings_from_responses(responses, bulk_upsert = True) == bulk_ids
+
+
+def test_duplicate_response_is_linked_not_stored(station_collector):
+    """a response with the same content as one already stored for the station is not stored or transformed again"""
+
+    collector = station_collector
+    stored_response = collector.current_responses[0]
+    assert stored_response.response_hash
+
+    duplicate = APIResponse(**stored_response.model_dump(exclude={'id', 'request_id'}))
+    response_id, reading_ids = collector.store_api_response(duplicate, stored_response.data_start_datetime, stored_response.data_end_datetime)
+
+    assert response_id == collector.stored_duplicate_response(duplicate).id
+    assert reading_ids == []
+    assert duplicate.id is None
+
+
+def test_backfill_with_default_end_requests_only_gaps(station_collector, monkeypatch, caplog):
+    """backfill from 'now', so the lookback starts between readings, must not request the readings stored yesterday again"""
+
+    collector = station_collector
+    requested:list[UTCInterval] = []
+    def record_request(interval:UTCInterval)->list:
+        requested.append(interval)
+        collector.current_reading_ids = []
+        return []
+    monkeypatch.setattr(collector, 'request_and_store_weather_data_utc', record_request)
+
+    collector.backfill(n_days_prior = 1)
+    assert "Backfill refused" not in caplog.text
+
+    # yesterday's readings from the station_collector fixture inside the lookback, only a few are merged into requests
+    station_readings = StationReadings(station = collector.station, engine = collector._engine)
+    stored_times = [reading.data_datetime for reading in station_readings.readings_by_interval_utc(
+        UTCInterval(start = datetime.now(timezone.utc) - timedelta(days = 1), end = datetime.now(timezone.utc)))]
+    rerequested = [t for t in stored_times if any(interval.start <= t < interval.end for interval in requested)]
+    assert len(rerequested) <= collector.weather_api._request_cost_readings * len(requested)
@@ -0,0 +1,43 @@
+"""columnar unit conversions give the same values as the per-value conversions"""
+
+import pytest, json
+from pathlib import Path
+
+from ewxpwsdb.weather_apis import ZentraAPI, conversions
+
+VALUES = [0, 32, 98.6, -40.5, None, '12', 1e6]
+
+
+@pytest.fixture()
+def zapi(stub_station)->ZentraAPI:
+    return ZentraAPI(stub_station('ZENTRA', {'sn': 'stub', 'token': 'stub'}))
+
+
+@pytest.mark.parametrize("conversion", ['f_to_c', 'mph_to_ms', 'kph_to_ms', 'in_to_mm', 'identity'])
+def test_column_conversions_match_per_value(zapi, conversion):
+    per_value = getattr(zapi, conversion)
+    values = VALUES if conversion != 'identity' else [v for v in VALUES if v is not None]
+    assert zapi.column_transform(per_value)(values) == [per_value(v) for v in values]
+
+
+def test_wet_or_dry():
+    assert conversions.wet_or_dry([0, 449.9, 450, 800, None, 'wet'], threshold = 450) == [0, 0, 1, 1, None, None]
+
+
+def test_zentra_columnar_transform(zapi):
+    response_data = json.loads((Path(__file__).parent.parent / 'doc' / 'external_apis' / 'zentra_example_data.json').read_text())
+    readings = zapi._transform(response_data)
+    assert len(readings) == len(response_data['data']['Air Temperature'][0]['readings'])
+
+    # same as converting each value in turn
+    for sensor, field_name in [('Gust Speed', 'wspd_max'), ('Wetness Level', 'lws'), ('Air Temperature', 'atmp')]:
+        sensor_data = response_data['data'][sensor][0]
+        _, per_value = zapi._lookup_sensor_transform(sensor, sensor_data['metadata']['units'])
+        assert [reading[field_name] for reading in readings] == [per_value(r['value']) for r in sensor_data['readings']]
+
+    # sensors reporting at different times are still merged by timestamp
+    missing_timestamp = response_data['data']['Air Temperature'][0]['readings'].pop(0)['timestamp_utc']
+    readings_with_gap = {reading['data_datetime'].timestamp(): reading for reading in zapi._transform(response_data)}
+    assert len(readings_with_gap) == len(readings)
+    assert 'atmp' not in readings_with_gap[missing_timestamp]
+    assert all([readings_with_gap[reading['data_datetime'].timestamp()] == reading for reading in readings[1:]])
@@ -55,3 +55,25 @@ def test_check_db_table_list(test_engine):
     # for this test to pass
     # TODO : create a temp db and use init_db to fill it up to guarantee is the has the correct table list
     assert check_db_table_list(test_engine)
+
+
+def test_get_engine_is_shared(test_db_url):
+    engine = get_engine(test_db_url)
+    assert get_engine(test_db_url) is engine
+
+
+def test_pool_settings(monkeypatch):
+    from ewxpwsdb.db.database import pool_settings
+    for var_name in ["EWXPWSDB_POOL_SIZE", "EWXPWSDB_MAX_OVERFLOW", "EWXPWSDB_POOL_PRE_PING", "EWXPWSDB_POOL_RECYCLE"]:
+        monkeypatch.delenv(var_name, raising = False)
+    assert pool_settings() == {'pool_size': 5, 'max_overflow': 10, 'pool_pre_ping': True, 'pool_recycle': 1800}
+
+    monkeypatch.setenv("EWXPWSDB_POOL_SIZE", "20")
+    monkeypatch.setenv("EWXPWSDB_POOL_PRE_PING", "false")
+    settings = pool_settings()
+    assert settings['pool_size'] == 20
+    assert settings['pool_pre_ping'] is False
+
+    monkeypatch.setenv("EWXPWSDB_MAX_OVERFLOW", "lots")
+    with pytest.raises(ValueError):
+        pool_settings()
@@ -0,0 +1,122 @@
+"""test Davis daily chunk requests against a local stub of the WeatherLink historic endpoint, no credentials needed"""
+
+import pytest, json, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timedelta, timezone
+
+from ewxpwsdb.weather_apis import DavisAPI
+
+
+class StubDavisHandler(BaseHTTPRequestHandler):
+    """echo the requested start timestamp, slowly.  The first request for each timestamp in `fail_once` gets a 500, 
+    and every request for a timestamp in `fail_always` gets that status"""
+    delay = 0.2
+    fail_once:set[int] = set()
+    failed:set[int] = set()
+    fail_always:dict[int,int] = {}
+    requested:list[int] = []
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        start_timestamp = int(parse_qs(urlparse(self.path).query)['start-timestamp'][0])
+        self.requested.append(start_timestamp)
+        if start_timestamp in self.fail_always:
+            self.send_response(self.fail_always[start_timestamp])
+            self.end_headers()
+            return
+
+        if start_timestamp in self.fail_once and start_timestamp not in self.failed:
+            self.failed.add(start_timestamp)
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        body = json.dumps({'start-timestamp': start_timestamp, 'sensors': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_davis_api(stub_station):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubDavisHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    dapi = DavisAPI(stub_station('DAVIS', {'sn': 'stub', 'apikey': 'stub-davis-chunks', 'apisec': 'stub'}))
+    dapi.base_url = f"http://127.0.0.1:{server.server_port}/v2"
+    dapi._request_retry_delay = 0
+    # failures set by one test must not carry over to the next
+    StubDavisHandler.fail_once = set()
+    StubDavisHandler.failed = set()
+    StubDavisHandler.fail_always = {}
+    StubDavisHandler.requested = []
+    yield dapi
+    server.shutdown()
+    server.server_close()
+
+
+def test_davis_chunks_concurrent_and_in_order(stub_davis_api):
+    start = datetime(2024,5,1,0,0, tzinfo=timezone.utc)
+    end = start + timedelta(days=8)
+    chunks = stub_davis_api.get_intervals(start, end)
+    assert len(chunks) == 8
+
+    start_time = time.perf_counter()
+    responses = stub_davis_api._get_readings(start, end)
+    elapsed = time.perf_counter() - start_time
+
+    assert [json.loads(r.text)['start-timestamp'] for r in responses] == [int(chunk[0].timestamp()) for chunk in chunks]
+    assert elapsed < len(chunks) * StubDavisHandler.delay
+
+
+def test_davis_retries_only_failed_chunks(stub_davis_api):
+    start = datetime(2024,6,1,0,0, tzinfo=timezone.utc)
+    end = start + timedelta(days=4)
+    chunks = stub_davis_api.get_intervals(start, end)
+    StubDavisHandler.fail_once = {int(chunks[1][0].timestamp()), int(chunks[3][0].timestamp())}
+
+    responses = stub_davis_api._get_readings(start, end)
+
+    assert len(responses) == 4
+    assert [json.loads(r.text)['start-timestamp'] for r in responses] == [int(chunk[0].timestamp()) for chunk in chunks]
+    assert StubDavisHandler.failed == StubDavisHandler.fail_once
+    assert stub_davis_api.current_failed_intervals == []
+
+
+def test_davis_reports_chunks_that_keep_failing(stub_davis_api):
+    start = datetime(2024,7,1,0,0, tzinfo=timezone.utc)
+    end = start + timedelta(days=3)
+    chunks = stub_davis_api.get_intervals(start, end)
+    stub_davis_api._request_retries = 0
+    StubDavisHandler.fail_once = {int(chunks[0][0].timestamp())}
+
+    responses = stub_davis_api.get_readings(start, end)
+
+    assert len(responses) == 2
+    assert stub_davis_api.current_failed_intervals == [chunks[0]]
+
+    # the next request starts with no failures
+    stub_davis_api.get_readings(start + timedelta(days = 10), end + timedelta(days = 10))
+    assert stub_davis_api.current_failed_intervals == []
+
+
+def test_davis_does_not_retry_rejected_requests(stub_davis_api):
+    start = datetime(2024,8,1,0,0, tzinfo=timezone.utc)
+    end = start + timedelta(days=3)
+    chunks = stub_davis_api.get_intervals(start, end)
+    rejected, throttled = int(chunks[0][0].timestamp()), int(chunks[1][0].timestamp())
+    StubDavisHandler.fail_always = {rejected: 401, throttled: 429}
+
+    responses = stub_davis_api.get_readings(start, end)
+
+    assert len(responses) == 1
+    assert stub_davis_api.current_failed_intervals == [chunks[0], chunks[1]]
+    # a rejected credential is sent once, too many requests is retried
+    assert StubDavisHandler.requested.count(rejected) == 1
+    assert StubDavisHandler.requested.count(throttled) == 1 + stub_davis_api._request_retries
@@ -0,0 +1,48 @@
+import json, os, time
+
+from ewxpwsdb.weather_apis.file_cache import FileCache, cache_dir
+
+
+def test_cache_dir_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("EWXPWS_CACHE_DIR", str(tmp_path))
+    assert cache_dir() == tmp_path
+    monkeypatch.delenv("EWXPWS_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / 'xdg'))
+    assert cache_dir() == tmp_path / 'xdg' / 'ewxpwsdb'
+
+
+def test_file_cache_set_and_get(tmp_path):
+    cache = FileCache('test', ttl_seconds = 60, directory = tmp_path)
+    assert cache.get('device/1') is None
+    assert cache.set('device/1', {'a1': 'Temperature'})
+    assert cache.get('device/1') == {'a1': 'Temperature'}
+    # another cache object, e.g. in another process, reads the same file
+    assert FileCache('test', ttl_seconds = 60, directory = tmp_path).get('device/1') == {'a1': 'Temperature'}
+    # only the value file is left, no temporary files
+    assert len(os.listdir(tmp_path / 'test')) == 1
+
+    cache.delete('device/1')
+    assert cache.get('device/1') is None
+
+
+def test_file_cache_expires(tmp_path):
+    cache = FileCache('test', ttl_seconds = 60, directory = tmp_path)
+    cache.set('key', [1, 2, 3])
+    path = cache._path('key')
+    path.write_text(json.dumps({'saved': time.time() - 120, 'value': [1, 2, 3]}))
+    assert cache.get('key') is None
+
+
+def test_file_cache_ignores_bad_files(tmp_path):
+    cache = FileCache('test', ttl_seconds = 60, directory = tmp_path)
+    cache.set('key', 'value')
+    cache._path('key').write_text('{not json')
+    assert cache.get('key') is None
+
+
+def test_file_cache_unwritable_directory(tmp_path):
+    not_a_directory = tmp_path / 'file'
+    not_a_directory.write_text('')
+    cache = FileCache('test', ttl_seconds = 60, directory = not_a_directory)
+    assert cache.set('key', 'value') is False
+    assert cache.get('key') is None
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+from ewxpwsdb.fleet import active_stations, catch_up_all, results_summary, StationCollectionResult
+from ewxpwsdb.db.models import WeatherStation
+from ewxpwsdb.time_intervals import UTCInterval
+
+
+def test_results_summary():
+    results = [StationCollectionResult(station_code='A', station_type='ZENTRA', status='ok', readings_saved=10, seconds=1.5), 
+               StationCollectionResult(station_code='B', station_type='DAVIS', status='error', message='no data')]
+    summary = results_summary(results)
+    lines = summary.split("\n")
+    # header, one line per station, totals
+    assert len(lines) == 4
+    assert lines[1].startswith("A\tZENTRA\tok\t10")
+    assert lines[-1] == "2 stations, 1 errors, 0 incomplete, 10 readings"
+
+
+def test_failed_requests_make_result_incomplete():
+    result = StationCollectionResult(station_code='A', station_type='DAVIS', status='ok', readings_saved=10)
+    result.add_failed_intervals([])
+    assert result.status == 'ok'
+
+    start = datetime(2024,7,1,0,0, tzinfo=timezone.utc)
+    failed = UTCInterval(start = start, end = start + timedelta(days = 1))
+    result.add_failed_intervals([failed])
+    assert result.status == 'incomplete'
+    assert result.failed_intervals == [failed]
+    assert str(start) in result.message
+    assert results_summary([result]).split("\n")[-1] == "1 stations, 0 errors, 1 incomplete, 10 readings"
+
+
+def test_active_stations(db_with_data, station_type):
+    stations = active_stations(db_with_data)
+    assert len(stations) > 0
+    assert isinstance(stations[0], WeatherStation)
+    assert all([s.active for s in stations])
+
+    stations_of_type = active_stations(db_with_data, station_type = station_type)
+    assert all([s.station_type == station_type for s in stations_of_type])
+
+
+def test_catch_up_all_reports_each_station(db_with_data, station_type):
+    """stations in a new test database have no readings, so catch-up reports an error
+    for each but does not raise and does not stop the other stations"""
+    results = catch_up_all(db_with_data, max_workers=2, workers_per_vendor=1, station_type=station_type)
+    stations = active_stations(db_with_data, station_type = station_type)
+    assert [r.station_code for r in results] == [s.station_code for s in stations]
+    assert all([isinstance(r, StationCollectionResult) for r in results])
@@ -6,7 +6,8 @@ from ewxpwsdb.db.models import WeatherStation, APIResponse, Reading
 from ewxpwsdb.collector import Collector
 # from ewxpwsdb.db.models import WeatherStationStation
 from ewxpwsdb.weather_apis.weather_api import WeatherAPI
-from ewxpwsdb.time_intervals import previous_fourteen_minute_interval
+from ewxpwsdb.time_intervals import previous_fourteen_minute_interval, UTC
+from datetime import datetime, timedelta
 
 
 @pytest.fixture(scope='module')
@@ -52,7 +53,21 @@ def test_get_historical_data(station_collector):
     with pytest.raises(RuntimeError):
         station_collector.get_historic_data(overwrite=False, days_limit=1)
 
+    stats = station_collector.current_historic_stats
+    assert stats['windows'] > 0
+    assert stats['readings'] > 0
+    assert stats['readings_per_second'] > 0
 
-    
 
+def test_historic_windows(station_collector):
+    end = datetime.now(UTC) - timedelta(hours=1)
+    window = station_collector.weather_api._max_request_window
+
+    windows = station_collector.historic_windows(days_limit = 30, end_datetime = end)
     
+    # most recent first, contiguous, no bigger than the API window, and back no further than days_limit or install date 
+    assert windows[0].end == end
+    assert all([w.end - w.start <= window for w in windows])
+    assert all([windows[i].start == windows[i+1].end for i in range(len(windows)-1)])
+    earliest = max(end - timedelta(days=30), datetime.combine(station_collector.station.install_date, datetime.min.time(), tzinfo=UTC))
+    assert windows[-1].start == earliest
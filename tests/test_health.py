@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import create_engine
+
+from ewxpwsdb.db.health import HealthMonitor, HealthStatus, health_interval
+
+
+def test_health_check_ok():
+    monitor = HealthMonitor(create_engine("sqlite://"), interval_seconds = 60)
+    status = monitor.check()
+    assert isinstance(status, HealthStatus)
+    assert status.ok
+    assert status.latency_ms is not None
+    # the status is kept until the next check
+    assert monitor.status is status
+
+
+def test_health_check_failure_is_reported():
+    # nothing listens on port 1, so this fails to connect
+    monitor = HealthMonitor(create_engine("postgresql+psycopg2://localhost:1/not_a_database"), interval_seconds = 60)
+    status = monitor.status
+    assert not status.ok
+    assert status.message
+
+
+def test_health_monitor_runs_in_background():
+    monitor = HealthMonitor(create_engine("sqlite://"), interval_seconds = 0.01)
+    monitor.start()
+    try:
+        assert monitor._stop_event.wait(0.1) is False
+        assert monitor._status is not None and monitor._status.ok
+    finally:
+        monitor.stop()
+
+
+def test_health_interval(monkeypatch):
+    monkeypatch.delenv("EWXPWSDB_HEALTH_INTERVAL", raising = False)
+    assert health_interval() == 30.0
+    monkeypatch.setenv("EWXPWSDB_HEALTH_INTERVAL", "5")
+    assert health_interval() == 5.0
+    monkeypatch.setenv("EWXPWSDB_HEALTH_INTERVAL", "often")
+    with pytest.raises(ValueError):
+        health_interval()
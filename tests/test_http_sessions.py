@@ -0,0 +1,187 @@
+"""test vendor api requests, sync and async, and shared http sessions against a local stub http server, no credentials or database needed"""
+
+import asyncio, json, threading
+from datetime import datetime, timezone
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+from ewxpwsdb.db.models import APIResponse
+from ewxpwsdb.weather_apis.spectrum_api import SpectrumAPI
+
+EXAMPLE_DATA = Path(__file__).parent.parent / 'doc' / 'external_apis' / 'spectrum_example_data.json'
+
+
+class StubSpectrumHandler(BaseHTTPRequestHandler):
+    """serve the example spectrum response for any GET request"""
+
+    def do_GET(self):
+        if self.path.endswith('/set-cookie') or self.path.endswith('/echo-cookie'):
+            self.send_response(200)
+            self.send_header('Set-Cookie', 'account=station-a; Path=/')
+            if self.headers.get('Cookie'):
+                self.send_header('X-Cookie', self.headers['Cookie'])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        # the example file omits the status field that the live API includes
+        example_data = json.loads(EXAMPLE_DATA.read_text())
+        example_data['ApiCallStatus'] = 'Success'
+        body = json.dumps(example_data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def stub_server_url():
+    server = HTTPServer(('127.0.0.1', 0), StubSpectrumHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def stub_spectrum_api(stub_server_url, stub_station):
+    wapi = SpectrumAPI(stub_station('SPECTRUM', {'sn': 'stub', 'apikey': 'stub'}))
+    wapi.base_url = stub_server_url
+    return wapi
+
+
+def test_get_readings_from_stub_server(stub_spectrum_api):
+    start = datetime(2024,4,29,15,0, tzinfo=timezone.utc)
+    end = datetime(2024,4,29,16,0, tzinfo=timezone.utc)
+
+    records = stub_spectrum_api.get_readings(start, end)
+
+    assert len(records) == 1
+    assert isinstance(records[0], APIResponse)
+    assert records[0].response_status_code == 200
+    assert records[0].request_url.startswith(stub_spectrum_api.base_url)
+    # response body is stored once, compressed
+    assert records[0].response_text is None
+    assert len(records[0].response_payload) < len(records[0].get_response_text())
+    assert records[0].data_start_datetime == start
+    assert stub_spectrum_api.data_present_in_response(records[0])
+
+    readings = stub_spectrum_api.transform(records, database = False)
+    assert len(readings) > 0
+
+
+def test_aget_readings_matches_get_readings(stub_spectrum_api, monkeypatch):
+    from ewxpwsdb.weather_apis.http_sessions import aclose_async_clients
+
+    start = datetime(2024,4,29,15,0, tzinfo=timezone.utc)
+    end = datetime(2024,4,29,16,0, tzinfo=timezone.utc)
+
+    sync_records = stub_spectrum_api.get_readings(start, end)
+
+    # spectrum has a native async client, so the blocking request is never used
+    def blocking_get_readings(start_datetime, end_datetime):
+        raise AssertionError("aget_readings ran the blocking _get_readings")
+    monkeypatch.setattr(stub_spectrum_api, '_get_readings', blocking_get_readings)
+
+    async def get_async():
+        records = await stub_spectrum_api.aget_readings(start, end)
+        await aclose_async_clients()
+        return records
+
+    async_records = asyncio.run(get_async())
+
+    assert len(async_records) == len(sync_records) == 1
+    assert isinstance(async_records[0], APIResponse)
+    assert async_records[0].response_status_code == sync_records[0].response_status_code == 200
+    assert async_records[0].response_reason == sync_records[0].response_reason
+    assert async_records[0].request_url == sync_records[0].request_url
+    assert async_records[0].response_hash == sync_records[0].response_hash
+    assert async_records[0].data_start_datetime == start
+    assert stub_spectrum_api.data_present_in_response(async_records[0])
+    assert len(stub_spectrum_api.transform(async_records, database = False)) == len(stub_spectrum_api.transform(sync_records, database = False))
+
+
+def test_aget_readings_many_stations_concurrently(stub_server_url, stub_station):
+    from ewxpwsdb.weather_apis.http_sessions import get_async_client, aclose_async_clients
+
+    start = datetime(2024,4,29,15,0, tzinfo=timezone.utc)
+    end = datetime(2024,4,29,16,0, tzinfo=timezone.utc)
+    weather_apis = [SpectrumAPI(stub_station('SPECTRUM', {'sn': f"stub{i}", 'apikey': 'stub'}, station_id = i, station_code = f"STUB{i}")) for i in range(20)]
+    for wapi in weather_apis:
+        wapi.base_url = stub_server_url
+
+    async def get_all():
+        all_records = await asyncio.gather(*[wapi.aget_readings(start, end) for wapi in weather_apis])
+        # all stations of the vendor share one client in this event loop
+        client = get_async_client(stub_server_url)
+        await aclose_async_clients()
+        return all_records, client
+
+    all_records, client = asyncio.run(get_all())
+    assert client.is_closed
+    assert len(all_records) == 20
+    assert all([records[0].response_status_code == 200 for records in all_records])
+    assert all([f"serialNumber=stub{i}" in records[0].request_url for i, records in enumerate(all_records)])
+
+
+def test_rainwise_aget_readings_sends_same_request(stub_server_url, stub_station):
+    from ewxpwsdb.weather_apis.rainwise_api import RainwiseAPI
+    from ewxpwsdb.weather_apis.http_sessions import aclose_async_clients
+
+    wapi = RainwiseAPI(stub_station('RAINWISE', {'username': 'stub', 'sid': 'stub', 'pid': 'stub', 'mac': 'stub', 'ret_form': 'json'}))
+    wapi.base_url = stub_server_url
+    start = datetime(2024,4,29,15,0, tzinfo=timezone.utc)
+    end = datetime(2024,4,29,16,0, tzinfo=timezone.utc)
+
+    async def get_async():
+        records = await wapi.aget_readings(start, end)
+        await aclose_async_clients()
+        return records
+
+    async_records = asyncio.run(get_async())
+    sync_records = wapi.get_readings(start, end)
+
+    assert len(async_records) == len(sync_records) == 1
+    assert async_records[0].request_url == sync_records[0].request_url
+    assert async_records[0].response_hash == sync_records[0].response_hash
+
+
+def test_http_session_shared_per_base_url(stub_spectrum_api):
+    from ewxpwsdb.weather_apis.http_sessions import get_session, get_adapter, TimeoutHTTPAdapter
+
+    session = stub_spectrum_api._http_session
+    assert session is get_session(stub_spectrum_api.base_url)
+    assert session is not get_session('https://example.com/api')
+    assert isinstance(session.get_adapter(stub_spectrum_api.base_url), TimeoutHTTPAdapter)
+    assert session.get_adapter(stub_spectrum_api.base_url) is get_adapter(stub_spectrum_api.base_url)
+
+
+def test_http_session_per_thread_shares_pool(stub_spectrum_api):
+    from ewxpwsdb.weather_apis.http_sessions import get_session, get_adapter
+
+    sessions = []
+    threads = [threading.Thread(target = lambda: sessions.append(get_session(stub_spectrum_api.base_url))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(session) for session in sessions + [get_session(stub_spectrum_api.base_url)]}) == 3
+    assert all([session.get_adapter(stub_spectrum_api.base_url) is get_adapter(stub_spectrum_api.base_url) for session in sessions])
+
+
+def test_http_session_keeps_no_cookies(stub_spectrum_api):
+    from ewxpwsdb.weather_apis.http_sessions import get_session
+
+    session = get_session(stub_spectrum_api.base_url)
+    session.get(f"{stub_spectrum_api.base_url}/set-cookie")
+    assert len(session.cookies) == 0
+    # the stub echoes any cookie it is sent
+    assert session.get(f"{stub_spectrum_api.base_url}/echo-cookie").headers.get('X-Cookie') is None
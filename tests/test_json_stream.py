@@ -0,0 +1,66 @@
+"""test incremental transforms of large responses against the full-document transforms, no credentials or database needed"""
+
+import pytest, json
+from pathlib import Path
+
+from ewxpwsdb.db.models import APIResponse
+from ewxpwsdb.weather_apis import LicorAPI, SpectrumAPI
+from ewxpwsdb.weather_apis.json_stream import iter_json_array_items
+
+EXAMPLE_DATA_DIR = Path(__file__).parent.parent / 'doc' / 'external_apis'
+
+
+def test_iter_json_array_items():
+    text = '{"message": {"nested": [1, 2]}, "data" : [ {"a": 1}, [2, "]"], "x,y" ,null ], "after": 1}'
+    assert list(iter_json_array_items(text, 'data')) == json.loads(text)['data']
+    assert list(iter_json_array_items(text, 'missing')) == []
+    assert list(iter_json_array_items(text, 'after')) == []
+    assert list(iter_json_array_items('{"data": []}', 'data')) == []
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array_items('[1, 2]', 'data'))
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array_items('{"data": [1 2]}', 'data'))
+
+
+@pytest.mark.parametrize("api_class, station_type, example_file", [
+    (LicorAPI, 'LICOR', 'onset_licor_example_data.json'),
+    (SpectrumAPI, 'SPECTRUM', 'spectrum_example_data.json'),
+    ])
+def test_iter_transform_matches_transform(api_class, station_type, example_file, stub_station):
+    wapi = api_class(stub_station(station_type, {'sn': 'stub', 'api_token': 'stub', 'apikey': 'stub'}))
+    response_text = (EXAMPLE_DATA_DIR / example_file).read_text()
+
+    expected = wapi._transform(response_text)
+    assert list(wapi._iter_transform(response_text)) == expected
+
+    api_response = APIResponse(weatherstation_id = 1, station_sampling_interval = 5, response_payload = APIResponse.compress_text(response_text))
+    batches = list(wapi.iter_transform([api_response], database = False, batch_size = 5))
+    assert all([len(batch) <= 5 for batch in batches])
+    assert len(batches) > 1
+    assert [reading.data_datetime for batch in batches for reading in batch] == [reading['data_datetime'] for reading in expected]
+
+
+def test_licor_iter_transform_out_of_order(caplog, stub_station):
+    lapi = LicorAPI(stub_station('LICOR', {'sn': 'stub', 'api_token': 'stub'}))
+    # the example has 13 timestamps, hold fewer of them
+    lapi._timestamp_lookback = 4
+    response_data = json.loads((EXAMPLE_DATA_DIR / 'onset_licor_example_data.json').read_text())
+    expected = lapi._transform(response_data)
+    
+    # a sensor record of the first timestamp a few timestamps later is added to its reading, one reading per timestamp
+    nearby_data = dict(response_data, data = response_data['data'][1:])
+    nearby_data['data'].insert(3 * lapi._DEFAULT_RECORDS_PER_READING, response_data['data'][0])
+    readings = list(lapi._iter_transform(json.dumps(nearby_data)))
+    assert readings == expected
+    assert lapi._transform(nearby_data) == expected
+
+    # one after the first timestamp has been yielded is skipped rather than yielded again
+    late_data = dict(response_data, data = response_data['data'][1:] + response_data['data'][:1])
+    readings = list(lapi._iter_transform(json.dumps(late_data)))
+    assert [reading['data_datetime'] for reading in readings] == [reading['data_datetime'] for reading in expected]
+    assert readings[0] != expected[0]
+    assert "out of order" in caplog.text
+    # the full-document transform still combines them
+    assert lapi._transform(late_data) == expected
@@ -0,0 +1,64 @@
+"""test Licor request chunking against a local stub of the Licor data endpoint, no credentials needed"""
+
+import pytest, json, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timedelta, timezone
+
+from ewxpwsdb.weather_apis import LicorAPI
+
+
+class StubLicorHandler(BaseHTTPRequestHandler):
+    """echo the requested start time"""
+
+    def do_GET(self):
+        start_date_time = parse_qs(urlparse(self.path).query)['start_date_time'][0]
+        body = json.dumps({'start_date_time': start_date_time, 'data': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_licor_api(stub_station):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubLicorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    lapi = LicorAPI(stub_station('LICOR', {'sn': 'stub', 'api_token': 'stub'}))
+    lapi.base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    yield lapi
+    server.shutdown()
+    server.server_close()
+
+
+def test_licor_chunks_under_record_limit(stub_station):
+    lapi = LicorAPI(stub_station('LICOR', {'sn': 'stub', 'api_token': 'stub'}))
+    readings_per_chunk = lapi.max_chunk_duration / timedelta(minutes = lapi.sampling_interval)
+    assert readings_per_chunk * lapi.records_per_reading <= lapi._MAX_RECORDS_PER_REQUEST
+
+    start = datetime(2024,1,1, tzinfo=timezone.utc)
+    end = start + timedelta(days=95)
+    chunks = lapi.get_intervals(start, end)
+    assert len(chunks) == 4
+    assert chunks[0][0] == start and chunks[-1][1] == end
+    assert all([c[1] - c[0] <= lapi.max_chunk_duration for c in chunks])
+
+    # more sensors means shorter chunks
+    lapi_more_sensors = LicorAPI(stub_station('LICOR', {'sn': 'stub', 'api_token': 'stub', 'sensor_count': 20}))
+    assert lapi_more_sensors.max_chunk_duration < lapi.max_chunk_duration
+    assert len(lapi_more_sensors.get_intervals(start, end)) > len(chunks)
+
+
+def test_licor_long_request_in_chunk_order(stub_licor_api):
+    start = datetime(2024,1,1, tzinfo=timezone.utc)
+    end = start + timedelta(days=95)
+    chunks = stub_licor_api.get_intervals(start, end)
+
+    responses = stub_licor_api._get_readings(start, end)
+
+    assert [json.loads(r.text)['start_date_time'] for r in responses] == [stub_licor_api._format_time(c[0]) for c in chunks]
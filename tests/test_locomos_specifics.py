@@ -0,0 +1,77 @@
+"""test the Locomos (Ubidots) variable list cache against a local stub of the variables endpoint, no credentials needed"""
+
+import pytest, json, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+from ewxpwsdb.weather_apis import LocomosAPI
+
+EXAMPLE_DATA = Path(__file__).parent.parent / 'doc' / 'external_apis' / 'locomos2024_example_data.json'
+
+# variables of the device in the example data
+EXAMPLE_VARIABLES = {'6602ee239563b80938b65716': 'Temperature', '6602ee2360a15809db6d470d': 'humid', 
+                     '6602ee2360a15809db6d470e': 'LWS', '628b96f00f1a233d1c79bd7f': 'Humidity'}
+
+
+class StubUbidotsHandler(BaseHTTPRequestHandler):
+    """return the variables of the device, counting requests"""
+    variables:dict[str,str] = {}
+    requests = 0
+
+    def do_GET(self):
+        StubUbidotsHandler.requests += 1
+        body = json.dumps({'results': [{'id': id, 'label': label} for id, label in self.variables.items()]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_ubidots(monkeypatch, tmp_path):
+    monkeypatch.setenv("EWXPWS_CACHE_DIR", str(tmp_path))
+    StubUbidotsHandler.variables = dict(EXAMPLE_VARIABLES)
+    StubUbidotsHandler.requests = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubUbidotsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def locomos_api(stub_ubidots, stub_station):
+    """make a new LocomosAPI object for the stub server, as each collection does"""
+    def new_locomos_api()->LocomosAPI:
+        lapi = LocomosAPI(stub_station('LOCOMOS', {'token': 'stub', 'id': 'stub-device', 
+                                                   'var_mapping': {'Temperature': 'atmp', 'Humidity': 'relh', 'LWS': 'lws'}}))
+        lapi.base_url = stub_ubidots
+        return lapi
+    return new_locomos_api
+
+
+def test_variables_are_shared_through_cache(locomos_api):
+    assert locomos_api()._get_variables() == EXAMPLE_VARIABLES
+    assert StubUbidotsHandler.requests == 1
+    # a new api object, e.g. in the next collection, uses the saved list
+    assert locomos_api()._get_variables() == EXAMPLE_VARIABLES
+    assert StubUbidotsHandler.requests == 1
+
+
+def test_transform_refreshes_unknown_variables(locomos_api):
+    # the saved list is missing the temperature variable
+    StubUbidotsHandler.variables = {id: label for id, label in EXAMPLE_VARIABLES.items() if label != 'Temperature'}
+    locomos_api()._get_variables()
+    StubUbidotsHandler.variables = dict(EXAMPLE_VARIABLES)
+
+    lapi = locomos_api()
+    readings = lapi._transform(EXAMPLE_DATA.read_text())
+    assert StubUbidotsHandler.requests == 2
+    assert any(['atmp' in reading for reading in readings])
+    # and the refreshed list is saved
+    assert locomos_api()._get_variables() == EXAMPLE_VARIABLES
+    assert StubUbidotsHandler.requests == 2
@@ -0,0 +1,69 @@
+import asyncio, time
+
+from ewxpwsdb.weather_apis import ZentraAPI
+from ewxpwsdb.weather_apis.rate_limit import RateLimiter, get_rate_limiter
+
+
+def test_rate_limiter_queues_reservations():
+    limiter = RateLimiter(calls = 2, period = 1.0)
+    # first call is free, following calls are spaced by period/calls in order
+    delays = [limiter.reserve() for _ in range(3)]
+    assert delays[0] == 0
+    assert 0.45 < delays[1] <= 0.5
+    assert 0.95 < delays[2] <= 1.0
+
+
+def test_rate_limiter_burst():
+    limiter = RateLimiter(calls = 10, period = 1.0, burst = 3)
+    delays = [limiter.reserve() for _ in range(4)]
+    assert delays[:3] == [0, 0, 0]
+    assert delays[3] > 0
+
+
+def test_rate_limiter_defer():
+    limiter = RateLimiter(calls = 100, period = 1.0)
+    limiter.defer(0.5)
+    assert limiter.reserve() > 0.45
+
+
+def test_rate_limiter_acquire_sync_and_async():
+    limiter = RateLimiter(calls = 20, period = 1.0)
+    start = time.monotonic()
+    limiter.acquire()
+    limiter.acquire()
+    asyncio.run(limiter.aacquire())
+    assert time.monotonic() - start >= 0.09
+
+
+def test_limiters_shared_by_credential():
+    a = get_rate_limiter('ZENTRA', 'token-a', 1, 60)
+    assert get_rate_limiter('ZENTRA', 'token-a', 1, 60) is a
+    assert get_rate_limiter('ZENTRA', 'token-b', 1, 60) is not a
+    assert get_rate_limiter('DAVIS', 'token-a', 10, 1) is not a
+
+
+def test_zentra_stations_share_token_limiter(stub_station):
+    zapi_1 = ZentraAPI(stub_station('ZENTRA', {'sn': 'Z1', 'token': 'shared-token'}, station_code = 'Z1'))
+    zapi_2 = ZentraAPI(stub_station('ZENTRA', {'sn': 'Z2', 'token': 'shared-token'}, station_code = 'Z2'))
+    zapi_3 = ZentraAPI(stub_station('ZENTRA', {'sn': 'Z3', 'token': 'other-token'}, station_code = 'Z3'))
+    assert zapi_1._rate_limiter is zapi_2._rate_limiter
+    assert zapi_1._rate_limiter is not zapi_3._rate_limiter
+    assert zapi_1._rate_limiter.period == 60
+
+
+def test_zentra_lockout_seconds(stub_station):
+    zapi = ZentraAPI(stub_station('ZENTRA', {'sn': 'Z1', 'token': 'shared-token'}, station_code = 'Z1'))
+    assert zapi._lockout_seconds('{"detail": "Request was throttled. Lock out expires in 7 seconds."}') == 7
+    assert zapi._lockout_seconds('{"detail": "Request was throttled. Lock out expires in 52 seconds."}') == 52
+    assert zapi._lockout_seconds('unexpected') == 60
+
+
+def test_every_vendor_sets_rate_limit():
+    from ewxpwsdb.weather_apis import API_CLASS_TYPES
+    from ewxpwsdb.weather_apis.weather_api import WeatherAPI
+
+    for station_type, api_class in API_CLASS_TYPES.items():
+        # each vendor states its limit, or None when the vendor publishes none
+        assert '_rate_limit' in vars(api_class), station_type
+        # and counts it against the account credential rather than one limit for all stations of the type
+        assert api_class._rate_limit_credential is not WeatherAPI._rate_limit_credential, station_type
@@ -0,0 +1,53 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from ewxpwsdb.db.models import APIResponse, Reading, ReadingsPayload, TransformResult
+
+
+@pytest.fixture()
+def api_response()->APIResponse:
+    return APIResponse(id = 3, request_id = 'test', weatherstation_id = 1, station_sampling_interval = 5)
+
+
+def sensor_data_list(n:int)->list[dict]:
+    start = datetime(2024,1,1, tzinfo = timezone.utc)
+    return [{'data_datetime': start + timedelta(minutes = 5*i), 'atmp': 1.5, 'relh': 99, 'lws': 1, 'wdir': None} for i in range(n)]
+
+
+def test_construct_matches_validate(api_response):
+    sensor_data = sensor_data_list(5)
+    validated = [Reading.model_validate_from_station(dict(data), api_response) for data in sensor_data]
+    constructed = Reading.model_construct_from_station(sensor_data, api_response)
+
+    assert [r.model_dump() for r in constructed] == [r.model_dump() for r in validated]
+    assert all([isinstance(r.relh, float) for r in constructed])
+    # sensor data is not changed
+    assert 'apiresponse_id' not in sensor_data[0]
+
+
+def test_construct_checks_each_reading(api_response):
+    sensor_data = sensor_data_list(3)
+    sensor_data[0]['not_a_field'] = 1
+    with pytest.raises(ValueError):
+        Reading.model_construct_from_station(sensor_data, api_response)
+
+    sensor_data = sensor_data_list(3)
+    sensor_data[1]['data_datetime'] = datetime(2024,1,1)
+    with pytest.raises(ValueError):
+        Reading.model_construct_from_station(sensor_data, api_response)
+
+    assert Reading.model_construct_from_station([], api_response) == []
+
+
+def test_readings_payload_in_batches(api_response):
+    readings = Reading.model_construct_from_station(sensor_data_list(7), api_response)
+    payload = ReadingsPayload()
+    for i in range(0, len(readings), 3):
+        payload.add(readings[i:i+3])
+
+    result = TransformResult(apiresponse_id = 3, station_type = 'ZENTRA', transform_version = 1, transform_datetime = datetime.now(timezone.utc),
+                             reading_count = payload.reading_count, readings_payload = payload.compressed())
+    assert result.reading_count == 7
+    assert result.get_readings() == TransformResult(readings_payload = TransformResult.compress_readings(readings)).get_readings()
+    assert result.get_readings()[0] == {'data_datetime': '2024-01-01T00:00:00Z', 'atmp': 1.5, 'relh': 99.0, 'lws': 1.0}
+    assert TransformResult(readings_payload = ReadingsPayload().compressed()).get_readings() == []
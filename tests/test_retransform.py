@@ -0,0 +1,43 @@
+import pytest
+from pathlib import Path
+
+from ewxpwsdb.db.models import APIResponse, TransformResult
+from ewxpwsdb.retransform import transform_responses, retransform_station_type, RetransformProgress
+
+
+def test_transform_responses_in_worker(stub_station):
+    """transform runs on plain records, and reports responses that fail without stopping the chunk"""
+    station = stub_station('SPECTRUM', {'sn': 'stub', 'apikey': 'stub'})
+    station_records = {1: {**station.model_dump(), 'api_config': station.api_config}}
+    response_text = (Path(__file__).parent.parent / 'doc' / 'external_apis' / 'spectrum_example_data.json').read_text()
+
+    good_response = APIResponse(id = 10, request_id = 'good', weatherstation_id = 1, station_sampling_interval = 5, 
+                                response_payload = APIResponse.compress_text(response_text), response_hash = APIResponse.hash_text(response_text))
+    bad_response = APIResponse(id = 11, request_id = 'bad', weatherstation_id = 1, station_sampling_interval = 5, 
+                               response_payload = APIResponse.compress_text('not json'))
+
+    reading_rows, results, errors = transform_responses(station_records, [good_response.model_dump(), bad_response.model_dump()])
+
+    assert len(reading_rows) > 0
+    assert all([row['apiresponse_id'] == 10 and 'id' not in row for row in reading_rows])
+    assert [result['apiresponse_id'] for result in results] == [10]
+    assert results[0]['reading_count'] == len(reading_rows)
+    assert len(TransformResult(**results[0]).get_readings()) == len(reading_rows)
+    assert len(errors) == 1 and errors[0].startswith("api response 11")
+
+
+def test_retransform_station_type_is_resumable(db_with_data, station_type):
+    updates:list[RetransformProgress] = []
+    status = retransform_station_type(db_with_data, station_type, max_workers = 2, batch_size = 2, progress = updates.append)
+    assert status.errors == []
+    assert status.responses_done == status.responses_total
+    if status.responses_total > 2:
+        assert len(updates) > 1
+
+    # everything is current, so a second run has nothing to do
+    assert retransform_station_type(db_with_data, station_type, max_workers = 2).responses_total == 0
+
+
+def test_retransform_unknown_station_type(db_with_data):
+    with pytest.raises(ValueError):
+        retransform_station_type(db_with_data, 'NOT_A_TYPE')
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from ewxpwsdb.weather_apis import API_CLASS_TYPES
+from ewxpwsdb.scheduler import schedule_period_minutes, next_run_mark, request_interval
+
+
+def weather_api_of_type(station_type:str):
+    # the schedule only uses class attributes, so no station or api config is needed
+    return API_CLASS_TYPES[station_type].__new__(API_CLASS_TYPES[station_type])
+
+
+@pytest.mark.parametrize("station_type,expected_minutes", [('DAVIS', 15), ('ZENTRA', 15), ('RAINWISE', 30), ('LOCOMOS', 60)])
+def test_schedule_period_minutes(station_type, expected_minutes):
+    wapi = weather_api_of_type(station_type)
+    period_minutes = schedule_period_minutes(wapi)
+    assert period_minutes == expected_minutes
+    # each run requests at least the time since the previous run
+    assert wapi.standard_time_interval_minutes >= period_minutes
+
+
+def test_next_run_mark():
+    after = datetime(2024, 6, 1, 10, 7, 30, tzinfo=timezone.utc)
+    assert next_run_mark(15, after) == datetime(2024, 6, 1, 10, 15, tzinfo=timezone.utc)
+    assert next_run_mark(60, after) == datetime(2024, 6, 1, 11, 0, tzinfo=timezone.utc)
+    # on a mark, the next one
+    assert next_run_mark(15, datetime(2024, 6, 1, 10, 15, tzinfo=timezone.utc)) == datetime(2024, 6, 1, 10, 30, tzinfo=timezone.utc)
+    # across midnight
+    assert next_run_mark(60, datetime(2024, 6, 1, 23, 50, tzinfo=timezone.utc)) == datetime(2024, 6, 2, 0, 0, tzinfo=timezone.utc)
+    # local times are converted to UTC
+    eastern = timezone(timedelta(hours=-4))
+    assert next_run_mark(15, datetime(2024, 6, 1, 6, 7, tzinfo=eastern)) == datetime(2024, 6, 1, 10, 15, tzinfo=timezone.utc)
+
+
+def test_request_interval_ends_at_mark():
+    wapi = weather_api_of_type('LOCOMOS')
+    mark = datetime(2024, 6, 1, 11, 0, tzinfo=timezone.utc)
+    interval = request_interval(wapi, mark)
+    assert interval.end == mark
+    assert interval.start == mark - timedelta(minutes=wapi.standard_time_interval_minutes)
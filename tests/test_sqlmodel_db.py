@@ -69,3 +69,62 @@ def test_duplicate_insert(db_with_data: Any, test_station_data: dict):
 
 
 
+
+
+def test_compress_api_responses(db_with_data: Engine):
+    """rows stored before payload compression are converted by the upgrade and read back the same"""
+    from datetime import datetime, timezone
+    from uuid import uuid4
+    from ewxpwsdb.db.models import APIResponse
+    from ewxpwsdb.db.upgrade import upgrade_db, compress_api_responses
+
+    upgrade_db(db_with_data)
+
+    with Session(db_with_data) as session:
+        station = session.exec(select(WeatherStation)).first()
+        now = datetime.now(timezone.utc)
+        old_style_response = APIResponse(request_id = str(uuid4()), weatherstation_id = station.id, station_sampling_interval = 5,
+                                         request_datetime = now, data_start_datetime = now, data_end_datetime = now,
+                                         request_url = 'http://example.com', response_status_code = '200', response_reason = 'OK',
+                                         response_text = '{"data": [1,2,3]}', response_content = '{"data": [1,2,3]}')
+        session.add(old_style_response)
+        session.commit()
+        response_id = old_style_response.id
+
+    assert compress_api_responses(db_with_data, batch_size = 2) >= 1
+    # running again does nothing more
+    assert compress_api_responses(db_with_data) == 0
+
+    with Session(db_with_data) as session:
+        converted = session.get(APIResponse, response_id)
+        assert converted.response_text is None
+        assert converted.response_content is None
+        assert converted.get_response_text() == '{"data": [1,2,3]}'
+
+
+def test_reading_indexes_have_upgrade_statements():
+    """each index of the reading model is created by upgrade_db for databases made before it was added"""
+    from ewxpwsdb.db.upgrade import READING_INDEX_STATEMENTS
+
+    index_names = {index.name for index in Reading.__table__.indexes}
+    assert 'ix_reading_weatherstation_id_data_datetime' in index_names
+    for index_name in index_names:
+        assert any(f" {index_name} ON reading " in sql_str for sql_str in READING_INDEX_STATEMENTS)
+
+
+def test_upgrade_creates_reading_indexes(db_with_data: Engine):
+    """indexes dropped from an older database are built again by the upgrade, concurrently or not"""
+    from sqlalchemy import text
+    from ewxpwsdb.db.upgrade import upgrade_db
+
+    index_names = {index.name for index in Reading.__table__.indexes}
+    assert index_names <= {index['name'] for index in inspect(db_with_data).get_indexes('reading')}
+
+    for concurrently in [False, True]:
+        with Session(db_with_data) as session:
+            for index_name in index_names:
+                session.exec(text(f"DROP INDEX IF EXISTS {index_name}"))
+            session.commit()
+
+        upgrade_db(db_with_data, concurrently = concurrently)
+        assert index_names <= {index['name'] for index in inspect(db_with_data).get_indexes('reading')}
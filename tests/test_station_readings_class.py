@@ -112,6 +112,28 @@ def test_station_readings_gap_intervals(station_readings):
     assert isinstance(missing_readings_intervals[0], UTCInterval)
     
 
+def test_station_readings_gap_methods_agree(station_readings):
+    """gaps found in python from the reading times are the gaps the sql finds, other than at the very start"""
+    test_interval = UTCInterval(start = datetime.fromisoformat('2024-03-01T00:00+00:00'),end = datetime.now(UTC) )
+    python_gaps = station_readings.missing_summary(start_datetime=test_interval.start, end_datetime=test_interval.end, method='python')
+    sql_gaps = station_readings.missing_summary(start_datetime=test_interval.start, end_datetime=test_interval.end, method='sql')
+    sql_gaps = sorted([gap for gap in sql_gaps if gap.start > test_interval.start], key = lambda gap: gap.start)
+    assert [gap for gap in python_gaps if gap.start > test_interval.start] == sql_gaps
+
+
+def test_station_readings_gap_methods_unaligned_start(station_readings):
+    """a start between readings, as backfill uses, finds the same gaps as the start on the clock"""
+    aligned_start = datetime.fromisoformat('2024-03-01T00:00+00:00')
+    unaligned_start = aligned_start - timedelta(minutes = 2, seconds = 47, microseconds = 123)
+    end = datetime.now(UTC)
+    for method in ('python', 'sql'):
+        aligned_gaps = station_readings.missing_summary(start_datetime=aligned_start, end_datetime=end, method=method)
+        unaligned_gaps = station_readings.missing_summary(start_datetime=unaligned_start, end_datetime=end, method=method)
+        assert sorted(unaligned_gaps, key = lambda gap: gap.start) == sorted(aligned_gaps, key = lambda gap: gap.start)
+        # a single gap over the whole span means no stored reading was on the clock
+        assert not (len(unaligned_gaps) == 1 and unaligned_gaps[0].start <= aligned_start and unaligned_gaps[0].end >= end - timedelta(days = 1))
+    
+
 def test_station_readings_get_responses(station_readings):
 
     from ewxpwsdb.db.models import APIResponse
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, delete
+from sqlalchemy.exc import NoResultFound
+from sqlmodel import SQLModel
+
+from ewxpwsdb.db.database import Session
+from ewxpwsdb.db.models import WeatherStation
+from ewxpwsdb.station_registry import StationRegistry
+from ewxpwsdb.weather_apis import ZentraAPI
+
+
+@pytest.fixture
+def zentra_station(stub_station)->WeatherStation:
+    return stub_station('ZENTRA', {'sn': 'test', 'token': 'test'})
+
+
+@pytest.fixture
+def station_engine(zentra_station):
+    """in-memory database with only the weather station table"""
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[WeatherStation.__table__])  # type: ignore
+    with Session(engine) as session:
+        session.add(zentra_station.model_copy())
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+def delete_stations(engine):
+    with Session(engine) as session:
+        session.exec(delete(WeatherStation))  # type: ignore
+        session.commit()
+
+
+def test_station_records_are_cached(station_engine):
+    registry = StationRegistry(ttl_seconds = 60)
+    station = registry.station_by_code('STUB_ZENTRA', station_engine)
+    assert station.id == 1
+    assert registry.station_by_id(1, station_engine) is station
+
+    # served from the cache after the row is gone, until invalidated
+    delete_stations(station_engine)
+    assert registry.station_by_code('STUB_ZENTRA', station_engine) is station
+    registry.invalidate(station_code = 'STUB_ZENTRA')
+    with pytest.raises(NoResultFound):
+        registry.station_by_code('STUB_ZENTRA', station_engine)
+    with pytest.raises(NoResultFound):
+        registry.station_by_id(1, station_engine)
+
+
+def test_station_records_expire(station_engine):
+    registry = StationRegistry(ttl_seconds = 0)
+    registry.station_by_code('STUB_ZENTRA', station_engine)
+    delete_stations(station_engine)
+    with pytest.raises(NoResultFound):
+        registry.station_by_code('STUB_ZENTRA', station_engine)
+
+
+def test_weather_apis_are_copies_of_one_parsed_config(zentra_station):
+    registry = StationRegistry(ttl_seconds = 60)
+    station = zentra_station
+    first = registry.weather_api(station)
+    second = registry.weather_api(station)
+    assert isinstance(first, ZentraAPI)
+    assert first is not second
+    assert first.api_config is second.api_config
+    assert first.weather_station is station
+
+    # state from one user's requests is not seen by another
+    first.current_responses = ['response']
+    assert not hasattr(second, 'current_responses')
+
+    # a changed config is parsed again
+    changed = zentra_station.model_copy()
+    changed.api_config = json.dumps({'sn': 'other', 'token': 'test'})
+    assert registry.weather_api(changed).api_config.sn == 'other'
+
+
+def test_importing_stations_invalidates_cached_records(station_engine, stub_station, monkeypatch):
+    import ewxpwsdb.station_registry
+    from ewxpwsdb.db.importdata import import_station_records
+
+    registry = StationRegistry(ttl_seconds = 60)
+    monkeypatch.setattr(ewxpwsdb.station_registry, 'station_registry', registry)
+    assert json.loads(registry.station_by_code('STUB_ZENTRA', station_engine).api_config)['sn'] == 'test'
+
+    delete_stations(station_engine)
+    changed = stub_station('ZENTRA', {'sn': 'other', 'token': 'test'}).model_dump()
+    import_station_records([changed], station_engine)
+    assert registry.station_by_code('STUB_ZENTRA', station_engine).api_config == changed['api_config']
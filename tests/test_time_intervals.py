@@ -8,6 +8,7 @@ from zoneinfo import ZoneInfo
 
 from ewxpwsdb.time_intervals import fifteen_minute_mark, previous_fifteen_minute_period, \
     previous_fourteen_minute_period, is_utc, UTCInterval, datetimeUTC, one_day_interval, previous_fourteen_minute_interval
+from ewxpwsdb.time_intervals import plan_gap_requests, missing_intervals, sampling_grid_start
 
 
 @pytest.fixture
@@ -232,3 +233,99 @@ def test_local_to_interval():
 #     dtu = DatetimeUTC(datetime = dt_with_tz)
 #     assert isinstance(dtu.datetime, datetime)
 #     assert dtu.datetime.tzinfo == timezone.utc
+
+def test_default_now_is_evaluated_at_call_time(monkeypatch):
+    """defaults of 'now' are resolved on each call, not once when the module is imported"""
+    import ewxpwsdb.time_intervals as time_intervals
+
+    class LaterDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2030, 6, 1, 10, 7, tzinfo = tz)
+
+    monkeypatch.setattr(time_intervals, 'datetime', LaterDatetime)
+    assert time_intervals.fifteen_minute_mark() == datetime(2030, 6, 1, 10, 0, tzinfo = timezone.utc)
+    nowish_interval = time_intervals.previous_fourteen_minute_interval()
+    assert nowish_interval.end == datetime(2030, 6, 1, 10, 0, tzinfo = timezone.utc)
+
+
+def test_plan_gap_requests_merges_nearby_gaps():
+    t0 = datetime(2024, 6, 1, 0, 0, tzinfo = timezone.utc)
+    five = timedelta(minutes = 5)
+    # single missing readings 20 minutes apart (3 readings stored between each), and one gap a day later
+    gaps = [UTCInterval(start = t0 + i * 4 * five, end = t0 + i * 4 * five) for i in range(10)]
+    gaps.append(UTCInterval(start = t0 + timedelta(days = 1), end = t0 + timedelta(days = 1, hours = 1)))
+
+    planned = plan_gap_requests(gaps, sampling_interval = 5, max_window = timedelta(days = 7), request_cost_readings = 12)
+    assert len(planned) == 2
+    # end is padded once per request so the last missing reading is included
+    assert planned[0] == UTCInterval(start = t0, end = t0 + 9 * 4 * five + five)
+    assert planned[1].end == t0 + timedelta(days = 1, hours = 1) + five
+
+    # when a request costs less than the readings between gaps, the gaps are requested separately
+    planned = plan_gap_requests(gaps, sampling_interval = 5, max_window = timedelta(days = 7), request_cost_readings = 2)
+    assert len(planned) == 11
+    assert planned[3] == UTCInterval(start = gaps[3].start, end = gaps[3].end + five)
+
+
+def test_plan_gap_requests_respects_window():
+    t0 = datetime(2024, 6, 1, 0, 0, tzinfo = timezone.utc)
+    five = timedelta(minutes = 5)
+    window = timedelta(days = 1)
+    # one gap of 3 days
+    planned = plan_gap_requests([UTCInterval(start = t0, end = t0 + timedelta(days = 3))], sampling_interval = 5, 
+                                max_window = window, request_cost_readings = 1000)
+    assert all([interval.end - interval.start <= window for interval in planned])
+    assert planned[0].start == t0
+    assert planned[-1].end == t0 + timedelta(days = 3) + five
+    # consecutive requests don't overlap or leave a reading out
+    for previous, following in zip(planned, planned[1:]):
+        assert following.start == previous.end
+
+    # gaps that would exceed the window together are not merged
+    gaps = [UTCInterval(start = t0, end = t0 + timedelta(hours = 20)), UTCInterval(start = t0 + timedelta(hours = 21), end = t0 + timedelta(hours = 30))]
+    planned = plan_gap_requests(gaps, sampling_interval = 5, max_window = window, request_cost_readings = 1000)
+    assert len(planned) == 2
+
+def test_missing_intervals():
+    t0 = datetime(2024, 6, 1, 0, 0, tzinfo = timezone.utc)
+    five = timedelta(minutes = 5)
+    interval = UTCInterval(start = t0, end = t0 + 20 * five)
+    # missing: 0-1 at the start, 5, 9-12, and 19-20 at the end.  A reading off the clock and a duplicate are ignored
+    present = [i for i in range(21) if i not in (0, 1, 5, 9, 10, 11, 12, 19, 20)]
+    timestamps = sorted([t0 + i * five for i in present] + [t0 + 3 * five, t0 + 7 * five + timedelta(minutes = 2)])
+
+    gaps = missing_intervals(timestamps, interval, sampling_interval = 5)
+    assert [(g.start, g.end) for g in gaps] == [(t0, t0 + five), (t0 + 5 * five, t0 + 5 * five), 
+                                                (t0 + 9 * five, t0 + 12 * five), (t0 + 19 * five, t0 + 20 * five)]
+
+    # no readings at all is one gap, and all readings is none
+    assert missing_intervals([], interval, sampling_interval = 5) == [UTCInterval(start = t0, end = t0 + 20 * five)]
+    assert missing_intervals([t0 + i * five for i in range(21)], interval, sampling_interval = 5) == []
+
+
+def test_sampling_grid_start():
+    t0 = datetime(2024, 6, 1, 0, 0, tzinfo = timezone.utc)
+    assert sampling_grid_start(t0, 5) == t0
+    assert sampling_grid_start(t0 - timedelta(minutes = 2, seconds = 47, microseconds = 123), 5) == t0
+    assert sampling_grid_start(t0 + timedelta(minutes = 16), 15) == t0 + timedelta(minutes = 30)
+    # on the UTC clock whatever the timezone of the datetime
+    eastern = datetime(2024, 6, 1, 20, 1, tzinfo = ZoneInfo('US/Eastern'))
+    assert sampling_grid_start(eastern, 15) == datetime(2024, 6, 1, 20, 15, tzinfo = ZoneInfo('US/Eastern'))
+
+
+def test_missing_intervals_unaligned_start():
+    """an interval starting between readings, as backfill's 'now' minus n days does, still finds the stored readings"""
+
+    t0 = datetime(2024, 6, 1, 0, 0, tzinfo = timezone.utc)
+    five = timedelta(minutes = 5)
+    start = t0 - timedelta(minutes = 2, seconds = 47, microseconds = 123)
+    timestamps = [t0, t0 + five, t0 + 2 * five]
+    
+    assert missing_intervals(timestamps, UTCInterval(start = start, end = t0 + 2 * five), sampling_interval = 5) == []
+
+    gaps = missing_intervals(timestamps, UTCInterval(start = start, end = t0 + 4 * five + timedelta(seconds = 30)), sampling_interval = 5)
+    assert gaps == [UTCInterval(start = t0 + 3 * five, end = t0 + 4 * five)]
+
+    # no tick between the start and the end
+    assert missing_intervals([], UTCInterval(start = start, end = t0 - timedelta(seconds = 1)), sampling_interval = 5) == []
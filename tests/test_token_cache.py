@@ -0,0 +1,96 @@
+import json, os, stat, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import ewxpwsdb.weather_apis.token_cache as token_cache
+from ewxpwsdb.weather_apis.token_cache import TokenCache
+from ewxpwsdb.weather_apis import OnsetAPI
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("EWXPWS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(token_cache, '_tokens', {})
+
+
+def test_token_is_fetched_once_across_threads(tmp_path):
+    fetches = []
+    def fetch():
+        fetches.append(1)
+        time.sleep(0.05)
+        return 'token-1', 600
+
+    cache = TokenCache('test')
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(cache.get_or_fetch('client', fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ['token-1'] * 5
+    assert len(fetches) == 1
+
+    # saved in a file only the owner can read
+    token_file = cache._file_cache._path('client')
+    assert stat.S_IMODE(os.stat(token_file).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(token_file.parent).st_mode) == 0o700
+
+
+def test_token_is_shared_through_file(monkeypatch):
+    TokenCache('test').set('client', 'token-1', 600)
+    # as if in a new process
+    monkeypatch.setattr(token_cache, '_tokens', {})
+    assert TokenCache('test').get_or_fetch('client', lambda: ('token-2', 600)) == 'token-1'
+
+
+def test_token_is_refreshed_before_expiry():
+    cache = TokenCache('test', refresh_margin_seconds = 60)
+    cache.set('client', 'token-1', 30)
+    assert cache.get('client') is None
+    assert cache.get_or_fetch('client', lambda: ('token-2', 600)) == 'token-2'
+
+    cache.invalidate('client')
+    assert cache.get('client') is None
+    # a failed fetch is not saved
+    assert cache.get_or_fetch('client', lambda: None) is None
+
+
+class StubOnsetAuthHandler(BaseHTTPRequestHandler):
+    """token endpoint of the Onset api, counting requests"""
+    requests = 0
+
+    def do_POST(self):
+        StubOnsetAuthHandler.requests += 1
+        body = json.dumps({'access_token': f"token-{self.requests}", 'expires_in': 600}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_onset_stations_share_token(stub_station):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOnsetAuthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubOnsetAuthHandler.requests = 0
+
+    def onset_api(station_id:int)->OnsetAPI:
+        station = stub_station('ONSET', {'sn': f'sn{station_id}', 'client_id': 'stub-client', 'client_secret': 'stub', 
+                                         'ret_form': 'JSON', 'user_id': 'stub', 'sensor_sn': {}}, 
+                               station_id = station_id, station_code = f'STUB_ONSET{station_id}')
+        oapi = OnsetAPI(station)
+        oapi.base_url = f"http://127.0.0.1:{server.server_port}/ws"
+        return oapi
+
+    try:
+        assert onset_api(1)._get_auth() == 'token-1'
+        assert onset_api(2)._get_auth() == 'token-1'
+        assert StubOnsetAuthHandler.requests == 1
+    finally:
+        server.shutdown()
+        server.server_close()
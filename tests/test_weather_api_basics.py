@@ -71,10 +71,10 @@ def test_weather_api_get_get_response(wapi):
     assert isinstance(responses, list)
     assert len(responses ) > 0 
     assert isinstance(response, APIResponse)
-    assert isinstance(response.response_text, str)
+    assert isinstance(response.get_response_text(), str)
 
     try: 
-        response_dict = json.loads(response.response_text)
+        response_dict = json.loads(response.get_response_text())
     except ValueError:
         pytest.fail("could not read response text JSON")
 
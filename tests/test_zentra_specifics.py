@@ -1,9 +1,12 @@
-import pytest
+import pytest, json, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
 from sqlmodel import select, Session
 from ewxpwsdb.db.models import WeatherStation
 from ewxpwsdb.weather_apis import ZentraAPI
 from ewxpwsdb.time_intervals import previous_fourteen_minute_interval
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 
 @pytest.fixture(scope='module')
@@ -76,10 +79,76 @@ def test_zentra_page_count_math(zentra_station):
 #         responses = zapi.get_readings(interval.start,interval.end)
 
 
+class StubZentraHandler(BaseHTTPRequestHandler):
+    """serve the example zentra response for any page, slowly, tagged with the page number requested"""
+    delay = 0.1
+    pages_requested:list[int] = []
 
+    def do_GET(self):
+        time.sleep(self.delay)
+        page_num = int(parse_qs(urlparse(self.path).query)['page_num'][0])
+        self.pages_requested.append(page_num)
+        example_data = json.loads((Path(__file__).parent.parent / 'doc' / 'external_apis' / 'zentra_example_data.json').read_text())
+        example_data['pagination']['page_num'] = page_num
+        body = json.dumps(example_data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_zentra_api(stub_station):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubZentraHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    zapi = ZentraAPI(stub_station('ZENTRA', {'sn': 'stub', 'token': 'stub-zentra-pages'}))
+    zapi.base_url = f"http://127.0.0.1:{server.server_port}/api/v4"
+    # small pages and no rate limit so that the test makes several quick page requests
+    zapi._MAX_READINGS_PER_PAGE = 12
+    zapi._rate_limit = None
+    yield zapi
+    server.shutdown()
+    server.server_close()
+
+
+def test_zentra_pages_fetched_in_order(stub_zentra_api):
+    start = datetime(2024,5,3,12,0, tzinfo=timezone.utc)
+    end = start + timedelta(hours=4)
+    assert stub_zentra_api._expected_page_count(start, end) == 4
+
+    responses = stub_zentra_api._get_readings(start, end)
+
+    assert len(responses) == 4
+    assert [json.loads(r.text)['pagination']['page_num'] for r in responses] == [1,2,3,4]
+
+
+def test_zentra_stops_requesting_pages_when_caller_stops(stub_zentra_api):
+    start = datetime(2024,5,3,12,0, tzinfo=timezone.utc)
+    end = start + timedelta(hours=4)
+    StubZentraHandler.pages_requested = []
+
+    for api_response in stub_zentra_api.iter_readings(start, end):
+        break
+
+    # later pages would use up the token's one call a minute
+    time.sleep(StubZentraHandler.delay * 2)
+    assert StubZentraHandler.pages_requested == [1]
 
-        
 
+def test_zentra_iter_readings_yields_each_page(stub_zentra_api):
+    start = datetime(2024,5,3,12,0, tzinfo=timezone.utc)
+    end = start + timedelta(hours=4)
 
+    records = []
+    for api_response in stub_zentra_api.iter_readings(start, end):
+        records.append(api_response)
+        assert stub_zentra_api.data_present_in_response(api_response)
 
-    
\ No newline at end of file
+    assert len(records) == 4
+    assert stub_zentra_api.current_api_response_records == records
+    assert len(stub_zentra_api.transform(records, database = False)) > 0